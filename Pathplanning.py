@@ -1,164 +1,57 @@
-import heapq
-import matplotlib.pyplot as plt
-import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+from gridengine import MovementModel, FOUR_CONNECTED, EIGHT_CONNECTED, EIGHT_CONNECTED_NO_CORNER_CUTTING
+from instrumentation import Metrics, timed
+from parsing import parse_packages, parse_route_and_packages
+from planning import a_star, jump_point_search, bidirectional_a_star
+from routecodes import encode_route
+from simulation import simulate_delivery
+from runlog import write_run_log
 import time
 
-def heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+# matplotlib is only imported once something is drawn, so importing this module for
+# its planning functions stays cheap
+if TYPE_CHECKING:
+    from renderer import DeliveryRenderer
+
+def heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> float:
     """
-    Heuristic function for A* algorithm: Manhattan distance between two points.
+    Heuristic function for A* algorithm, kept for callers of the old demo API:
+    the EIGHT_CONNECTED estimate (Chebyshev distance) between two points.
 
     Args:
         a (Tuple[int, int]): Point A (row, column).
         b (Tuple[int, int]): Point B (row, column).
 
     Returns:
-        int: Estimated distance between A and B.
-    """
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-def parse_packages(package_list: List[Dict]) -> List[Dict]:
-    """
-    Parse and sort the package list based on urgency (ascending).
-    Within the same urgency, sort by weight (descending).
-
-    Args:
-        package_list (List[Dict]): List of package details.
-
-    Returns:
-        List[Dict]: Sorted package list.
-    """
-    return sorted(package_list, key=lambda x: (x['urgency'], -x['weight']))
-
-def parse_route_and_packages(route: List[List[str]], packages: List[Dict]) -> Tuple[Tuple[int, int], Tuple[int, int], Dict[str, Tuple[int, int]]]:
-    """
-    Parse the route to identify start, end points, and package locations.
-
-    Args:
-        route (List[List[str]]): 2D map representation of the route.
-        packages (List[Dict]): List of package details.
-
-    Returns:
-        Tuple[Tuple[int, int], Tuple[int, int], Dict[str, Tuple[int, int]]]: Coordinates of the start, end points, and package locations.
-    """
-    start, end = None, None
-    package_locations = {}
-    for i, row in enumerate(route):
-        for j, cell in enumerate(row):
-            if cell == 'S':
-                start = (i, j)
-            elif cell == 'E':
-                end = (i, j)
-            elif cell.startswith('P'):
-                package_locations[cell] = (i, j)
-
-    if not start or not end:
-        raise ValueError("Route must contain start (S) and end (E) points.")
-
-    return start, end, package_locations
-
-def a_star(route: List[List[str]], start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """
-    Implement A* algorithm to find the shortest path between start and end.
-
-    Args:
-        route (List[List[str]]): 2D map of the route.
-        start (Tuple[int, int]): Starting coordinates.
-        end (Tuple[int, int]): Ending coordinates.
-
-    Returns:
-        List[Tuple[int, int]]: Path from start to end.
+        float: Estimated distance between A and B.
     """
-    rows, cols = len(route), len(route[0])
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, end)}
-
-    def get_neighbors(node):
-        directions = [
-            (-1, 0), (1, 0), (0, -1), (0, 1),  # Cardinal directions
-            (-1, -1), (-1, 1), (1, -1), (1, 1)  # Diagonal directions
-        ]
-        neighbors = []
-        for dr, dc in directions:
-            r, c = node[0] + dr, node[1] + dc
-            if 0 <= r < rows and 0 <= c < cols and route[r][c] != 'X':
-                neighbors.append((r, c))
-        return neighbors
-
-    # def heuristic(a, b):
-    #     return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    while open_set:
-        _, current = heapq.heappop(open_set)
+    return EIGHT_CONNECTED.heuristic(a, b)
 
-        if current == end:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.reverse()
-            return path
-
-        for neighbor in get_neighbors(current):
-            tentative_g_score = g_score[current] + 1
-            if tentative_g_score < g_score.get(neighbor, float('inf')):
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
-                if neighbor not in [i[1] for i in open_set]:
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-
-    raise ValueError("No path found from start to end.")
-
-def visualize_with_animation(route: List[List[str]], path: List[Tuple[int, int]], title: str) -> None:
+def visualize_with_animation(renderer: 'DeliveryRenderer', path: List[Tuple[int, int]], title: str) -> None:
     """
-    Visualize the route and path with animation using Matplotlib.
+    Visualize the path with animation using Matplotlib.
 
     Args:
-        route (List[List[str]]): 2D grid map of the route.
+        renderer (DeliveryRenderer): Persistent view of the route.
         path (List[Tuple[int, int]]): Path to visualize.
         title (str): Title for the visualization.
     """
-    rows, cols = len(route), len(route[0])
-    grid = np.zeros((rows, cols))
-    for r in range(rows):
-        for c in range(cols):
-            if route[r][c] == 'X':
-                grid[r][c] = -1
-            elif route[r][c] == 'S':
-                grid[r][c] = 2
-            elif route[r][c] == 'E':
-                grid[r][c] = 3
-            elif route[r][c].startswith('P'):
-                grid[r][c] = 4
-
-    plt.ion()
-    fig, ax = plt.subplots(figsize=(8, 8))
+    renderer.clear_path()
     for r, c in path:
-        grid[r][c] = 1
-        ax.clear()
-        ax.imshow(grid, cmap="coolwarm", origin="upper")
-        ax.set_xticks(range(cols))
-        ax.set_yticks(range(rows))
-        ax.set_title(title)
-        plt.pause(0.1)
-
-    plt.ioff()
-    plt.show()
+        renderer.step((r, c), title)
 
-def execute_delivery(packages: List[Dict], route: List[List[str]]) -> None:
+def execute_delivery(packages: List[Dict], route: List[List[str]], movement: MovementModel = EIGHT_CONNECTED, metrics: Optional[Metrics] = None,
+                     log: Optional[str] = None) -> None:
     """
     Simulate package delivery based on urgency, package weight limits, and shortest route.
 
     Args:
         packages (List[Dict]): List of package details.
         route (List[List[str]]): 2D map representation of the route.
+        movement (MovementModel): Allowed moves, step costs and heuristic used for every leg.
+        metrics (Metrics, optional): Receives planning, rendering and sleep times and per-trip stats.
+        log (str, optional): Run log to write (see runlog.py), which holds every path driven.
     """
-    start, end, package_locations = parse_route_and_packages(route, packages)
-
     sorted_packages = parse_packages(packages)
 
     for i in range(len(sorted_packages)):
@@ -166,41 +59,46 @@ def execute_delivery(packages: List[Dict], route: List[List[str]]) -> None:
     
     print(f"Delivery Simulation Starts with {len(sorted_packages)} packages.")
 
-    current_position = start
+    # Run the delivery headlessly, then replay its events on screen
     truck_capacity = 100
-    remaining_capacity = truck_capacity
-    truck_contents = []
-
-    while sorted_packages:
-        for package in sorted_packages[:]:
-            package_id = package['id']
-            package_weight = package['weight']
-            package_location = package_locations[package_id]
-
-            if package_weight <= remaining_capacity:
-                # Pick up the package
-                path_to_package = a_star(route, current_position, package_location)
-                print(f"Picking up Package {package_id} at {package_location}: Path {path_to_package}")
-                visualize_with_animation(route, path_to_package, f"Picking up {package_id}")
-
-                remaining_capacity -= package_weight
-                truck_contents.append(package)
-                sorted_packages.remove(package)
-                current_position = package_location
-
-                # Remove package from map
-                route[package_location[0]][package_location[1]] = '.'
-
-        # Deliver to warehouse
-        path_to_warehouse = a_star(route, current_position, end)
-        print(f"Delivering to Warehouse: Path {path_to_warehouse}")
-        visualize_with_animation(route, path_to_warehouse, "Delivering to Warehouse")
+    # One encoding of the map serves the planner and the renderer
+    route_codes = encode_route(route)
+    run = simulate_delivery(packages, route_codes, truck_capacity, movement, metrics=metrics)
+    plan, baseline = run['plan'], run['baseline']
+    print(f"Planned {len(plan['trips'])} trips: distance {plan['distance']:.1f}, simulated time {plan['time']:.1f}s "
+          f"(greedy: distance {baseline['distance']:.1f}, simulated time {baseline['time']:.1f}s)")
+    if log is not None:
+        write_run_log(log, run, route_codes)
+
+    import matplotlib.pyplot as plt
+    from renderer import DeliveryRenderer
 
-        current_position = end
-        remaining_capacity = truck_capacity
-        truck_contents.clear()
-    
-    time.sleep(5)
+    plt.ion()
+    renderer = DeliveryRenderer(route_codes)
+
+    for event in run['events']:
+        if event['type'] == 'leg':
+            path = event['path']
+            if event['target'] == 'E':
+                print(f"Delivering to Warehouse: {len(path)} blocks")
+                with timed(metrics, 'rendering'):
+                    visualize_with_animation(renderer, path, "Delivering to Warehouse")
+            else:
+                print(f"Picking up Package {event['target']} at {event['location']}: {len(path)} blocks")
+                with timed(metrics, 'rendering'):
+                    visualize_with_animation(renderer, path, f"Picking up {event['target']}")
+
+        elif event['type'] == 'pickup':
+            # Remove package from map (the renderer updates the route and its encoding)
+            package_location = event['location']
+            with timed(metrics, 'rendering'):
+                renderer.set_cell(package_location, '.')
+
+    if metrics is not None:
+        # The frame interval is slept inside rendering; report it on its own as well
+        metrics.count('frame_sleep_seconds', renderer.sleep_time)
+    with timed(metrics, 'sleep', reason='ending'):
+        time.sleep(5)
 
 if __name__ == "__main__":
     # List of Packages in format of dictionary in a list
@@ -254,4 +152,15 @@ if __name__ == "__main__":
     ]
 
 
-    execute_delivery(packages, route)
+    # Movement model: FOUR_CONNECTED, EIGHT_CONNECTED or EIGHT_CONNECTED_NO_CORNER_CUTTING
+    movement = EIGHT_CONNECTED
+
+    # Instrumentation: set to Metrics() to collect timings and counters, written to delivery_metrics.prom at the end
+    metrics = None
+
+    # Run log: set to 'delivery_run.ndjson' to record every path driven, replayable with: python runlog.py delivery_run.ndjson
+    log = None
+
+    execute_delivery(packages, route, movement, metrics, log)
+    if metrics is not None:
+        metrics.write('delivery_metrics.prom')
@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator
+from gridengine import MOVEMENT_MODELS
+from mapformat import load_map
+from simulation import simulate_delivery
+from fleet import simulate_fleet
+
+def load_scenarios(source: str) -> Iterator[Dict]:
+    """
+    Read scenarios lazily from a JSONL file (one scenario per line) or a directory of .json files.
+
+    A scenario is a dict with 'packages', 'route' and 'truck_capacity', and optionally
+    'name', 'movement' (a MOVEMENT_MODELS name) and 'time_budget'. Instead of 'route' it
+    may give 'map', the path of a binary map file (see mapformat.py). Instead of
+    'truck_capacity' it may give 'trucks', a fleet as accepted by simulate_fleet.
+
+    Args:
+        source (str): Path of the JSONL file or directory.
+
+    Yields:
+        Dict: One scenario at a time.
+    """
+    if os.path.isdir(source):
+        for file_name in sorted(os.listdir(source)):
+            if file_name.endswith('.json'):
+                with open(os.path.join(source, file_name), encoding='utf-8') as f:
+                    scenario = json.load(f)
+                scenario.setdefault('name', file_name[:-len('.json')])
+                yield scenario
+    else:
+        with open(source, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    scenario = json.loads(line)
+                    scenario.setdefault('name', f"line-{line_number}")
+                    yield scenario
+
+def run_scenario(scenario: Dict, time_budget: float = 1.0) -> Dict:
+    """
+    Run one scenario through the headless simulation. Errors are reported, not raised,
+    so one broken scenario does not stop the batch.
+
+    Args:
+        scenario (Dict): Scenario as produced by load_scenarios.
+        time_budget (float): Route optimization budget unless the scenario sets its own.
+
+    Returns:
+        Dict: Result row with distance, trips and simulated time, or the failure.
+    """
+    started = time.perf_counter()
+    result = {'name': scenario.get('name')}
+    try:
+        movement = MOVEMENT_MODELS[scenario.get('movement', '8-connected')]
+        route = load_map(scenario['map']) if 'map' in scenario else scenario['route']
+        if 'trucks' in scenario:
+            # Plan the fleet in this worker; the batch is already spread over the pool
+            run = simulate_fleet(scenario['packages'], route, scenario['trucks'], movement,
+                                 scenario.get('time_budget', time_budget), workers=1)
+            result.update({
+                'status': 'ok',
+                'distance': run['distance'],
+                'trips': sum(len(truck['trips']) for truck in run['trucks'].values()),
+                'simulated_time': run['makespan'],
+                'utilization': {name: truck['time_utilization'] for name, truck in run['trucks'].items()},
+            })
+        else:
+            run = simulate_delivery(scenario['packages'], route, scenario['truck_capacity'], movement,
+                                    time_budget=scenario.get('time_budget', time_budget))
+            result.update({
+                'status': 'ok',
+                'distance': run['distance'],
+                'trips': len(run['trips']),
+                'simulated_time': run['clock'],
+                'running_time': run['total_running_time'],
+                'baseline_distance': run['baseline']['distance'],
+                'baseline_time': run['baseline']['time'],
+            })
+    except Exception as error:
+        result.update({'status': 'failed', 'error': f"{type(error).__name__}: {error}"})
+    result['wall_time'] = time.perf_counter() - started
+    return result
+
+def run_batch(source: str, output: str, workers: int = None, time_budget: float = 1.0) -> Dict:
+    """
+    Fan the scenarios out over a process pool and stream each result to a JSONL file as it finishes.
+
+    Only a few scenarios per worker are in flight at a time, so large inputs are never
+    loaded into memory at once.
+
+    Args:
+        source (str): JSONL file or directory of scenarios.
+        output (str): Path of the JSONL result file.
+        workers (int, optional): Number of worker processes (defaults to the CPU count).
+        time_budget (float): Route optimization budget per scenario.
+
+    Returns:
+        Dict: Totals for the batch: scenarios, failures and wall time.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    done = failed = 0
+    scenarios = load_scenarios(source)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(output, 'w', encoding='utf-8') as out:
+        def record(finished) -> None:
+            nonlocal done, failed
+            for future in finished:
+                result = future.result()
+                failed += result['status'] != 'ok'
+                done += 1
+                out.write(json.dumps(result) + '\n')
+            out.flush()
+
+        pending = set()
+        for scenario in scenarios:
+            pending.add(executor.submit(run_scenario, scenario, time_budget))
+            if len(pending) >= workers * 4:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                record(finished)
+        record(wait(pending).done)
+
+    return {'scenarios': done, 'failed': failed, 'wall_time': time.perf_counter() - started}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many delivery scenarios headlessly across a process pool.")
+    parser.add_argument('source', help="JSONL file or directory of .json scenarios")
+    parser.add_argument('-o', '--output', default='results.jsonl', help="JSONL file the results are streamed to")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--time-budget', type=float, default=1.0, help="route optimization seconds per scenario")
+    args = parser.parse_args()
+
+    summary = run_batch(args.source, args.output, args.workers, args.time_budget)
+    print(f"{summary['scenarios']} scenarios ({summary['failed']} failed) in {summary['wall_time']:.1f}s")
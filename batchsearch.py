@@ -0,0 +1,178 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from connectivity import ComponentIndex
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+class BatchSearch:
+    """
+    Shortest paths from one source to many goals, or from many sources to one goal, in
+    a single search per call.
+
+    Each call is a Dijkstra search that stops as soon as every goal is settled (or the
+    nearest `limit` of them), so picking the nearest of N packages costs one search
+    instead of N. Moves are symmetric, so many_to_one searches backwards from the goal.
+
+    The cost, step and move code buffers are allocated once per grid and reused by every
+    call; only the costs are reset, with one in-place fill (well under a millisecond for
+    a million cells). Results and paths refer to the most recent call.
+
+    Dijkstra settles the goals in order of cost, so the search for all goals covers the
+    disc out to the farthest one. For a handful of distant goals, separate A* searches
+    can be cheaper; the nearest goal, or many goals, are where one search pays off.
+    """
+
+    def __init__(self, grid: GridMap, movement: MovementModel = EIGHT_CONNECTED, components: Optional[ComponentIndex] = None):
+        """
+        Args:
+            grid (GridMap): Compiled grid. Cells may be opened or blocked between calls.
+            movement (MovementModel): Allowed moves and step costs.
+            components (ComponentIndex, optional): Connectivity of the grid. Goals in another
+                component are then dropped up front instead of flooding the source's region.
+        """
+        self.grid = grid
+        self.movement = movement
+        self.components = components
+        self.moves = list(enumerate(movement.compile(grid.width)))
+        self.root = None
+        self.backward = False
+        self._allocate()
+
+    def _allocate(self) -> None:
+        size = self.grid.size
+        self.dist = np.empty(size)
+        self.step_counts = np.empty(size, dtype=np.int64)
+        self.codes = np.empty(size, dtype=np.int8)
+        self.path_codes = self.codes
+
+    def __getstate__(self) -> Dict:
+        # The buffers are scratch space; don't ship them to worker processes
+        state = self.__dict__.copy()
+        for name in ('dist', 'step_counts', 'codes', 'path_codes'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._allocate()
+        self.root = None
+
+    def one_to_many(self, source: Tuple[int, int], goals: List[Tuple[int, int]], limit: Optional[int] = None,
+                    codes: Optional[np.ndarray] = None, stats: Optional[Dict] = None) -> Dict[Tuple[int, int], float]:
+        """
+        Costs from one source to many goals.
+
+        Args:
+            source (Tuple[int, int]): Starting coordinates.
+            goals (List[Tuple[int, int]]): Goal coordinates.
+            limit (int, optional): Stop once this many goals are settled, e.g. 1 for the nearest goal.
+            codes (np.ndarray, optional): int8 array of grid size the move codes are written to
+                (only for the cells reached), e.g. a row kept by DistanceMatrix for reading legs back.
+            stats (Dict, optional): Filled with the number of node expansions and heap pushes.
+
+        Returns:
+            Dict[Tuple[int, int], float]: Cost of every goal reached, nearest first. Unreachable goals are left out.
+        """
+        return self._search(source, goals, limit, codes, stats, backward=False)
+
+    def many_to_one(self, sources: List[Tuple[int, int]], goal: Tuple[int, int], limit: Optional[int] = None,
+                    stats: Optional[Dict] = None) -> Dict[Tuple[int, int], float]:
+        """
+        Costs from many sources to one goal, e.g. from every truck to the warehouse.
+
+        Args:
+            sources (List[Tuple[int, int]]): Starting coordinates.
+            goal (Tuple[int, int]): Ending coordinates.
+            limit (int, optional): Stop once this many sources are settled, e.g. 1 for the closest one.
+            stats (Dict, optional): Filled with the number of node expansions and heap pushes.
+
+        Returns:
+            Dict[Tuple[int, int], float]: Cost from every source that reaches the goal, nearest first.
+        """
+        return self._search(goal, sources, limit, None, stats, backward=True)
+
+    def _search(self, root: Tuple[int, int], targets: List[Tuple[int, int]], limit: Optional[int],
+                codes_buffer: Optional[np.ndarray], stats: Optional[Dict], backward: bool) -> Dict[Tuple[int, int], float]:
+        grid = self.grid
+        self.dist.fill(np.inf)
+        self.root, self.backward = grid.node_id(root), backward
+        self.path_codes = self.codes if codes_buffer is None else codes_buffer
+
+        remaining = {}
+        label = self.components.component(root) if self.components is not None else None
+        if label != -1:
+            for cell in targets:
+                if label is None or self.components.component(cell) == label:
+                    remaining[grid.node_id(cell)] = tuple(cell)
+        wanted = len(remaining) if limit is None else min(limit, len(remaining))
+
+        source = self.root
+        dist, step_counts = memoryview(self.dist), memoryview(self.step_counts)
+        codes = memoryview(self.path_codes)
+        passable = memoryview(grid.passable)
+        moves = self.moves
+        settled = {}
+        expansions = stale = 0
+
+        dist[source] = 0
+        step_counts[source] = 0
+        open_set = [(0, source)]
+        if not passable[source] or not wanted:
+            open_set = []
+        while open_set:
+            d, current = heapq.heappop(open_set)
+            if d > dist[current]:
+                stale += 1
+                continue
+            expansions += 1
+
+            if current in remaining:
+                settled[remaining.pop(current)] = d
+                if len(settled) == wanted:
+                    break
+
+            for code, (offset, cost, side_a, side_b) in moves:
+                neighbor = current + offset
+                if not passable[neighbor]:
+                    continue
+                if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                    continue
+                tentative = d + cost
+                if tentative < dist[neighbor]:
+                    dist[neighbor] = tentative
+                    step_counts[neighbor] = step_counts[current] + 1
+                    codes[neighbor] = code
+                    heapq.heappush(open_set, (tentative, neighbor))
+
+        if stats is not None:
+            # Every entry was either popped or is still queued; the root's entry was not a push
+            stats.update(expansions=expansions, heap_pushes=max(expansions + stale + len(open_set) - 1, 0))
+        return settled
+
+    def steps(self, cell: Tuple[int, int]) -> int:
+        """
+        Number of blocks between the root of the most recent call and a cell it settled.
+        """
+        return int(self.step_counts[self.grid.node_id(cell)])
+
+    def path(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Path of the most recent call for a goal (one_to_many) or a source (many_to_one) it settled.
+
+        Returns:
+            List[Tuple[int, int]]: Path from source (exclusive) to goal (inclusive), like a_star.
+        """
+        if self.root is None:
+            raise ValueError("No search has been run yet.")
+        node = self.grid.node_id(cell)
+        if self.dist[node] == np.inf:
+            raise ValueError("No path found from start to end.")
+        nodes = []
+        while node != self.root:
+            nodes.append(node)
+            node -= self.moves[self.path_codes[node]][1][0]
+        nodes.append(node)
+
+        # nodes now runs from the cell back to the root
+        nodes = nodes[1:] if self.backward else nodes[-2::-1]
+        return [self.grid.cell_of(node) for node in nodes]
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, MOVEMENT_MODELS, EIGHT_CONNECTED, legacy_a_star, grid_a_star
+from batchsearch import BatchSearch
+from bidirectional import grid_bidirectional_a_star
+from distancematrix import DistanceMatrix
+from hpastar import HierarchicalGrid
+from jumppoint import expand_path, grid_jump_point_search
+from mapgen import WEIGHT_DISTRIBUTIONS, generate_scenario
+from parsing import parse_route_and_packages
+from simulation import simulate_delivery
+
+def prepare_hpa_star(grid: GridMap, movement: MovementModel) -> Callable:
+    """
+    Build the full HPA* abstraction of a grid and return its query function.
+    """
+    hierarchy = HierarchicalGrid(grid, movement)
+    hierarchy.precompute()
+    return hierarchy.find_path
+
+# Pathfinding strategies: name -> (setup turning a grid into a search function (start, end, stats),
+# movement model the path cost is measured with).
+# The legacy search moves like the 8-connected model but ranks nodes by Manhattan distance.
+PATHFINDERS = {'legacy': (lambda grid: lambda start, end, stats: legacy_a_star(grid, start, end, stats), EIGHT_CONNECTED)}
+for model in MOVEMENT_MODELS.values():
+    PATHFINDERS[f"a_star/{model.name}"] = ((lambda grid, model=model: lambda start, end, stats: grid_a_star(grid, start, end, model, stats)), model)
+    PATHFINDERS[f"bidirectional/{model.name}"] = ((lambda grid, model=model: lambda start, end, stats: grid_bidirectional_a_star(grid, start, end, model, stats)), model)
+    PATHFINDERS[f"hpa_star/{model.name}"] = ((lambda grid, model=model: prepare_hpa_star(grid, model)), model)
+PATHFINDERS['jps/8-connected'] = ((lambda grid: lambda start, end, stats: expand_path(start, grid_jump_point_search(grid, start, end, EIGHT_CONNECTED, stats))), EIGHT_CONNECTED)
+
+def path_cost(path: List[Tuple[int, int]], start: Tuple[int, int], movement: MovementModel) -> float:
+    """
+    Cost of a path (as returned by a_star, without the start cell) under a movement model.
+    """
+    cost = 0
+    previous = start
+    for cell in path:
+        cost += movement.step_cost(cell[0] - previous[0], cell[1] - previous[1])
+        previous = cell
+    return cost
+
+def peak_memory(run: Callable[[], object]) -> int:
+    """
+    Peak bytes allocated by Python while run() executes. Measured in a separate call,
+    because tracing slows everything down and would distort the wall times.
+    """
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark_pathfinding(grid: GridMap, queries: List[Tuple[Tuple[int, int], Tuple[int, int]]]) -> Dict:
+    """
+    Run every pathfinder in PATHFINDERS over the same start/end queries.
+
+    Args:
+        grid (GridMap): Compiled map.
+        queries (List[Tuple[Tuple[int, int], Tuple[int, int]]]): Start and end cells.
+
+    Returns:
+        Dict: Per pathfinder: setup_time, wall_time, expansions, path_cost, failures and peak_memory.
+    """
+    results = {}
+    for name, (prepare, movement) in PATHFINDERS.items():
+        def run_queries(record: bool = False) -> None:
+            for start, end in queries:
+                stats = {}
+                try:
+                    path = search(start, end, stats)
+                    if record:
+                        row['path_cost'] += path_cost(path, start, movement)
+                except ValueError:
+                    if record:
+                        row['failures'] += 1
+                if record:
+                    row['expansions'] += stats['expansions']
+
+        row = {'setup_time': 0.0, 'wall_time': 0.0, 'expansions': 0, 'path_cost': 0, 'failures': 0}
+        started = time.perf_counter()
+        search = prepare(grid)
+        row['setup_time'] = time.perf_counter() - started
+        started = time.perf_counter()
+        run_queries()
+        row['wall_time'] = time.perf_counter() - started
+        run_queries(record=True)
+        row['peak_memory'] = peak_memory(run_queries)
+        results[name] = row
+    return results
+
+def benchmark_batch(grid: GridMap, source: Tuple[int, int], goals: List[Tuple[int, int]], movement: MovementModel = EIGHT_CONNECTED) -> Dict:
+    """
+    Compare one BatchSearch call with one grid_a_star call per goal, for all goals and for the nearest one.
+
+    Args:
+        grid (GridMap): Compiled map.
+        source (Tuple[int, int]): Cell every search starts from.
+        goals (List[Tuple[int, int]]): Goal cells.
+        movement (MovementModel): Allowed moves and step costs.
+
+    Returns:
+        Dict: Wall time and expansions of the batched and the separate searches, for all goals and the nearest goal.
+    """
+    search = BatchSearch(grid, movement)
+    results = {}
+    for name, limit in (('all_goals', None), ('nearest_goal', 1)):
+        stats = {}
+        started = time.perf_counter()
+        search.one_to_many(source, goals, limit, stats=stats)
+        results[f"batch/{name}"] = {'wall_time': time.perf_counter() - started, 'expansions': stats['expansions']}
+
+    # Finding the nearest goal with a_star means searching for every goal as well
+    row = {'wall_time': 0.0, 'expansions': 0}
+    started = time.perf_counter()
+    for goal in goals:
+        stats = {}
+        try:
+            grid_a_star(grid, source, goal, movement, stats)
+        except ValueError:
+            pass
+        row['expansions'] += stats['expansions']
+    row['wall_time'] = time.perf_counter() - started
+    results['a_star_per_goal'] = row
+    return results
+
+def benchmark_planning(scenario: Dict, time_budget: Optional[float], max_moves: Optional[int] = None) -> Dict:
+    """
+    Plan and simulate the scenario with every planning strategy and movement model.
+
+    Args:
+        scenario (Dict): Scenario as produced by generate_scenario.
+        time_budget (float, optional): Seconds allowed for route optimization, unlimited if None.
+        max_moves (int, optional): Candidate plans route optimization may evaluate.
+
+    Returns:
+        Dict: Per strategy: wall_time, distance, simulated_time, running_time, lateness, trips, searches,
+        expansions (node expansions over every leg search) and peak_memory, plus the distance matrix
+        build cost per movement model.
+    """
+    packages, route, truck_capacity = scenario['packages'], scenario['route'], scenario['truck_capacity']
+    results = {}
+    for movement in MOVEMENT_MODELS.values():
+        for strategy, optimize in (('greedy', False), ('optimized', True)):
+            def run() -> Dict:
+                return simulate_delivery(packages, route, truck_capacity, movement, optimize, time_budget, max_moves=max_moves)
+
+            started = time.perf_counter()
+            delivery = run()
+            wall_time = time.perf_counter() - started
+            results[f"{strategy}/{movement.name}"] = {
+                'wall_time': wall_time,
+                'distance': delivery['distance'],
+                'simulated_time': delivery['clock'],
+                'running_time': delivery['total_running_time'],
+                'lateness': delivery['plan']['lateness'],
+                'trips': len(delivery['trips']),
+                'searches': delivery['search_stats']['searches'],
+                'expansions': delivery['search_stats']['expansions'],
+                'peak_memory': peak_memory(run),
+            }
+
+        start, end, package_locations = parse_route_and_packages(route, packages)
+        grid = GridMap.from_route(route)
+
+        def build() -> DistanceMatrix:
+            return DistanceMatrix.from_parsed(grid, start, end, package_locations, movement)
+
+        started = time.perf_counter()
+        legs = build()
+        results[f"distance_matrix/{movement.name}"] = {'wall_time': time.perf_counter() - started,
+                                                       'expansions': legs.search_stats['expansions'],
+                                                       'peak_memory': peak_memory(build)}
+    return results
+
+# Modules timed by benchmark_imports. None of them may pull in a GUI toolkit, which would
+# cost every worker process and command-line run hundreds of milliseconds at startup.
+IMPORT_MODULES = ['gridengine', 'parsing', 'planning', 'simulation', 'fleet', 'batchrun', 'dispatcher', 'runlog',
+                  'Pathplanning', '陽光彩虹小白馬']
+GUI_MODULES = ['matplotlib', 'tkinter', 'webbrowser']
+
+IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+print(' '.join(name for name in {gui} if name in sys.modules))
+"""
+
+def benchmark_imports(modules: List[str] = IMPORT_MODULES, repeats: int = 5) -> Dict:
+    """
+    Cold import time of each module, measured in a fresh interpreter per import.
+
+    Args:
+        modules (List[str]): Modules to import, from the directory of this file.
+        repeats (int): Interpreters started per module; the fastest one is reported.
+
+    Returns:
+        Dict: Per module: seconds (fastest import) and gui_modules (GUI toolkits the import loaded).
+    """
+    results = {}
+    for module in modules:
+        times = []
+        for _ in range(repeats):
+            output = subprocess.run([sys.executable, '-c', IMPORT_PROBE.format(module=module, gui=GUI_MODULES)],
+                                    capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.splitlines()
+            times.append(float(output[0]))
+        results[module] = {'seconds': min(times), 'gui_modules': output[1].split() if len(output) > 1 else []}
+    return results
+
+def git_revision() -> str:
+    """
+    Commit the benchmark ran on, so result files from different versions can be told apart.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes: List[int], densities: List[float], package_counts: List[int], weight_distributions: List[str],
+                   seed: int = 0, queries: int = 20, time_budget: Optional[float] = None, max_moves: Optional[int] = 50000) -> Dict:
+    """
+    Benchmark every pathfinding and planning strategy on a grid of generated scenarios.
+
+    Args:
+        sizes (List[int]): Side lengths of the square maps.
+        densities (List[float]): Obstacle densities.
+        package_counts (List[int]): Packages per scenario.
+        weight_distributions (List[str]): Weight distributions (see mapgen.WEIGHT_DISTRIBUTIONS).
+        seed (int): Seed of every generated scenario and query set.
+        queries (int): Random start/end pairs per map for the pathfinding benchmark.
+        time_budget (float, optional): Seconds allowed for route optimization, unlimited if None.
+        max_moves (int, optional): Candidate plans route optimization may evaluate. Without a time
+            budget the planning results only depend on the seed, not on the machine.
+
+    Returns:
+        Dict: metadata, cold import times and one result per scenario.
+    """
+    results = []
+    for size in sizes:
+        for density in densities:
+            for package_count in package_counts:
+                for weights in weight_distributions:
+                    scenario = generate_scenario(size, size, density, package_count, weights, seed=seed)
+                    start, end, package_locations = parse_route_and_packages(scenario['route'], scenario['packages'])
+                    points = [start, end] + list(package_locations.values())
+                    rng = random.Random(seed)
+                    pairs = [tuple(rng.sample(points, 2)) for _ in range(queries)]
+
+                    print(f"Benchmarking {scenario['name']}")
+                    results.append({
+                        'scenario': scenario['name'],
+                        'size': size,
+                        'obstacle_density': density,
+                        'packages': package_count,
+                        'weight_distribution': weights,
+                        'pathfinding': benchmark_pathfinding(GridMap.from_route(scenario['route']), pairs),
+                        'batch': benchmark_batch(GridMap.from_route(scenario['route']), start, list(package_locations.values())),
+                        'planning': benchmark_planning(scenario, time_budget, max_moves),
+                    })
+
+    metadata = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': seed,
+        'queries': queries,
+        'time_budget': time_budget,
+        'max_moves': max_moves,
+    }
+    return {'metadata': metadata, 'imports': benchmark_imports(), 'results': results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pathfinding and delivery planning on generated maps.")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="JSON file to write")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 50, 100], help="side lengths of the maps")
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.3], help="obstacle densities")
+    parser.add_argument('--packages', type=int, nargs='+', default=[10], help="packages per scenario")
+    parser.add_argument('--weights', nargs='+', choices=sorted(WEIGHT_DISTRIBUTIONS), default=['uniform'], help="weight distributions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--queries', type=int, default=20, help="pathfinding queries per map")
+    parser.add_argument('--time-budget', type=float, default=None, help="route optimization seconds (default: unlimited)")
+    parser.add_argument('--max-moves', type=int, default=50000, help="candidate plans route optimization may evaluate")
+    parser.add_argument('--imports-only', action='store_true', help="only measure cold import times")
+    args = parser.parse_args()
+
+    if args.imports_only:
+        for module, result in benchmark_imports().items():
+            gui = f" (loads {', '.join(result['gui_modules'])})" if result['gui_modules'] else ''
+            print(f"{module}: {result['seconds'] * 1000:.0f} ms{gui}")
+        raise SystemExit
+    report = run_benchmarks(args.sizes, args.densities, args.packages, args.weights, args.seed, args.queries, args.time_budget, args.max_moves)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.output}")
@@ -0,0 +1,113 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+def grid_bidirectional_a_star(grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    Bidirectional A*: one search grows from start, one from end, until they meet.
+
+    Both searches use the balanced potential p(v) = (h(v, end) - h(start, v)) / 2 (negated
+    for the backward search), which keeps both consistent, so each one closes a node on
+    its first expansion. Whenever an edge reaches a node the other search has scored,
+    the joined path is a candidate. The search stops once the two smallest heap keys add
+    up to at least the best candidate: no path through an unexpanded node can be shorter.
+    The side with the smaller key is expanded next, and ties within a side prefer the
+    node furthest from its root, like grid_a_star's. Moves are symmetric, so the
+    backward search uses the same moves as the forward one.
+
+    The path has the same cost as grid_a_star's. With a zero heuristic this is plain
+    bidirectional Dijkstra (bidirectional BFS on unit costs).
+
+    Args:
+        grid (GridMap): Compiled grid.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        stats (Dict, optional): Filled with the number of node expansions (both directions
+            together and 'forward'/'backward' separately) and heap pushes.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    width = grid.width
+    source, target = grid.node_id(start), grid.node_id(end)
+    start_r, start_c = divmod(source, width)
+    end_r, end_c = divmod(target, width)
+    estimate = movement.estimate
+    moves = movement.compile(width)
+    passable = memoryview(grid.passable)
+
+    def potential(node: int) -> float:
+        r, c = divmod(node, width)
+        return (estimate(abs(r - end_r), abs(c - end_c)) - estimate(abs(r - start_r), abs(c - start_c))) / 2
+
+    # Index 0 searches forward from start, index 1 backward from end
+    g_buffers = [np.full(grid.size, np.inf), np.full(grid.size, np.inf)]
+    parent_buffers = [np.full(grid.size, -1, dtype=np.int64), np.full(grid.size, -1, dtype=np.int64)]
+    closed_buffers = [np.zeros(grid.size, dtype=np.uint8), np.zeros(grid.size, dtype=np.uint8)]
+    g_score = [memoryview(buffer) for buffer in g_buffers]
+    parent = [memoryview(buffer) for buffer in parent_buffers]
+    closed = [memoryview(buffer) for buffer in closed_buffers]
+    signs = (1, -1)
+
+    g_score[0][source] = 0
+    g_score[1][target] = 0
+    open_sets = [[(potential(source), 0, source)], [(-potential(target), 0, target)]]
+    expansions = [0, 0]
+    stale = [0, 0]
+    best, meeting = np.inf, -1
+    if source == target:
+        best, meeting = 0, source
+
+    def top(side: int) -> float:
+        # Smallest live key of one side, dropping stale entries on the way
+        open_set = open_sets[side]
+        while open_set and closed[side][open_set[0][2]]:
+            heapq.heappop(open_set)
+            stale[side] += 1
+        return open_set[0][0] if open_set else np.inf
+
+    while True:
+        forward_key, backward_key = top(0), top(1)
+        if forward_key == np.inf or backward_key == np.inf or forward_key + backward_key >= best:
+            break
+        side = 0 if forward_key <= backward_key else 1
+        _, _, current = heapq.heappop(open_sets[side])
+        closed[side][current] = 1
+        expansions[side] += 1
+
+        g, other_g, sign = g_score[side], g_score[1 - side], signs[side]
+        current_g_score = g[current]
+        for offset, cost, side_a, side_b in moves:
+            neighbor = current + offset
+            if not passable[neighbor] or closed[side][neighbor]:
+                continue
+            if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                continue
+            tentative_g_score = current_g_score + cost
+            if tentative_g_score < g[neighbor]:
+                parent[side][neighbor] = current
+                g[neighbor] = tentative_g_score
+                heapq.heappush(open_sets[side], (tentative_g_score + sign * potential(neighbor), -tentative_g_score, neighbor))
+                joined = tentative_g_score + other_g[neighbor]
+                if joined < best:
+                    best, meeting = joined, neighbor
+
+    if stats is not None:
+        stats.update(expansions=expansions[0] + expansions[1], forward=expansions[0], backward=expansions[1], heap_pushes=sum(expansions) + sum(stale) + len(open_sets[0]) + len(open_sets[1]))
+    if meeting == -1:
+        raise ValueError("No path found from start to end.")
+
+    # Walk back to start from the meeting node, then on to end along the backward tree
+    path = []
+    node = meeting
+    while node != source:
+        path.append(grid.cell_of(node))
+        node = parent[0][node]
+    path.reverse()
+    node = meeting
+    while node != target:
+        node = parent[1][node]
+        path.append(grid.cell_of(node))
+    return path
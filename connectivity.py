@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+class ComponentIndex:
+    """
+    Connected-component labels of a grid, for O(1) reachability checks.
+
+    Two cells are connected if a path exists between them under the movement model.
+    With corner cutting that is 8-connectivity. Without diagonals, or without corner
+    cutting (a diagonal needs both side cells open, which already connects its ends), it
+    is 4-connectivity.
+
+    The labels are computed once with a vectorized union-find: every round hooks the
+    larger root of each edge under the smaller one and then compresses all paths with
+    NumPy fancy indexing, until no edge joins two different components. Opening a cell
+    merges the components around it in a small union-find over the labels, so the
+    raster is not touched again. Blocking a cell may split a component, so it relabels
+    the grid, as does any edit made to the grid behind the index's back.
+    """
+
+    def __init__(self, grid: GridMap, movement: MovementModel = EIGHT_CONNECTED):
+        """
+        Args:
+            grid (GridMap): Compiled grid. It is edited in place by set_passable.
+            movement (MovementModel): Allowed moves.
+        """
+        self.grid = grid
+        width = grid.width
+        if movement.diagonal and movement.corner_cutting:
+            self.offsets = [1, width - 1, width, width + 1]
+        else:
+            self.offsets = [1, width]
+        self._label()
+
+    def _label(self) -> None:
+        passable = self.grid.passable.astype(bool)
+        size = self.grid.size
+        sources, targets = [], []
+        for offset in self.offsets:
+            # The padding border is blocked, so no edge wraps around a row end
+            u = np.flatnonzero(passable[:size - offset] & passable[offset:])
+            sources.append(u)
+            targets.append(u + offset)
+        u, v = np.concatenate(sources), np.concatenate(targets)
+
+        labels = np.arange(size)
+        while u.size:
+            lu, lv = labels[u], labels[v]
+            differ = lu != lv
+            u, v, lu, lv = u[differ], v[differ], lu[differ], lv[differ]
+            if not u.size:
+                break
+            np.minimum.at(labels, np.maximum(lu, lv), np.minimum(lu, lv))
+            while True:
+                compressed = labels[labels]
+                if np.array_equal(compressed, labels):
+                    break
+                labels = compressed
+
+        labels[~passable] = -1
+        self.labels = labels
+        self.merged = {}  # label -> label it was merged into by set_passable
+        self.revision = self.grid.revision
+
+    def _find(self, label: int) -> int:
+        root = label
+        while root in self.merged:
+            root = self.merged[root]
+        while label != root:
+            parent = self.merged[label]
+            self.merged[label] = root
+            label = parent
+        return root
+
+    def component(self, cell: Tuple[int, int]) -> int:
+        """
+        Label of the component a cell belongs to, or -1 for a blocked cell.
+        """
+        if self.grid.revision != self.revision:
+            self._label()
+        label = int(self.labels[self.grid.node_id(cell)])
+        return self._find(label) if label != -1 else -1
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """
+        Whether a path exists between two cells.
+        """
+        label = self.component(a)
+        return label != -1 and label == self.component(b)
+
+    def unreachable(self, origin: Tuple[int, int], points: Dict[str, Tuple[int, int]]) -> List[str]:
+        """
+        Labels of the points that cannot be reached from origin, e.g. walled-off packages.
+
+        Args:
+            origin (Tuple[int, int]): Cell the truck can reach everything from, usually the warehouse.
+            points (Dict[str, Tuple[int, int]]): Label and coordinates of every point to check.
+
+        Returns:
+            List[str]: Labels of the unreachable points, in the order given.
+        """
+        label = self.component(origin)
+        return [name for name, cell in points.items() if label == -1 or self.component(cell) != label]
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Open or block a cell and update the components.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        if self.grid.revision != self.revision:
+            self._label()
+        node = self.grid.node_id(cell)
+        if bool(self.grid.passable[node]) == passable:
+            return
+        self.grid.set_passable(cell, passable)
+        if not passable:
+            self._label()
+            return
+
+        self.revision = self.grid.revision
+        self.labels[node] = node
+        root = node
+        for offset in self.offsets:
+            for neighbor in (node + offset, node - offset):
+                label = self.labels[neighbor]
+                if label == -1:
+                    continue
+                other = self._find(int(label))
+                if other != root:
+                    # Keep the smaller label as the root, like the initial labeling
+                    root, other = min(root, other), max(root, other)
+                    self.merged[other] = root
@@ -0,0 +1,395 @@
+import time
+from typing import Dict, List, Optional
+from distancematrix import DistanceMatrix
+
+# Moving one block takes (load + 1) * STEP_TIME seconds, picking up a package takes
+# weight * STEP_TIME and unloading at the warehouse takes (load + 1) * STEP_TIME,
+# the same delays execute_delivery sleeps for.
+STEP_TIME = 0.1
+
+def greedy_trips(sorted_packages: List[Dict], truck_capacity: int) -> List[List[str]]:
+    """
+    Trips chosen by the original pickup loop: walk the sorted package list and take
+    every package that still fits, then return to the warehouse and start over.
+
+    Args:
+        sorted_packages (List[Dict]): Packages in pickup priority order, as returned by parse_packages.
+        truck_capacity (int): Maximum load of the truck.
+
+    Returns:
+        List[List[str]]: Package ids picked up on each trip, in pickup order.
+    """
+    for package in sorted_packages:
+        if package['weight'] > truck_capacity:
+            raise ValueError(f"Package {package['id']} is heavier than the truck capacity.")
+
+    remaining = list(sorted_packages)
+    trips = []
+    while remaining:
+        remaining_capacity = truck_capacity
+        trip = []
+        for package in remaining[:]:
+            if package['weight'] <= remaining_capacity:
+                remaining_capacity -= package['weight']
+                trip.append(package['id'])
+                remaining.remove(package)
+        trips.append(trip)
+    return trips
+
+class RouteOptimizer:
+    """
+    Capacitated vehicle routing for a single truck doing repeated trips from the warehouse.
+
+    Trips are built with the Clarke-Wright savings heuristic and then improved by local
+    search (relocate, or-opt, 2-opt and swapping neighboring trips) over the precomputed
+    leg costs. Urgency is a soft deadline: unless deadlines are given, each urgency level
+    must be delivered no later than the greedy pickup loop delivers it, and every second
+    of lateness adds lateness_penalty to the objective. The objective is total distance
+    plus lateness penalties.
+    """
+
+    def __init__(self, sorted_packages: List[Dict], legs: DistanceMatrix, truck_capacity: int, lateness_penalty: float = 1.0, deadlines: Optional[Dict[int, float]] = None, start: str = 'S'):
+        """
+        Args:
+            sorted_packages (List[Dict]): Packages in pickup priority order, as returned by parse_packages.
+            legs (DistanceMatrix): Leg costs between S, E and every package.
+            truck_capacity (int): Maximum load of the truck.
+            lateness_penalty (float): Objective cost per second a package is delivered after its deadline.
+            deadlines (Dict[int, float], optional): Delivery deadline in seconds for each urgency level.
+            start (str): Label of the point in legs where the truck starts its first trip.
+        """
+        self.packages = sorted_packages
+        self.legs = legs
+        self.truck_capacity = truck_capacity
+        self.lateness_penalty = lateness_penalty
+
+        # Work on matrix indices and plain lists, they are much faster to index than NumPy scalars
+        self.ids = [package['id'] for package in sorted_packages]
+        self.nodes = [legs.index[package_id] for package_id in self.ids]
+        self.weights = [package['weight'] for package in sorted_packages]
+        self.start, self.end = legs.index[start], legs.index['E']
+        self.distances = legs.distances.tolist()
+        self.steps = legs.step_counts.tolist()
+
+        for package, node in zip(sorted_packages, self.nodes):
+            if self.distances[self.end][node] == float('inf'):
+                raise ValueError(f"No path found to package {package['id']}.")
+
+        self.baseline = self.evaluate(greedy_trips(sorted_packages, truck_capacity))
+        if deadlines is None:
+            deadlines = {}
+            for package in sorted_packages:
+                delivered = self.baseline['deliveries'][package['id']]
+                deadlines[package['urgency']] = max(deadlines.get(package['urgency'], 0), delivered)
+        self.deadlines = deadlines
+        self.elapsed = 0  # duration of the trips taken out of planning by commit
+        self.deadline_of = [deadlines.get(package['urgency'], float('inf')) for package in sorted_packages]
+        self.baseline['lateness'] = self._lateness(self._to_positions(self.baseline['trips']))
+
+    def _to_positions(self, trips: List[List[str]]) -> List[List[int]]:
+        position = {package_id: i for i, package_id in enumerate(self.ids)}
+        return [[position[package_id] for package_id in trip] for trip in trips]
+
+    def _trip_cost(self, origin: int, trip: List[int]):
+        """
+        Distance and duration of one trip from origin through the packages to the warehouse.
+        """
+        distances, steps = self.distances, self.steps
+        distance = duration = 0
+        load = 0
+        here = origin
+        for position in trip:
+            node = self.nodes[position]
+            distance += distances[here][node]
+            duration += steps[here][node] * (load + 1) * STEP_TIME + self.weights[position] * STEP_TIME
+            load += self.weights[position]
+            here = node
+        distance += distances[here][self.end]
+        duration += (steps[here][self.end] + 1) * (load + 1) * STEP_TIME
+        return distance, duration
+
+    def _lateness(self, trips: List[List[int]]) -> float:
+        clock = 0
+        lateness = 0
+        for k, trip in enumerate(trips):
+            clock += self._trip_cost(self.start if k == 0 else self.end, trip)[1]
+            for position in trip:
+                if clock > self.deadline_of[position]:
+                    lateness += clock - self.deadline_of[position]
+        return lateness
+
+    def _objective(self, trips: List[List[int]]) -> float:
+        clock = 0
+        total = 0
+        for k, trip in enumerate(trips):
+            distance, duration = self._trip_cost(self.start if k == 0 else self.end, trip)
+            clock += duration
+            total += distance
+            for position in trip:
+                if clock > self.deadline_of[position]:
+                    total += self.lateness_penalty * (clock - self.deadline_of[position])
+        return total
+
+    def evaluate(self, trips: List[List[str]]) -> Dict:
+        """
+        Total distance and simulated time of a plan.
+
+        Args:
+            trips (List[List[str]]): Package ids picked up on each trip, in pickup order.
+
+        Returns:
+            Dict: trips, distance, time and the delivery time of every package.
+        """
+        positions = self._to_positions(trips)
+        clock = 0
+        distance = 0
+        deliveries = {}
+        for k, trip in enumerate(positions):
+            trip_distance, duration = self._trip_cost(self.start if k == 0 else self.end, trip)
+            distance += trip_distance
+            clock += duration
+            for position in trip:
+                deliveries[self.ids[position]] = clock
+        return {'trips': trips, 'distance': distance, 'time': clock, 'deliveries': deliveries}
+
+    def savings_trips(self) -> List[List[int]]:
+        """
+        Clarke-Wright savings construction with the warehouse as the depot.
+
+        Returns:
+            List[List[int]]: Trips as lists of package positions, most urgent trips first.
+        """
+        distances, end = self.distances, self.end
+        trips = {i: [i] for i in range(len(self.nodes))}
+        trip_of = list(range(len(self.nodes)))
+        load = {i: self.weights[i] for i in trips}
+
+        savings = []
+        for i in range(len(self.nodes)):
+            for j in range(i + 1, len(self.nodes)):
+                a, b = self.nodes[i], self.nodes[j]
+                saving = distances[end][a] + distances[end][b] - distances[a][b]
+                if saving > 0:
+                    savings.append((saving, i, j))
+        savings.sort(reverse=True)
+
+        for _, i, j in savings:
+            ti, tj = trip_of[i], trip_of[j]
+            if ti == tj or load[ti] + load[tj] > self.truck_capacity:
+                continue
+            first, second = trips[ti], trips[tj]
+            # Only join routes end to end, at their outer packages
+            if first[-1] == i and second[0] == j:
+                merged = first + second
+            elif first[0] == i and second[-1] == j:
+                merged = second + first
+            elif first[-1] == i and second[-1] == j:
+                merged = first + second[::-1]
+            elif first[0] == i and second[0] == j:
+                merged = first[::-1] + second
+            else:
+                continue
+            trips[ti] = merged
+            load[ti] += load.pop(tj)
+            del trips[tj]
+            for position in merged:
+                trip_of[position] = ti
+
+        return sorted(trips.values(), key=lambda trip: min(self.packages[p]['urgency'] for p in trip))
+
+    def _neighbors(self, trips: List[List[int]]):
+        """
+        Yield every candidate plan one move away from trips.
+        """
+        loads = [sum(self.weights[p] for p in trip) for trip in trips]
+        for a, trip in enumerate(trips):
+            # 2-opt: reverse a segment of the trip
+            for i in range(len(trip) - 1):
+                for j in range(i + 1, len(trip)):
+                    candidate = trips[:]
+                    candidate[a] = trip[:i] + trip[i:j + 1][::-1] + trip[j + 1:]
+                    yield candidate
+
+            # Or-opt: move a run of up to three packages elsewhere in the same trip
+            for length in (2, 3):
+                for i in range(len(trip) - length + 1):
+                    segment = trip[i:i + length]
+                    rest = trip[:i] + trip[i + length:]
+                    for j in range(len(rest) + 1):
+                        if j != i:
+                            candidate = trips[:]
+                            candidate[a] = rest[:j] + segment + rest[j:]
+                            yield candidate
+
+            # Relocate: move one package to any position in any trip
+            for i, position in enumerate(trip):
+                rest = trip[:i] + trip[i + 1:]
+                for b, other in enumerate(trips):
+                    if b != a and loads[b] + self.weights[position] > self.truck_capacity:
+                        continue
+                    target = rest if b == a else other
+                    for j in range(len(target) + 1):
+                        if b == a and j == i:
+                            continue
+                        candidate = trips[:]
+                        candidate[a] = rest
+                        candidate[b] = target[:j] + [position] + target[j:]
+                        yield [t for t in candidate if t]
+
+            # Swap neighboring trips
+            if a + 1 < len(trips):
+                candidate = trips[:]
+                candidate[a], candidate[a + 1] = trips[a + 1], trips[a]
+                yield candidate
+
+    def improve(self, trips: List[List[int]], time_budget: Optional[float] = None, max_moves: Optional[int] = None) -> List[List[int]]:
+        """
+        First-improvement local search until no move helps or a budget runs out.
+
+        The move budget makes the result reproducible: the neighborhood is always walked
+        in the same order, so the same inputs evaluate the same moves on any machine.
+
+        Args:
+            trips (List[List[int]]): Starting plan as lists of package positions.
+            time_budget (float, optional): Seconds allowed for the search, unlimited if None.
+            max_moves (int, optional): Candidate plans that may be evaluated, unlimited if None.
+
+        Returns:
+            List[List[int]]: Improved plan.
+        """
+        deadline = float('inf') if time_budget is None else time.perf_counter() + time_budget
+        moves_left = float('inf') if max_moves is None else max_moves
+        best = self._objective(trips)
+        improved = True
+        while improved and moves_left > 0 and time.perf_counter() < deadline:
+            improved = False
+            for count, candidate in enumerate(self._neighbors(trips)):
+                if moves_left <= 0 or (count % 256 == 0 and time.perf_counter() >= deadline):
+                    break
+                moves_left -= 1
+                value = self._objective(candidate)
+                if value < best - 1e-9:
+                    trips, best = candidate, value
+                    improved = True
+                    break
+        return trips
+
+    def add_package(self, package: Dict) -> int:
+        """
+        Make a package that arrived after planning available to insert and commit.
+        Its location must already be in legs (see DistanceMatrix.add_point).
+
+        Args:
+            package (Dict): Package details.
+
+        Returns:
+            int: Position of the package, as used in trips of positions.
+        """
+        node = self.legs.index[package['id']]
+        self.distances = self.legs.distances.tolist()
+        self.steps = self.legs.step_counts.tolist()
+        if self.distances[self.end][node] == float('inf'):
+            raise ValueError(f"No path found to package {package['id']}.")
+        if package['weight'] > self.truck_capacity:
+            raise ValueError(f"Package {package['id']} is heavier than the truck capacity.")
+        # Deadlines count from the start of the shift, the clock from the last commit.
+        # Work everything out before the first append, so a bad package leaves no trace.
+        deadline = self.deadlines.get(package['urgency'], float('inf')) - self.elapsed
+
+        self.packages.append(package)
+        self.ids.append(package['id'])
+        self.nodes.append(node)
+        self.weights.append(package['weight'])
+        self.deadline_of.append(deadline)
+        return len(self.ids) - 1
+
+    def insert(self, trips: List[List[int]], position: int) -> List[List[int]]:
+        """
+        Cheapest insertion of one package into a plan, leaving the order of everything else as it is.
+
+        Args:
+            trips (List[List[int]]): Plan as lists of package positions.
+            position (int): Package to insert.
+
+        Returns:
+            List[List[int]]: Plan with the package in the slot that raises the objective least,
+            which may be a trip of its own.
+        """
+        weight = self.weights[position]
+        best, best_value = None, float('inf')
+        for a, trip in enumerate(trips):
+            if sum(self.weights[p] for p in trip) + weight > self.truck_capacity:
+                continue
+            for j in range(len(trip) + 1):
+                candidate = trips[:]
+                candidate[a] = trip[:j] + [position] + trip[j:]
+                value = self._objective(candidate)
+                if value < best_value:
+                    best, best_value = candidate, value
+        for a in range(len(trips) + 1):
+            candidate = trips[:a] + [[position]] + trips[a:]
+            value = self._objective(candidate)
+            if value < best_value:
+                best, best_value = candidate, value
+        return best
+
+    def commit(self, trip: List[int]) -> float:
+        """
+        Take a trip out of planning because the truck has started it. Later trips start at
+        the warehouse and every deadline moves closer by the trip's duration.
+
+        Args:
+            trip (List[int]): Package positions of the trip, in pickup order.
+
+        Returns:
+            float: Duration of the trip.
+        """
+        duration = self._trip_cost(self.start, trip)[1]
+        self.start = self.end
+        self.elapsed += duration
+        self.deadline_of = [deadline - duration for deadline in self.deadline_of]
+        return duration
+
+    def solve(self, time_budget: Optional[float] = 1.0, max_moves: Optional[int] = None) -> Dict:
+        """
+        Build and improve a plan, and compare it against the greedy pickup loop.
+
+        Args:
+            time_budget (float, optional): Seconds allowed for the local search. Pass None with
+                max_moves for a plan that does not depend on the speed of the machine.
+            max_moves (int, optional): Candidate plans the local search may evaluate.
+
+        Returns:
+            Dict: 'plan' and 'baseline', each with trips, distance, time, lateness and deliveries.
+        """
+        start = time.perf_counter()
+        trips = self.savings_trips()
+        baseline_positions = self._to_positions(self.baseline['trips'])
+        if self._objective(baseline_positions) < self._objective(trips):
+            trips = baseline_positions
+        if time_budget is not None:
+            time_budget -= time.perf_counter() - start
+        trips = self.improve(trips, time_budget, max_moves)
+
+        plan = self.evaluate([[self.ids[p] for p in trip] for trip in trips])
+        plan['lateness'] = self._lateness(trips)
+        return {'plan': plan, 'baseline': self.baseline}
+
+def optimize_routes(sorted_packages: List[Dict], legs: DistanceMatrix, truck_capacity: int, time_budget: Optional[float] = 1.0, lateness_penalty: float = 1.0, deadlines: Optional[Dict[int, float]] = None,
+                    max_moves: Optional[int] = None) -> Dict:
+    """
+    Plan every delivery trip with the capacity-aware route optimizer.
+
+    Args:
+        sorted_packages (List[Dict]): Packages in pickup priority order, as returned by parse_packages.
+        legs (DistanceMatrix): Leg costs between S, E and every package.
+        truck_capacity (int): Maximum load of the truck.
+        time_budget (float, optional): Seconds allowed for the local search, unlimited if None.
+        lateness_penalty (float): Objective cost per second a package is delivered after its deadline.
+        deadlines (Dict[int, float], optional): Delivery deadline in seconds for each urgency level.
+        max_moves (int, optional): Candidate plans the local search may evaluate.
+
+    Returns:
+        Dict: 'plan' and 'baseline', each with trips, distance, time, lateness and deliveries.
+    """
+    return RouteOptimizer(sorted_packages, legs, truck_capacity, lateness_penalty, deadlines).solve(time_budget, max_moves)
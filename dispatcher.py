@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from connectivity import ComponentIndex
+from gridengine import MovementModel, MOVEMENT_MODELS, EIGHT_CONNECTED
+from distancematrix import DistanceMatrix
+from cvrp import RouteOptimizer
+from mapformat import MapFile, load_map
+from parsing import parse_packages, parse_route_and_packages
+from routecodes import RouteCodes, encode_route
+
+class Dispatcher:
+    """
+    Event-driven dispatcher that folds orders arriving mid-shift into the running plan.
+
+    Orders are queued with submit (or sent as JSON lines to serve) and handled one at a
+    time by run. Each new package gets its legs searched once (DistanceMatrix.add_point)
+    and is then placed by cheapest insertion into the trips the truck has not started
+    yet; the rest of the plan is left as it is. Trips the truck has started are taken
+    out of planning with next_trip.
+
+    The time from an order's arrival to its assignment is recorded for every order,
+    see latency.
+    """
+
+    def __init__(self, route: Union[List[List[str]], RouteCodes, MapFile], truck_capacity: int, packages: List[Dict] = (), movement: MovementModel = EIGHT_CONNECTED, time_budget: Optional[float] = 1.0,
+                 max_moves: Optional[int] = None):
+        """
+        Args:
+            route (Union[List[List[str]], RouteCodes, MapFile]): 2D map representation of the route,
+                its encoding, or a loaded map file.
+            truck_capacity (int): Maximum load of the truck.
+            packages (List[Dict]): Packages known at the start of the shift, placed on the route as usual.
+                Their urgency levels set the deadlines of later orders; other levels get none.
+                Any of them walled off from E (or a walled-off S) are reported together in one ValueError.
+            movement (MovementModel): Allowed moves, step costs and heuristic used for every leg.
+            time_budget (float, optional): Seconds allowed for optimizing the initial plan, unlimited if None.
+            max_moves (int, optional): Candidate plans the initial optimization may evaluate.
+        """
+        packages = list(packages)
+        if not isinstance(route, MapFile):
+            route = encode_route(route)
+        start, end, package_locations = parse_route_and_packages(route, packages)
+        grid = route.to_grid()
+        components = ComponentIndex(grid, movement)
+        unreachable = components.unreachable(end, dict(package_locations, S=start))
+        if unreachable:
+            raise ValueError(f"No path found to {', '.join(unreachable)}.")
+        self.legs = DistanceMatrix.from_parsed(grid, start, end, package_locations, movement, components)
+        self.optimizer = RouteOptimizer(parse_packages(packages), self.legs, truck_capacity)
+        plan = self.optimizer.solve(time_budget, max_moves)['plan']
+        self.trips = self.optimizer._to_positions(plan['trips'])
+
+        self.queue = asyncio.Queue()
+        self.latencies = []
+        self.rejected = 0
+
+    def assign(self, package: Dict, location: Tuple[int, int]) -> int:
+        """
+        Insert one new package into the plan right away.
+
+        Args:
+            package (Dict): Package details (id, urgency, weight, description).
+            location (Tuple[int, int]): Cell the package waits on.
+
+        Returns:
+            int: Index of the pending trip the package was put on.
+
+        Raises:
+            ValueError: If the order is rejected. The plan and legs are then left as they were.
+        """
+        location = self._check_location(location)
+        self._check_package(package)
+        if package['id'] in self.legs.index:
+            raise ValueError(f"Package {package['id']} is already in the plan.")
+        if package['weight'] > self.optimizer.truck_capacity:
+            raise ValueError(f"Package {package['id']} is heavier than the truck capacity.")
+        if not self.legs.components.connected(location, self.legs.cells[self.legs.index['E']]):
+            raise ValueError(f"No path found to package {package['id']}.")
+
+        self.legs.add_point(package['id'], location)
+        try:
+            position = self.optimizer.add_package(package)
+        except Exception:
+            self.legs.pop_point()
+            raise
+        self.trips = self.optimizer.insert(self.trips, position)
+        return next(k for k, trip in enumerate(self.trips) if position in trip)
+
+    @staticmethod
+    def _check_package(package) -> None:
+        """
+        Raise a ValueError unless the order has a string id, a positive numeric weight and an integer urgency.
+        """
+        if not isinstance(package, dict):
+            raise ValueError(f"Order {package!r} is not a JSON object.")
+        for field, types in (('id', str), ('weight', (int, float)), ('urgency', int)):
+            value = package.get(field)
+            if not isinstance(value, types) or isinstance(value, bool):
+                raise ValueError(f"Order {package.get('id')!r} needs a valid {field}, got {value!r}.")
+        if not package['weight'] > 0:
+            raise ValueError(f"Package {package['id']} needs a positive weight.")
+
+    def _check_location(self, location) -> Tuple[int, int]:
+        """
+        The location of an order as a cell tuple, or a ValueError if it is not a cell of the map.
+        """
+        grid = self.legs.grid
+        if not isinstance(location, (list, tuple)) or len(location) != 2 or \
+           not all(isinstance(value, int) and not isinstance(value, bool) for value in location):
+            raise ValueError(f"Location {location!r} is not a pair of integers.")
+        r, c = location
+        if not (0 <= r < grid.rows and 0 <= c < grid.cols):
+            raise ValueError(f"Location {(r, c)} is outside the {grid.rows}x{grid.cols} map.")
+        return (r, c)
+
+    def submit(self, package: Dict, location: Tuple[int, int]) -> asyncio.Future:
+        """
+        Queue a new order. Must be called from inside the event loop.
+
+        Returns:
+            asyncio.Future: Resolves to the trip index once run has assigned the order,
+            or raises the error that rejected it (a ValueError for invalid orders).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((time.perf_counter(), package, location, future))
+        return future
+
+    async def run(self) -> None:
+        """
+        Assign queued orders in arrival order until stop is called. An order that fails
+        for any reason is rejected through its future; the loop keeps going.
+        """
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                break
+            arrived, package, location, future = item
+            try:
+                trip = self.assign(package, location)
+            except Exception as error:
+                self.rejected += 1
+                if not future.cancelled():
+                    future.set_exception(error)
+                continue
+            self.latencies.append(time.perf_counter() - arrived)
+            if not future.cancelled():
+                future.set_result(trip)
+
+    def stop(self) -> None:
+        """
+        Let run return once the orders queued so far are handled.
+        """
+        self.queue.put_nowait(None)
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.AbstractServer:
+        """
+        Accept orders on a local socket, one JSON object per line with the package fields
+        and 'location'. Each order is answered with a JSON line holding its trip index or error.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    order = json.loads(line)
+                    location = order.pop('location')
+                    reply = {'id': order['id'], 'trip': await self.submit(order, location)}
+                except Exception as error:
+                    reply = {'error': str(error)}
+                writer.write((json.dumps(reply) + '\n').encode('utf-8'))
+                await writer.drain()
+            writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    def next_trip(self) -> Optional[List[str]]:
+        """
+        Hand the first pending trip to the truck. It is no longer changed by new orders.
+
+        Returns:
+            List[str]: Package ids of the trip in pickup order, or None if nothing is pending.
+        """
+        if not self.trips:
+            return None
+        trip = self.trips.pop(0)
+        self.optimizer.commit(trip)
+        return [self.optimizer.ids[position] for position in trip]
+
+    def plan(self) -> List[List[str]]:
+        """
+        Pending trips as package ids.
+        """
+        return [[self.optimizer.ids[position] for position in trip] for trip in self.trips]
+
+    def latency(self) -> Dict:
+        """
+        Arrival-to-assignment latency of the orders handled so far, in seconds.
+
+        Returns:
+            Dict: orders, rejected, p50, p99 and max.
+        """
+        if not self.latencies:
+            return {'orders': 0, 'rejected': self.rejected, 'p50': None, 'p99': None, 'max': None}
+        p50, p99 = np.percentile(self.latencies, [50, 99])
+        return {'orders': len(self.latencies), 'rejected': self.rejected,
+                'p50': float(p50), 'p99': float(p99), 'max': max(self.latencies)}
+
+async def main(scenario: Dict, host: str, port: int, time_budget: float) -> None:
+    route = load_map(scenario['map']) if 'map' in scenario else scenario['route']
+    movement = MOVEMENT_MODELS[scenario.get('movement', '8-connected')]
+    dispatcher = Dispatcher(route, scenario['truck_capacity'], scenario.get('packages', []), movement, time_budget)
+    server = await dispatcher.serve(host, port)
+    print(f"Accepting orders on {host}:{port} with {len(dispatcher.trips)} trips planned")
+    try:
+        await dispatcher.run()
+    finally:
+        server.close()
+        print(json.dumps(dispatcher.latency()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accept delivery orders on a local socket and fold them into the running plan.")
+    parser.add_argument('scenario', help="JSON scenario with route (or map), truck_capacity and the initial packages")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--time-budget', type=float, default=1.0, help="seconds for optimizing the initial plan")
+    args = parser.parse_args()
+
+    with open(args.scenario, encoding='utf-8') as f:
+        scenario = json.load(f)
+    try:
+        asyncio.run(main(scenario, args.host, args.port, args.time_budget))
+    except KeyboardInterrupt:
+        pass
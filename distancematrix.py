@@ -0,0 +1,226 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from batchsearch import BatchSearch
+from connectivity import ComponentIndex
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+class DistanceMatrix:
+    """
+    Precomputed leg costs and paths between every pair of points of interest (S, E and packages).
+
+    One multi-target Dijkstra runs per point and stops as soon as every later point is
+    settled. Moves are symmetric, so the lower triangle is filled from the upper one and
+    a reverse leg is the forward path walked backwards. The number of blocks on each leg
+    is kept next to its cost for timing purposes. Path reconstruction data is kept
+    as one int8 move code per grid cell per searched point, so a leg is read back in
+    O(path length) without searching again. That is grid.size bytes per point, so only
+    the rows that fit in path_memory bytes are kept, least recently used first out; a
+    leg whose row was dropped runs its point's search again, which gives the same path
+    because the searches are deterministic. Points in another
+    connected component are never searched for: their legs stay at inf, so a walled-off
+    package does not make every search flood its whole region.
+
+    Moving a package off the map does not change which cells are passable, so the
+    matrix stays valid for the whole delivery run. Points that show up later, e.g. new
+    orders, are appended with add_point without touching the existing searches.
+    """
+
+    def __init__(self, grid: GridMap, points: Dict[str, Tuple[int, int]], movement: MovementModel = EIGHT_CONNECTED,
+                 components: Optional[ComponentIndex] = None, path_memory: int = 64 << 20):
+        """
+        Args:
+            grid (GridMap): Compiled grid.
+            points (Dict[str, Tuple[int, int]]): Label and coordinates of every point of interest.
+            movement (MovementModel): Allowed moves, step costs and heuristic.
+            components (ComponentIndex, optional): Connectivity of the grid under the movement model.
+                Built here if omitted.
+            path_memory (int): Bytes of move codes kept for reading paths back, at least one row
+                of grid.size bytes. Defaults to 64 MiB.
+        """
+        self.grid = grid
+        self.movement = movement
+        self.components = components or ComponentIndex(grid, movement)
+        self.labels = list(points)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.cells = [points[label] for label in self.labels]
+        self.nodes = [grid.node_id(cell) for cell in self.cells]
+        self.component_of = [self.components.component(cell) for cell in self.cells]
+        # Scratch buffers shared by every search of the matrix, including later add_point calls
+        self.search = BatchSearch(grid, movement)
+        self.moves = movement.compile(grid.width)
+
+        count = len(self.labels)
+        self.distances = np.full((count, count), np.inf)
+        np.fill_diagonal(self.distances, 0)
+        self.step_counts = np.zeros((count, count), dtype=np.int64)
+        # Move code rows are handed out to the searched points up to a fixed number of rows
+        self.row_capacity = max(1, path_memory // grid.size)
+        self._code_rows = np.empty((0, grid.size), dtype=np.int8)
+        self._row_of = OrderedDict()  # point -> row of _code_rows, least recently used first
+        self._free_rows = []
+        self.added = set()  # points added later, whose searches cover every earlier point
+        self.search_stats = {'searches': 0, 'expansions': 0}  # totals over every search run for the matrix
+
+        for i in range(count):
+            self._search(i, self._targets(i))
+
+    @classmethod
+    def from_parsed(cls, grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], package_locations: Dict[str, Tuple[int, int]], movement: MovementModel = EIGHT_CONNECTED,
+                    components: Optional[ComponentIndex] = None, path_memory: int = 64 << 20) -> "DistanceMatrix":
+        """
+        Build the matrix from the output of parse_route_and_packages. The start and
+        end points are labelled 'S' and 'E', packages keep their ids.
+
+        Returns:
+            DistanceMatrix: Distances and paths between all S/E/package pairs.
+        """
+        points = {'S': start, 'E': end}
+        points.update(package_locations)
+        return cls(grid, points, movement, components, path_memory)
+
+    def add_point(self, label: str, cell: Tuple[int, int]) -> None:
+        """
+        Append a point of interest and search its legs to every existing point.
+
+        Args:
+            label (str): Label of the new point.
+            cell (Tuple[int, int]): Coordinates of the new point.
+        """
+        if label in self.index:
+            raise ValueError(f"Point {label} is already in the matrix.")
+        count = len(self.labels)
+        self.labels.append(label)
+        self.index[label] = count
+        self.cells.append(cell)
+        self.nodes.append(self.grid.node_id(cell))
+        self.component_of.append(self.components.component(cell))
+
+        distances = np.full((count + 1, count + 1), np.inf)
+        distances[:count, :count] = self.distances
+        distances[count, count] = 0
+        step_counts = np.zeros((count + 1, count + 1), dtype=np.int64)
+        step_counts[:count, :count] = self.step_counts
+        self.distances, self.step_counts = distances, step_counts
+
+        self.added.add(count)
+        self._search(count, self._targets(count))
+
+    def pop_point(self) -> str:
+        """
+        Remove the point added last by add_point, e.g. when the order it belongs to is rejected.
+
+        Returns:
+            str: Label of the removed point.
+        """
+        count = len(self.labels) - 1
+        if count not in self.added:
+            raise ValueError("Only points added with add_point can be removed.")
+        label = self.labels.pop()
+        del self.index[label]
+        self.cells.pop()
+        self.nodes.pop()
+        self.component_of.pop()
+        self.added.discard(count)
+        self.distances = self.distances[:count, :count].copy()
+        self.step_counts = self.step_counts[:count, :count].copy()
+        if count in self._row_of:
+            self._free_rows.append(self._row_of.pop(count))
+        return label
+
+    def _targets(self, i: int) -> List[int]:
+        """
+        Points whose legs are read from the search of point i: every earlier point for
+        a point added later, else the later points that were not added.
+        """
+        if i in self.added:
+            return list(range(i))
+        return [j for j in range(i + 1, len(self.labels)) if j not in self.added]
+
+    def _row(self, i: int) -> np.ndarray:
+        """
+        Move code row for the search of point i, taking the least recently used row when all are in use.
+        """
+        if i in self._row_of:
+            slot = self._row_of.pop(i)
+        elif self._free_rows:
+            slot = self._free_rows.pop()
+        elif len(self._row_of) < self.row_capacity:
+            slot = len(self._row_of)
+            if slot == len(self._code_rows):
+                # Grow geometrically up to the capacity, so small matrices stay small
+                rows = np.empty((min(max(2 * slot, 4), self.row_capacity), self.grid.size), dtype=np.int8)
+                rows[:slot] = self._code_rows
+                self._code_rows = rows
+        else:
+            _, slot = self._row_of.popitem(last=False)
+        self._row_of[i] = slot
+        return self._code_rows[slot]
+
+    def _search(self, i: int, targets: List[int]) -> None:
+        """
+        Dijkstra from point i until every target point in its component is settled.
+        """
+        if self.component_of[i] == -1:
+            return
+        targets = [j for j in targets if self.component_of[j] == self.component_of[i]]
+        stats = {}
+        settled = self.search.one_to_many(self.cells[i], [self.cells[j] for j in targets], codes=self._row(i), stats=stats)
+        self.search_stats['searches'] += 1
+        self.search_stats['expansions'] += stats['expansions']
+        for j in targets:
+            cell = tuple(self.cells[j])
+            if cell in settled:
+                self.distances[i, j] = self.distances[j, i] = settled[cell]
+                self.step_counts[i, j] = self.step_counts[j, i] = self.search.steps(cell)
+
+    def distance(self, a: str, b: str) -> float:
+        """
+        Cost of the shortest leg from point a to point b (inf if unreachable).
+        """
+        return self.distances[self.index[a], self.index[b]]
+
+    def steps(self, a: str, b: str) -> int:
+        """
+        Number of blocks on the shortest leg from point a to point b.
+        """
+        return int(self.step_counts[self.index[a], self.index[b]])
+
+    def path(self, a: str, b: str) -> List[Tuple[int, int]]:
+        """
+        Shortest path from point a to point b.
+
+        Args:
+            a (str): Label of the starting point.
+            b (str): Label of the ending point.
+
+        Returns:
+            List[Tuple[int, int]]: Path from a (exclusive) to b (inclusive), like a_star.
+        """
+        i, j = self.index[a], self.index[b]
+        if self.distances[i, j] == np.inf:
+            raise ValueError("No path found from start to end.")
+        if i == j:
+            return []
+
+        # Only the search from the earlier point is complete, unless the later point was added afterwards
+        low, high = min(i, j), max(i, j)
+        root, other = (high, low) if high in self.added else (low, high)
+        if root in self._row_of:
+            self._row_of.move_to_end(root)
+        else:
+            self._search(root, self._targets(root))
+        codes = self._code_rows[self._row_of[root]]
+        source, node = self.nodes[root], self.nodes[other]
+        nodes = []
+        while node != source:
+            nodes.append(node)
+            node -= self.moves[codes[node]][0]
+        nodes.append(source)
+
+        # nodes now runs from the other point back to the root
+        if i == other:
+            nodes = nodes[1:]
+        else:
+            nodes = nodes[-2::-1]
+        return [self.grid.cell_of(node) for node in nodes]
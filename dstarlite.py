@@ -0,0 +1,189 @@
+import heapq
+import numpy as np
+from typing import List, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+INF = float('inf')
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite) towards one fixed goal, e.g. the warehouse E.
+
+    The search runs backwards from the goal and keeps its g/rhs buffers between calls.
+    When a cell is freed, blocked or re-weighted, only the vertices whose cost-to-goal
+    actually changes are expanded again. The truck may move between calls; the key
+    modifier km keeps the old queue entries valid without re-sorting them.
+
+    Entering a cell costs the movement model's step cost times the cell weight.
+    Weights must be at least 1 so the movement heuristic stays admissible.
+    """
+
+    def __init__(self, grid: GridMap, goal: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED):
+        """
+        Args:
+            grid (GridMap): Compiled grid. It is edited in place by set_passable.
+            goal (Tuple[int, int]): Goal coordinates.
+            movement (MovementModel): Allowed moves, step costs and heuristic.
+        """
+        self.grid = grid
+        self.movement = movement
+        self.moves = movement.compile(grid.width)
+        self.goal = grid.node_id(goal)
+        self.start = None
+        self.km = 0
+        self.expansions = 0
+
+        self.weights = np.ones(grid.size)
+        self.g = np.full(grid.size, np.inf)
+        self.rhs = np.full(grid.size, np.inf)
+        self.queued_key = np.full((grid.size, 2), np.nan)
+        self.rhs[self.goal] = 0
+        self.open_set = []
+
+    def _heuristic(self, a: int, b: int) -> float:
+        ar, ac = divmod(a, self.grid.width)
+        br, bc = divmod(b, self.grid.width)
+        return self.movement.estimate(abs(ar - br), abs(ac - bc))
+
+    def _key(self, node: int) -> Tuple[float, float]:
+        best = min(self.g[node], self.rhs[node])
+        return (best + self._heuristic(self.start, node) + self.km, best)
+
+    def _push(self, node: int, key: Tuple[float, float]) -> None:
+        # Older entries for the node stay in the heap and are skipped when popped
+        self.queued_key[node] = key
+        heapq.heappush(self.open_set, (key[0], key[1], node))
+
+    def _update_vertex(self, node: int) -> None:
+        if node != self.goal:
+            best = INF
+            for offset, cost, side_a, side_b in self.moves:
+                neighbor = node + offset
+                edge = self._edge_cost(node, neighbor, cost, side_a, side_b)
+                if edge + self.g[neighbor] < best:
+                    best = edge + self.g[neighbor]
+            self.rhs[node] = best
+        if self.g[node] != self.rhs[node]:
+            self._push(node, self._key(node))
+        else:
+            self.queued_key[node] = np.nan
+
+    def _edge_cost(self, a: int, b: int, cost: float, side_a: int, side_b: int) -> float:
+        """
+        Cost of moving from node a to its neighbor b (inf if the move is blocked).
+        """
+        passable = self.grid.passable
+        if not passable[a] or not passable[b]:
+            return INF
+        if side_a and not (passable[a + side_a] and passable[a + side_b]):
+            return INF
+        return cost * self.weights[b]
+
+    def _compute_shortest_path(self) -> None:
+        open_set = self.open_set
+        while open_set:
+            k1, k2, node = open_set[0]
+            queued = self.queued_key[node]
+            if k1 != queued[0] or k2 != queued[1]:
+                heapq.heappop(open_set)
+                continue
+
+            start_key = self._key(self.start)
+            if (k1, k2) >= start_key and self.rhs[self.start] == self.g[self.start]:
+                break
+            heapq.heappop(open_set)
+            self.queued_key[node] = np.nan
+
+            new_key = self._key(node)
+            if (k1, k2) < new_key:
+                self._push(node, new_key)
+                continue
+
+            self.expansions += 1
+            if self.g[node] > self.rhs[node]:
+                self.g[node] = self.rhs[node]
+            else:
+                self.g[node] = INF
+                self._update_vertex(node)
+            self._update_neighbors(node)
+
+    def plan(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Shortest path from start to the goal, repairing the search state as needed.
+
+        Args:
+            start (Tuple[int, int]): Current coordinates of the truck.
+
+        Returns:
+            List[Tuple[int, int]]: Path from start to the goal, like a_star.
+        """
+        node = self.grid.node_id(start)
+        if self.start is None:
+            self.start = node
+            self._push(self.goal, self._key(self.goal))
+        else:
+            self.km += self._heuristic(self.start, node)
+            self.start = node
+        self._compute_shortest_path()
+
+        if self.g[node] == INF:
+            raise ValueError("No path found from start to end.")
+
+        path = []
+        while node != self.goal:
+            best, best_neighbor = INF, None
+            for offset, cost, side_a, side_b in self.moves:
+                neighbor = node + offset
+                total = self._edge_cost(node, neighbor, cost, side_a, side_b) + self.g[neighbor]
+                if total < best:
+                    best, best_neighbor = total, neighbor
+            node = best_neighbor
+            path.append(self.grid.cell_of(node))
+        return path
+
+    def _cell_changed(self, node: int) -> None:
+        """
+        Re-evaluate a changed cell and every neighbor whose edges run through it.
+        """
+        if self.start is None:
+            # Nothing has been searched yet, the first plan call sees the new map
+            return
+        self._update_vertex(node)
+        self._update_neighbors(node)
+
+    def _update_neighbors(self, node: int) -> None:
+        # Blocked neighbors (including the padding border) have no edges to re-evaluate
+        passable = self.grid.passable
+        for offset, _, _, _ in self.moves:
+            if passable[node + offset]:
+                self._update_vertex(node + offset)
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Free or block a cell and repair the affected part of the search.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        node = self.grid.node_id(cell)
+        if bool(self.grid.passable[node]) == passable:
+            return
+        self.grid.set_passable(cell, passable)
+        self._cell_changed(node)
+
+    def set_weight(self, cell: Tuple[int, int], weight: float) -> None:
+        """
+        Change the cost multiplier for entering a cell and repair the affected part of the search.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            weight (float): New multiplier, at least 1.
+        """
+        if weight < 1:
+            raise ValueError("Cell weights must be at least 1.")
+        node = self.grid.node_id(cell)
+        if self.weights[node] == weight:
+            return
+        self.weights[node] = weight
+        self._cell_changed(node)
@@ -0,0 +1,95 @@
+import argparse
+import json
+from matplotlib.animation import FFMpegWriter, PillowWriter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from typing import Dict, List, Union
+from gridengine import MOVEMENT_MODELS
+from mapformat import MapFile, load_map
+from renderer import PATH, cell_square
+from routecodes import OBSTACLE, OPEN, PACKAGE, RouteCodes, encode_route
+from runlog import frame_title
+from simulation import simulate_delivery
+
+def export_run(run: Dict, route: Union[List[List[str]], RouteCodes, MapFile], output: str, fps: int = 10, frame_skip: int = 1, dpi: int = 100) -> int:
+    """
+    Render a simulated delivery run straight to a GIF or MP4 file.
+
+    Frames come from the simulation event log, so nothing is replanned and nothing
+    sleeps. Drawing uses the Agg canvas only and works without a display. The colors are
+    the ones visualize_with_animation uses (X=-1, S=2, E=3, P=4, path=1).
+
+    Args:
+        run (Dict): Result of simulate_delivery.
+        route (Union[List[List[str]], RouteCodes, MapFile]): 2D map of the route the run was simulated on,
+            its encoding, or a loaded map file. It is not modified.
+        output (str): File to write. '.gif' files use Pillow, anything else uses ffmpeg.
+        fps (int): Frames per second of the video.
+        frame_skip (int): Only every n-th truck step becomes a frame.
+        dpi (int): Resolution of the frames.
+
+    Returns:
+        int: Number of frames written.
+    """
+    if frame_skip < 1:
+        raise ValueError(f"frame_skip must be at least 1, got {frame_skip}.")
+    if fps < 1:
+        raise ValueError(f"fps must be at least 1, got {fps}.")
+    fig = Figure(figsize=(8, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    grid = route.to_codes() if isinstance(route, MapFile) else encode_route(route).codes.copy()
+    rows, cols = grid.shape
+    image = ax.imshow(grid, cmap="coolwarm", origin="upper", vmin=OBSTACLE, vmax=PACKAGE)
+    ax.set_xticks(range(cols))
+    ax.set_yticks(range(rows))
+    truck = PolyCollection([], facecolors=[image.cmap(image.norm(PATH))], edgecolors='none')
+    ax.add_collection(truck, autolim=False)
+
+    writer = PillowWriter(fps=fps) if output.lower().endswith('.gif') else FFMpegWriter(fps=fps)
+    frames = 0
+    step = 0
+    with writer.saving(fig, output, dpi):
+        for event in run['events']:
+            if event['type'] == 'leg':
+                for k, cell in enumerate(event['path']):
+                    step += 1
+                    if step % frame_skip:
+                        continue
+                    truck.set_verts([cell_square(cell)])
+                    running_time = event['running_time'] + (k + 1) * event['step_time']
+                    ax.set_title(frame_title(event['contents'], event['load'], running_time))
+                    writer.grab_frame()
+                    frames += 1
+
+            elif event['type'] == 'pickup':
+                grid[event['location']] = OPEN
+                image.set_data(grid)
+
+        ax.set_title("All packages delivered! Simulation complete.")
+        writer.grab_frame()
+        frames += 1
+    return frames
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate one delivery scenario and export it as a GIF or MP4.")
+    parser.add_argument('scenario', help="JSON scenario with packages, route (or map) and truck_capacity (see batchrun.py)")
+    parser.add_argument('-o', '--output', default='delivery.gif', help="GIF or MP4 file to write")
+    parser.add_argument('--fps', type=int, default=10, help="frames per second")
+    parser.add_argument('--skip', type=int, default=1, help="render only every n-th step")
+    parser.add_argument('--dpi', type=int, default=100, help="frame resolution")
+    args = parser.parse_args()
+    if args.skip < 1:
+        parser.error("--skip must be at least 1")
+    if args.fps < 1:
+        parser.error("--fps must be at least 1")
+
+    with open(args.scenario, encoding='utf-8') as f:
+        scenario = json.load(f)
+    movement = MOVEMENT_MODELS[scenario.get('movement', '8-connected')]
+    route = load_map(scenario['map']) if 'map' in scenario else scenario['route']
+    run = simulate_delivery(scenario['packages'], route, scenario['truck_capacity'], movement)
+    frames = export_run(run, route, args.output, args.fps, args.skip, args.dpi)
+    print(f"Wrote {frames} frames to {args.output}")
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from connectivity import ComponentIndex
+from gridengine import MovementModel, MOVEMENT_MODELS, EIGHT_CONNECTED
+from distancematrix import DistanceMatrix
+from cvrp import STEP_TIME, RouteOptimizer
+from mapformat import MapFile, load_map
+from parsing import parse_packages, parse_route_and_packages
+from routecodes import RouteCodes, encode_route
+from simulation import replay_trips
+
+# Distance matrix of the current run, set once per worker process by _init_worker
+_worker_legs = None
+
+def _init_worker(legs: DistanceMatrix) -> None:
+    global _worker_legs
+    _worker_legs = legs
+
+def _plan_in_worker(job: Tuple[List[Dict], int, str, Optional[float], Optional[int]]) -> Dict:
+    return plan_truck(_worker_legs, *job)
+
+def plan_truck(legs: DistanceMatrix, packages: List[Dict], truck_capacity: int, start: str, time_budget: Optional[float],
+               max_moves: Optional[int] = None) -> Dict:
+    """
+    Plan the trips of one truck with the route optimizer.
+
+    Args:
+        legs (DistanceMatrix): Leg costs between the truck starts, E and every package.
+        packages (List[Dict]): Packages assigned to the truck, in pickup priority order.
+        truck_capacity (int): Maximum load of the truck.
+        start (str): Label of the truck's start point in legs.
+        time_budget (float, optional): Seconds allowed for route optimization, unlimited if None.
+        max_moves (int, optional): Candidate plans route optimization may evaluate.
+
+    Returns:
+        Dict: trips, distance, time, lateness and deliveries of the plan.
+    """
+    if not packages:
+        return {'trips': [], 'distance': 0, 'time': 0, 'lateness': 0, 'deliveries': {}}
+    return RouteOptimizer(packages, legs, truck_capacity, start=start).solve(time_budget, max_moves)['plan']
+
+def partition_packages(sorted_packages: List[Dict], legs: DistanceMatrix, trucks: List[Dict]) -> List[List[Dict]]:
+    """
+    Split the packages between trucks so their workloads end at about the same time.
+
+    Packages are handed out in priority order, each to the truck that would finish
+    earliest if it fetched the package on a trip of its own (list scheduling). The route
+    optimizer later merges each truck's packages into fuller trips.
+
+    Args:
+        sorted_packages (List[Dict]): Packages in pickup priority order, as returned by parse_packages.
+        legs (DistanceMatrix): Leg costs between the truck starts, E and every package.
+        trucks (List[Dict]): Trucks with 'name', 'capacity' and the 'label' of their start in legs.
+
+    Returns:
+        List[List[Dict]]: Packages of each truck, in pickup priority order.
+    """
+    assigned = [[] for _ in trucks]
+    finish = [0.0] * len(trucks)
+    here = [truck['label'] for truck in trucks]
+    for package in sorted_packages:
+        best, best_finish = None, float('inf')
+        for k, truck in enumerate(trucks):
+            if package['weight'] > truck['capacity'] or legs.distance(here[k], package['id']) == float('inf'):
+                continue
+            # Drive there empty, load, and bring the package to the warehouse
+            estimate = finish[k] + legs.steps(here[k], package['id']) * STEP_TIME + package['weight'] * STEP_TIME \
+                + (legs.steps(package['id'], 'E') + 1) * (package['weight'] + 1) * STEP_TIME
+            if estimate < best_finish:
+                best, best_finish = k, estimate
+        if best is None:
+            raise ValueError(f"No truck can carry package {package['id']}.")
+        assigned[best].append(package)
+        finish[best] = best_finish
+        here[best] = 'E'
+    return assigned
+
+def find_conflicts(runs: Dict[str, Dict], exempt: List[Tuple[int, int]] = ()) -> Dict:
+    """
+    Check the trucks' timed paths against a reservation table of shared cells.
+
+    Every truck reserves each cell it stands on for the time it spends there: one step
+    time per cell of a leg, plus pickups on the package cell. Two trucks holding the same
+    cell at overlapping times, or swapping two neighboring cells, is a collision.
+
+    Args:
+        runs (Dict[str, Dict]): Per truck, the result of replay_trips.
+        exempt (List[Tuple[int, int]]): Cells with room for several trucks, e.g. the warehouse.
+
+    Returns:
+        Dict: 'collisions' (cell or pair of cells, time, trucks) and 'congestion', the
+        number of trucks passing through each cell used by more than one truck.
+    """
+    exempt = set(exempt)
+    reservations = {}  # cell -> [(from, until, truck)]
+    moves = {}  # (cell, next cell) -> [(from, until, truck)]
+    for name, run in runs.items():
+        for event in run['events']:
+            if event['type'] == 'leg':
+                time, step_time = event['time'], event['step_time']
+                previous = None
+                for cell in event['path']:
+                    reservations.setdefault(cell, []).append((time, time + step_time, name))
+                    if previous is not None:
+                        moves.setdefault((previous, cell), []).append((time - step_time, time, name))
+                    previous = cell
+                    time += step_time
+            elif event['type'] == 'pickup':
+                reservations.setdefault(event['location'], []).append((event['time'], event['time'] + event['duration'], name))
+
+    collisions = []
+    for cell, held in reservations.items():
+        if cell in exempt:
+            continue
+        held.sort()
+        for i, (start, until, truck) in enumerate(held):
+            for other_start, _, other in held[i + 1:]:
+                if other_start >= until:
+                    break
+                if other != truck:
+                    collisions.append({'cell': cell, 'time': other_start, 'trucks': [truck, other]})
+    for (a, b), crossings in moves.items():
+        for start, until, truck in crossings:
+            for other_start, other_until, other in moves.get((b, a), ()):
+                if other != truck and other_start < until and start < other_until and truck < other:
+                    collisions.append({'cells': [a, b], 'time': max(start, other_start), 'trucks': [truck, other]})
+
+    congestion = {}
+    for cell, held in reservations.items():
+        trucks = {truck for _, _, truck in held}
+        if len(trucks) > 1 and cell not in exempt:
+            congestion[cell] = len(trucks)
+    return {'collisions': collisions, 'congestion': congestion}
+
+def simulate_fleet(packages: List[Dict], route: Union[List[List[str]], RouteCodes, MapFile], trucks: List[Dict], movement: MovementModel = EIGHT_CONNECTED,
+                   time_budget: Optional[float] = 1.0, workers: int = None, reservations: bool = False, max_moves: Optional[int] = None) -> Dict:
+    """
+    Headless delivery simulation for a fleet of trucks working at the same time.
+
+    Packages are partitioned between the trucks, then every truck's trips are planned
+    concurrently in a process pool (one route optimizer per truck) and replayed on its
+    own virtual clock, all starting at time 0.
+
+    Packages and truck starts walled off from E are found by a connectivity check before
+    any search runs, and reported together in one ValueError.
+
+    Args:
+        packages (List[Dict]): List of package details.
+        route (Union[List[List[str]], RouteCodes, MapFile]): 2D map representation of the route,
+            its encoding, or a loaded map file.
+        trucks (List[Dict]): One dict per truck with 'capacity' and optionally 'name' and 'start'
+            (coordinates; defaults to the route's S).
+        movement (MovementModel): Allowed moves, step costs and heuristic used for every leg.
+        time_budget (float, optional): Seconds allowed for route optimization, per truck; unlimited if None.
+        workers (int, optional): Worker processes for planning (defaults to the CPU count). 1 plans in this process.
+        reservations (bool): Also check the timed paths for collisions and congestion.
+        max_moves (int, optional): Candidate plans route optimization may evaluate, per truck.
+
+    Returns:
+        Dict: makespan, distance, per-truck results (trips, distance, clock, events,
+        time and load utilization) and, with reservations, the collision report.
+    """
+    if not isinstance(route, MapFile):
+        route = encode_route(route)
+    start, end, package_locations = parse_route_and_packages(route, packages)
+    grid = route.to_grid()
+
+    fleet = []
+    points = {'S': start, 'E': end}
+    for k, truck in enumerate(trucks):
+        name = truck.get('name', f"truck{k + 1}")
+        label = f"S:{name}"
+        points[label] = tuple(truck.get('start', start))
+        fleet.append({'name': name, 'capacity': truck['capacity'], 'label': label})
+    points.update(package_locations)
+
+    # Report every walled-off package and truck start at once, before any search runs
+    components = ComponentIndex(grid, movement)
+    checked = dict(package_locations, S=start)
+    checked.update({f"start of {truck['name']}": points[truck['label']] for truck in fleet})
+    unreachable = components.unreachable(end, checked)
+    if unreachable:
+        raise ValueError(f"No path found to {', '.join(unreachable)}.")
+    legs = DistanceMatrix(grid, points, movement, components)
+
+    sorted_packages = parse_packages(packages)
+    assigned = partition_packages(sorted_packages, legs, fleet)
+    jobs = [(truck_packages, truck['capacity'], truck['label'], time_budget, max_moves) for truck_packages, truck in zip(assigned, fleet)]
+
+    workers = min(workers or os.cpu_count() or 1, len(fleet))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(legs,)) as executor:
+            plans = list(executor.map(_plan_in_worker, jobs))
+    else:
+        plans = [plan_truck(legs, *job) for job in jobs]
+
+    runs = {}
+    for truck, truck_packages, plan in zip(fleet, assigned, plans):
+        run = replay_trips(plan['trips'], legs, truck_packages, package_locations, start=truck['label'])
+        run.update({'trips': plan['trips'], 'packages': [package['id'] for package in truck_packages]})
+        runs[truck['name']] = run
+
+    makespan = max((run['clock'] for run in runs.values()), default=0)
+    for truck in fleet:
+        run = runs[truck['name']]
+        loads = [event['load'] for event in run['events'] if event['type'] == 'deliver']
+        run['time_utilization'] = run['clock'] / makespan if makespan else 0
+        run['load_utilization'] = sum(loads) / (len(loads) * truck['capacity']) if loads else 0
+
+    result = {'makespan': makespan, 'distance': sum(run['distance'] for run in runs.values()), 'trucks': runs}
+    if reservations:
+        result['conflicts'] = find_conflicts(runs, exempt=[end])
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a fleet of trucks delivering one scenario.")
+    parser.add_argument('scenario', help="JSON scenario with packages, route (or map) and trucks")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="number of planning processes")
+    parser.add_argument('--time-budget', type=float, default=1.0, help="route optimization seconds per truck")
+    parser.add_argument('--reservations', action='store_true', help="check for collisions on shared cells")
+    args = parser.parse_args()
+
+    with open(args.scenario, encoding='utf-8') as f:
+        scenario = json.load(f)
+    route = load_map(scenario['map']) if 'map' in scenario else scenario['route']
+    trucks = scenario.get('trucks') or [{'capacity': scenario['truck_capacity']}]
+    movement = MOVEMENT_MODELS[scenario.get('movement', '8-connected')]
+
+    result = simulate_fleet(scenario['packages'], route, trucks, movement, args.time_budget, args.workers, args.reservations)
+    print(f"Makespan {result['makespan']:.1f}s, total distance {result['distance']:.1f}")
+    for name, run in result['trucks'].items():
+        print(f"  {name}: {len(run['packages'])} packages in {len(run['trips'])} trips, done at {run['clock']:.1f}s, "
+              f"busy {run['time_utilization']:.0%}, loaded {run['load_utilization']:.0%}")
+    if args.reservations:
+        conflicts = result['conflicts']
+        print(f"{len(conflicts['collisions'])} collisions, {len(conflicts['congestion'])} shared cells")
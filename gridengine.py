@@ -0,0 +1,332 @@
+import heapq
+import math
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Neighbor order used by a_star: cardinal directions first, then diagonals.
+# The order matters because ties on g-score keep the first parent found.
+DIRECTIONS = [
+    (-1, 0), (1, 0), (0, -1), (0, 1),  # Cardinal directions
+    (-1, -1), (-1, 1), (1, -1), (1, 1)  # Diagonal directions
+]
+
+class MovementModel:
+    """
+    Allowed moves on the grid, their step costs and the matching admissible heuristic.
+
+    4-connected models use Manhattan distance, 8-connected models with equal cardinal
+    and diagonal costs use Chebyshev distance, and any other 8-connected model uses
+    octile distance. All three are consistent for their move set, so a search that
+    closes a node on its first expansion stays optimal.
+    """
+
+    def __init__(self, name: str, diagonal: bool = True, cardinal_cost: float = 1, diagonal_cost: float = 1, corner_cutting: bool = True):
+        """
+        Args:
+            name (str): Name of the model, used in reports.
+            diagonal (bool): Whether diagonal moves are allowed.
+            cardinal_cost (float): Cost of a horizontal or vertical step.
+            diagonal_cost (float): Cost of a diagonal step.
+            corner_cutting (bool): Whether a diagonal step may squeeze past a blocked cell.
+        """
+        if cardinal_cost <= 0 or diagonal_cost <= 0:
+            raise ValueError("Step costs must be positive.")
+
+        self.name = name
+        self.diagonal = diagonal
+        self.cardinal_cost = cardinal_cost
+        self.diagonal_cost = diagonal_cost
+        self.corner_cutting = corner_cutting
+        self.directions = DIRECTIONS if diagonal else DIRECTIONS[:4]
+
+        if not diagonal:
+            self.heuristic_name = 'manhattan'
+        elif diagonal_cost == cardinal_cost:
+            self.heuristic_name = 'chebyshev'
+        else:
+            self.heuristic_name = 'octile'
+
+    def __repr__(self) -> str:
+        return f"MovementModel({self.name!r}, heuristic={self.heuristic_name!r})"
+
+    def step_cost(self, dr: int, dc: int) -> float:
+        """
+        Cost of a single move by (dr, dc).
+        """
+        return self.diagonal_cost if dr and dc else self.cardinal_cost
+
+    def estimate(self, dr: int, dc: int) -> float:
+        """
+        Lower bound on the cost of covering an absolute offset of (dr, dc) cells.
+
+        Args:
+            dr (int): Absolute row difference.
+            dc (int): Absolute column difference.
+
+        Returns:
+            float: Admissible estimate of the remaining cost.
+        """
+        if not self.diagonal:
+            return self.cardinal_cost * (dr + dc)
+        low, high = (dr, dc) if dr < dc else (dc, dr)
+        if self.diagonal_cost < self.cardinal_cost:
+            # Zig-zagging diagonally can beat a straight run, so only the longer axis is bounded
+            return self.diagonal_cost * high
+        return self.cardinal_cost * (high - low) + min(self.diagonal_cost, 2 * self.cardinal_cost) * low
+
+    def heuristic(self, a: Tuple[int, int], b: Tuple[int, int]) -> float:
+        """
+        Heuristic function for A* algorithm under this movement model.
+
+        Args:
+            a (Tuple[int, int]): Point A (row, column).
+            b (Tuple[int, int]): Point B (row, column).
+
+        Returns:
+            float: Estimated cost between A and B.
+        """
+        return self.estimate(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+    def compile(self, width: int) -> List[Tuple[int, float, int, int]]:
+        """
+        Translate the moves into flat-id offsets for a padded grid of the given width.
+
+        Returns:
+            List[Tuple[int, float, int, int]]: (offset, cost, side_a, side_b) per move. side_a
+            and side_b are the offsets of the two cells a diagonal move passes between; they
+            are 0 when corner cutting is allowed or the move is cardinal.
+        """
+        moves = []
+        for dr, dc in self.directions:
+            side_a = side_b = 0
+            if dr and dc and not self.corner_cutting:
+                side_a, side_b = dr * width, dc
+            moves.append((dr * width + dc, self.step_cost(dr, dc), side_a, side_b))
+        return moves
+
+FOUR_CONNECTED = MovementModel('4-connected', diagonal=False)
+EIGHT_CONNECTED = MovementModel('8-connected')
+EIGHT_CONNECTED_NO_CORNER_CUTTING = MovementModel('8-connected-no-corner-cutting', diagonal_cost=math.sqrt(2), corner_cutting=False)
+MOVEMENT_MODELS = {model.name: model for model in (FOUR_CONNECTED, EIGHT_CONNECTED, EIGHT_CONNECTED_NO_CORNER_CUTTING)}
+
+class GridMap:
+    """
+    Compiled occupancy grid for path planning.
+
+    The route is stored as a flat uint8 array padded with a one-cell blocked
+    border, so every neighbor of an interior cell is just ``node + offset``
+    and the search never needs a bounds check. Node ids grow with (row, column)
+    in the same lexicographic order as the coordinate tuples they replace.
+    The revision counter goes up whenever set_passable changes a cell, so cached
+    results can tell whether they are still valid.
+    """
+
+    def __init__(self, occupancy: np.ndarray):
+        """
+        Args:
+            occupancy (np.ndarray): 2D boolean array, True where the cell is passable.
+        """
+        occupancy = np.asarray(occupancy, dtype=bool)
+        self.rows, self.cols = occupancy.shape
+        self.width = self.cols + 2
+        padded = np.zeros((self.rows + 2, self.width), dtype=np.uint8)
+        padded[1:-1, 1:-1] = occupancy
+        self.passable = padded.ravel()
+        self.size = self.passable.size
+        self.offsets = [dr * self.width + dc for dr, dc in DIRECTIONS]
+        self.revision = 0
+
+    @classmethod
+    def from_route(cls, route: List[List[str]]) -> "GridMap":
+        """
+        Compile a 2D string map into a GridMap. Every cell except 'X' is passable.
+        Like the original a_star, the map width is taken from the first row.
+
+        Args:
+            route (List[List[str]]): 2D map representation of the route.
+
+        Returns:
+            GridMap: Compiled grid.
+        """
+        cols = len(route[0])
+        return cls(np.array([row[:cols] for row in route], dtype=str) != 'X')
+
+    def node_id(self, cell: Tuple[int, int]) -> int:
+        """
+        Convert (row, column) coordinates to a flat node id.
+        """
+        return (cell[0] + 1) * self.width + cell[1] + 1
+
+    def cell_of(self, node: int) -> Tuple[int, int]:
+        """
+        Convert a flat node id back to (row, column) coordinates.
+        """
+        r, c = divmod(node, self.width)
+        return (r - 1, c - 1)
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Open or block a single cell, e.g. when a package is removed from the map.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        node = self.node_id(cell)
+        if self.passable[node] != passable:
+            self.passable[node] = passable
+            self.revision += 1
+
+def reconstruct_path(grid: GridMap, parent, start: int, node: int) -> List[Tuple[int, int]]:
+    """
+    Follow parent links from node back to start.
+
+    Args:
+        grid (GridMap): Grid the search ran on.
+        parent: Parent buffer indexed by node id (-1 where unset).
+        start (int): Node id of the search start.
+        node (int): Node id to walk back from.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start (exclusive) to node (inclusive).
+    """
+    path = []
+    while node != start and parent[node] != -1:
+        path.append(grid.cell_of(node))
+        node = parent[node]
+    path.reverse()
+    return path
+
+def legacy_a_star(grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    The original a_star search (8-way unit moves ranked by Manhattan distance) on a compiled grid.
+
+    Manhattan distance overestimates diagonal moves, so the paths found here are not
+    always the shortest. It is kept as a baseline: priorities and tie-breaking are
+    the same as the first list-based a_star, so the returned paths are identical.
+    Each node has at most one entry in the heap, tracked by a flag buffer, so the
+    membership test is O(1) instead of a scan of the open set.
+
+    Args:
+        grid (GridMap): Compiled grid.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        stats (Dict, optional): Filled with the number of node expansions and heap pushes.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    width = grid.width
+    source, target = grid.node_id(start), grid.node_id(end)
+    end_r, end_c = divmod(target, width)
+    expansions = 0
+
+    g_buffer = np.full(grid.size, np.inf)
+    parent_buffer = np.full(grid.size, -1, dtype=np.int64)
+    open_buffer = np.zeros(grid.size, dtype=np.uint8)
+
+    # Memoryviews keep the storage in NumPy but index much faster in the loop below
+    g_score, parent, in_open = memoryview(g_buffer), memoryview(parent_buffer), memoryview(open_buffer)
+    passable = memoryview(grid.passable)
+    offsets = grid.offsets
+
+    open_set = [(0, source)]
+    in_open[source] = 1
+    g_score[source] = 0
+
+    while open_set:
+        _, current = heapq.heappop(open_set)
+        in_open[current] = 0
+        expansions += 1
+
+        if current == target:
+            if stats is not None:
+                stats.update(expansions=expansions, heap_pushes=expansions + len(open_set))
+            return reconstruct_path(grid, parent, source, current)
+
+        tentative_g_score = g_score[current] + 1
+        for offset in offsets:
+            neighbor = current + offset
+            if passable[neighbor] and tentative_g_score < g_score[neighbor]:
+                parent[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                if not in_open[neighbor]:
+                    r, c = divmod(neighbor, width)
+                    heapq.heappush(open_set, (tentative_g_score + abs(r - end_r) + abs(c - end_c), neighbor))
+                    in_open[neighbor] = 1
+
+    if stats is not None:
+        stats.update(expansions=expansions, heap_pushes=expansions)
+    raise ValueError("No path found from start to end.")
+
+def grid_a_star(grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    A* search on a compiled grid with array-backed g-score and parent buffers.
+
+    The heuristic comes from the movement model and is consistent, so every node is
+    closed on its first expansion and the returned path is optimal. Improved nodes are
+    pushed again and stale heap entries are skipped when popped (lazy deletion).
+    Ties on f-score prefer the node closer to the goal, which keeps expansions low.
+
+    Args:
+        grid (GridMap): Compiled grid.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        stats (Dict, optional): Filled with the number of node expansions, heap pushes and
+            stale heap entries skipped because their node was already closed.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    width = grid.width
+    source, target = grid.node_id(start), grid.node_id(end)
+    end_r, end_c = divmod(target, width)
+    estimate = movement.estimate
+    expansions = stale = 0
+    moves = movement.compile(width)
+
+    g_buffer = np.full(grid.size, np.inf)
+    parent_buffer = np.full(grid.size, -1, dtype=np.int64)
+    closed_buffer = np.zeros(grid.size, dtype=np.uint8)
+
+    # Memoryviews keep the storage in NumPy but index much faster in the loop below
+    g_score, parent, closed = memoryview(g_buffer), memoryview(parent_buffer), memoryview(closed_buffer)
+    passable = memoryview(grid.passable)
+
+    g_score[source] = 0
+    r, c = divmod(source, width)
+    h = estimate(abs(r - end_r), abs(c - end_c))
+    open_set = [(h, h, source)]
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if closed[current]:
+            stale += 1
+            continue
+        expansions += 1
+
+        if current == target:
+            if stats is not None:
+                stats.update(expansions=expansions, heap_pushes=expansions + stale + len(open_set), stale_entries=stale)
+            return reconstruct_path(grid, parent, source, current)
+        closed[current] = 1
+
+        current_g_score = g_score[current]
+        for offset, cost, side_a, side_b in moves:
+            neighbor = current + offset
+            if not passable[neighbor] or closed[neighbor]:
+                continue
+            if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                continue
+            tentative_g_score = current_g_score + cost
+            if tentative_g_score < g_score[neighbor]:
+                parent[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                r, c = divmod(neighbor, width)
+                h = estimate(abs(r - end_r), abs(c - end_c))
+                heapq.heappush(open_set, (tentative_g_score + h, h, neighbor))
+
+    if stats is not None:
+        stats.update(expansions=expansions, heap_pushes=expansions + stale, stale_entries=stale)
+    raise ValueError("No path found from start to end.")
@@ -0,0 +1,470 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+Sector = Tuple[int, int]
+
+# Sentinel abstract nodes for the query start and goal (real node ids are never negative)
+START, GOAL = -1, -2
+INF = float('inf')
+
+def sector_trees(grid: GridMap, movement: MovementModel, sources: List[int]):
+    """
+    Shortest-path trees from several sources at once on a small grid.
+
+    All trees are relaxed together with NumPy (one shifted minimum per move direction)
+    until nothing improves, so no Python code runs per cell.
+
+    Args:
+        grid (GridMap): Compiled grid, usually one sector.
+        movement (MovementModel): Allowed moves and step costs.
+        sources (List[int]): Node ids of the roots.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Per source, the cost of every node and the int8 move code
+        (index into movement.compile) of the move that reached it (-1 where unreached).
+    """
+    h, w = grid.rows + 2, grid.width
+    passable = grid.passable.reshape(h, w).astype(bool)
+    count = len(sources)
+    dist = np.full((count, h, w), np.inf)
+    codes = np.full((count, h, w), -1, dtype=np.int8)
+    dist.reshape(count, -1)[np.arange(count), sources] = 0
+
+    steps = []
+    for code, (dr, dc) in enumerate(movement.directions):
+        # A cell is reached from cell - (dr, dc)
+        allowed = passable[1:-1, 1:-1] & passable[1 - dr:h - 1 - dr, 1 - dc:w - 1 - dc]
+        if dr and dc and not movement.corner_cutting:
+            allowed &= passable[1 - dr:h - 1 - dr, 1:-1] & passable[1:-1, 1 - dc:w - 1 - dc]
+        steps.append((code, dr, dc, movement.step_cost(dr, dc), allowed))
+
+    inner, inner_codes = dist[:, 1:-1, 1:-1], codes[:, 1:-1, 1:-1]
+    changed = True
+    while changed:
+        changed = False
+        for code, dr, dc, cost, allowed in steps:
+            candidate = dist[:, 1 - dr:h - 1 - dr, 1 - dc:w - 1 - dc] + cost
+            better = (candidate < inner) & allowed
+            if better.any():
+                inner[better] = candidate[better]
+                inner_codes[better] = code
+                changed = True
+    return dist.reshape(count, -1), codes.reshape(count, -1)
+
+class HierarchicalGrid:
+    """
+    Hierarchical path planner (HPA*) for large maps.
+
+    The map is cut into square sectors. Wherever a move crosses from one sector into
+    the next, the crossing cells are grouped into entrances and one or two transitions
+    per entrance become abstract nodes. Inside a sector, the cost between every pair of
+    its abstract nodes is precomputed together with one int8 shortest-path tree per
+    node. A query only inserts its start and goal into their sectors, searches the small
+    abstract graph and then refines each abstract edge by walking a stored tree, so no
+    grid search runs at query time.
+
+    Sectors are built the first time a query touches them (or all at once with
+    precompute). Opening or blocking a cell only drops the sectors it affects: its own
+    sector, plus the neighboring ones when the cell lies on a sector border.
+
+    Paths are near-optimal: they are forced through the chosen transitions.
+    """
+
+    def __init__(self, grid: GridMap, movement: MovementModel = EIGHT_CONNECTED, sector_size: int = 32):
+        """
+        Args:
+            grid (GridMap): Compiled grid. It is edited in place by set_passable.
+            movement (MovementModel): Allowed moves, step costs and heuristic.
+            sector_size (int): Side length of a sector in cells.
+        """
+        self.grid = grid
+        self.movement = movement
+        self.sector_size = sector_size
+        self.moves = movement.compile(grid.width)
+        self.sector_rows = -(-grid.rows // sector_size)
+        self.sector_cols = -(-grid.cols // sector_size)
+
+        self.crossings = {}  # (sector, later sector) -> [(node, node, cost)]
+        self.inter = {}  # node -> {node in another sector: cost}
+        self.sectors = {}  # sector -> built sector, see _build_sector
+        self.adjacency = {}  # node -> [(node, cost)] for the nodes of built sectors
+        self.expansions = 0
+
+        for sr in range(self.sector_rows):
+            for sc in range(self.sector_cols):
+                for neighbor in self._later_neighbors((sr, sc)):
+                    self._link((sr, sc), neighbor)
+
+    def _later_neighbors(self, sector: Sector) -> List[Sector]:
+        sr, sc = sector
+        candidates = [(sr, sc + 1), (sr + 1, sc - 1), (sr + 1, sc), (sr + 1, sc + 1)]
+        return [(r, c) for r, c in candidates if 0 <= r < self.sector_rows and 0 <= c < self.sector_cols]
+
+    def _bounds(self, sector: Sector) -> Tuple[int, int, int, int]:
+        size = self.sector_size
+        r0, c0 = sector[0] * size, sector[1] * size
+        return r0, min(r0 + size, self.grid.rows), c0, min(c0 + size, self.grid.cols)
+
+    def sector_of(self, cell: Tuple[int, int]) -> Sector:
+        """
+        Sector containing a cell.
+        """
+        return (cell[0] // self.sector_size, cell[1] // self.sector_size)
+
+    def _link(self, a: Sector, b: Sector) -> bool:
+        """
+        (Re)compute the transitions between sector a and a neighboring sector b.
+
+        Returns:
+            bool: Whether the transitions changed.
+        """
+        grid = self.grid
+        passable = grid.passable
+        previous = self.crossings.pop((a, b), [])
+        for u, v, _ in previous:
+            del self.inter[u][v], self.inter[v][u]
+
+        # Cells of a that face b, and every allowed move from them into b
+        r0, r1, c0, c1 = self._bounds(a)
+        dr, dc = b[0] - a[0], b[1] - a[1]
+        rows = [r1 - 1] if dr else range(r0, r1)
+        cols = [c1 - 1] if dc == 1 else [c0] if dc == -1 else range(c0, c1)
+        raw = []
+        for r in rows:
+            for c in cols:
+                u = grid.node_id((r, c))
+                if not passable[u]:
+                    continue
+                for offset, cost, side_a, side_b in self.moves:
+                    v = u + offset
+                    if not passable[v] or self.sector_of(grid.cell_of(v)) != b:
+                        continue
+                    if side_a and not (passable[u + side_a] and passable[u + side_b]):
+                        continue
+                    raw.append((u, v, cost))
+        if not raw:
+            return bool(previous)
+
+        # Crossings whose cells touch on both sides belong to the same entrance
+        cells = [(grid.cell_of(u), grid.cell_of(v)) for u, v, _ in raw]
+        group = list(range(len(raw)))
+
+        def find(i: int) -> int:
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        for i in range(len(raw)):
+            for j in range(i - 1, -1, -1):
+                (ua, va), (ub, vb) = cells[i], cells[j]
+                if max(abs(ua[0] - ub[0]), abs(ua[1] - ub[1])) > 1:
+                    break
+                if max(abs(va[0] - vb[0]), abs(va[1] - vb[1])) <= 1:
+                    group[find(i)] = find(j)
+        entrances = {}
+        for i in range(len(raw)):
+            entrances.setdefault(find(i), []).append(raw[i])
+
+        # Short entrances get one transition in the middle, long ones one at each end
+        transitions = []
+        for entrance in entrances.values():
+            if len({u for u, _, _ in entrance}) >= 6:
+                transitions += [entrance[0], entrance[-1]]
+            else:
+                transitions.append(entrance[len(entrance) // 2])
+        self.crossings[(a, b)] = transitions
+        for u, v, cost in transitions:
+            self.inter.setdefault(u, {})[v] = cost
+            self.inter.setdefault(v, {})[u] = cost
+        return transitions != previous
+
+    def _build_sector(self, sector: Sector) -> Dict:
+        """
+        Collect the abstract nodes of a sector and precompute the paths between them.
+        """
+        grid = self.grid
+        r0, r1, c0, c1 = self._bounds(sector)
+        nodes = set()
+        sr, sc = sector
+        for r in (sr - 1, sr, sr + 1):
+            for c in (sc - 1, sc, sc + 1):
+                other = (r, c)
+                for u, v, _ in self.crossings.get((sector, other), []) + self.crossings.get((other, sector), []):
+                    nodes.add(u if self.sector_of(grid.cell_of(u)) == sector else v)
+        nodes = sorted(nodes)
+
+        occupancy = grid.passable.reshape(grid.rows + 2, grid.width)[r0 + 1:r1 + 1, c0 + 1:c1 + 1]
+        local = GridMap(occupancy)
+        local_nodes = [self._to_local(local, r0, c0, node) for node in nodes]
+        if nodes:
+            dist, codes = sector_trees(local, self.movement, local_nodes)
+            for i, node in enumerate(nodes):
+                # Transitions out of the sector are copied too: relinking a border drops both sectors
+                edges = [(other, float(dist[i, local_nodes[j]])) for j, other in enumerate(nodes)
+                         if i != j and dist[i, local_nodes[j]] < np.inf]
+                self.adjacency[node] = edges + list(self.inter.get(node, {}).items())
+        else:
+            codes = np.empty((0, local.size), dtype=np.int8)
+
+        built = {'origin': (r0, c0), 'grid': local, 'moves': self.movement.compile(local.width),
+                 'nodes': nodes, 'local_nodes': local_nodes, 'index': {node: i for i, node in enumerate(nodes)},
+                 'codes': codes, 'trees': [memoryview(row) for row in codes],
+                 'direct': np.empty(local.size, dtype=np.int8)}
+        self.sectors[sector] = built
+        return built
+
+    def _drop(self, sector: Sector) -> None:
+        built = self.sectors.pop(sector, None)
+        if built is not None:
+            for node in built['nodes']:
+                del self.adjacency[node]
+
+    def _sector(self, sector: Sector) -> Dict:
+        built = self.sectors.get(sector)
+        return built if built is not None else self._build_sector(sector)
+
+    def _direct(self, built: Dict, root: int, target: int):
+        """
+        A* inside a sector from the root (the goal of a query) until the target is settled.
+
+        Only the move codes on the way are needed, so this stops long before a full
+        sector tree would, and the sector's scratch row is reused between queries.
+
+        Args:
+            built (Dict): Sector both nodes are in.
+            root (int): Local node id the moves lead back to.
+            target (int): Local node id of the query start.
+
+        Returns:
+            memoryview: Move codes for _walk from the target to the root, -1 where never reached.
+        """
+        local, moves = built['grid'], built['moves']
+        codes = built['direct']
+        codes.fill(-1)
+        passable = memoryview(local.passable)
+        width = local.width
+        estimate = self.movement.estimate
+        target_r, target_c = divmod(target, width)
+        g_score = {root: 0}
+        closed = set()
+        r, c = divmod(root, width)
+        open_set = [(estimate(abs(r - target_r), abs(c - target_c)), 0, root)]
+        while open_set:
+            _, g, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == target:
+                break
+            for code, (offset, cost, side_a, side_b) in enumerate(moves):
+                neighbor = current + offset
+                if not passable[neighbor] or neighbor in closed:
+                    continue
+                if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                    continue
+                tentative = g + cost
+                if tentative < g_score.get(neighbor, INF):
+                    g_score[neighbor] = tentative
+                    codes[neighbor] = code
+                    r, c = divmod(neighbor, width)
+                    heapq.heappush(open_set, (tentative + estimate(abs(r - target_r), abs(c - target_c)), tentative, neighbor))
+        return memoryview(codes)
+
+    def _to_local(self, local: GridMap, r0: int, c0: int, node: int) -> int:
+        r, c = self.grid.cell_of(node)
+        return local.node_id((r - r0, c - c0))
+
+    def _walk(self, built: Dict, codes, root: int, cell: Tuple[int, int], cells: bool = True) -> Tuple[List[Tuple[int, int]], float]:
+        """
+        Follow a sector tree from a cell to its root.
+
+        Args:
+            built (Dict): Sector the tree belongs to.
+            codes: Move codes of the tree (a memoryview, for fast indexing).
+            root (int): Local node id of the root.
+            cell (Tuple[int, int]): Global coordinates to start from.
+            cells (bool): Collect the cells on the way, or only add up the cost.
+
+        Returns:
+            Tuple[List[Tuple[int, int]], float]: Global cells from the cell (exclusive) to the root
+            (inclusive) and the cost of the walk, or (None, inf) if the tree never reached the cell.
+        """
+        local, moves = built['grid'], built['moves']
+        r0, c0 = built['origin']
+        width = local.width
+        node = local.node_id((cell[0] - r0, cell[1] - c0))
+        if node != root and codes[node] == -1:
+            return None, INF
+        path = []
+        cost = 0
+        while node != root:
+            offset, step_cost, _, _ = moves[codes[node]]
+            node -= offset
+            cost += step_cost
+            if cells:
+                r, c = divmod(node, width)
+                path.append((r - 1 + r0, c - 1 + c0))
+        return path, cost
+
+    def precompute(self) -> None:
+        """
+        Build every sector now instead of on first use.
+        """
+        for sr in range(self.sector_rows):
+            for sc in range(self.sector_cols):
+                self._sector((sr, sc))
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Open or block a cell and drop the sectors whose abstract graph it affects.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        self.grid.set_passable(cell, passable)
+        sector = self.sector_of(cell)
+        self._drop(sector)
+
+        # Border cells can be crossed or cut past by moves between any two sectors around them
+        r0, r1, c0, c1 = self._bounds(sector)
+        r, c = cell
+        if r in (r0, r1 - 1) or c in (c0, c1 - 1):
+            block = {(sector[0] + dr, sector[1] + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)}
+            for a in sorted(block):
+                if not (0 <= a[0] < self.sector_rows and 0 <= a[1] < self.sector_cols):
+                    continue
+                for b in self._later_neighbors(a):
+                    if b in block and self._link(a, b):
+                        self._drop(a)
+                        self._drop(b)
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int], stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+        """
+        Near-optimal path from start to end through the abstract graph.
+
+        Args:
+            start (Tuple[int, int]): Starting coordinates.
+            end (Tuple[int, int]): Ending coordinates.
+            stats (Dict, optional): Filled with the abstract node expansions and the path cost.
+
+        Returns:
+            List[Tuple[int, int]]: Path from start (exclusive) to end (inclusive), like a_star.
+        """
+        grid = self.grid
+        if not (grid.passable[grid.node_id(start)] and grid.passable[grid.node_id(end)]):
+            raise ValueError("No path found from start to end.")
+        if start == end:
+            return []
+
+        start_sector, end_sector = self.sector_of(start), self.sector_of(end)
+        first, last = self._sector(start_sector), self._sector(end_sector)
+
+        # Connect start and goal to the abstract nodes of their sectors
+        start_edges, goal_edges = {}, {}
+        for i, node in enumerate(first['nodes']):
+            _, cost = self._walk(first, first['trees'][i], first['local_nodes'][i], start, cells=False)
+            if cost < INF:
+                start_edges[node] = cost
+        for i, node in enumerate(last['nodes']):
+            _, cost = self._walk(last, last['trees'][i], last['local_nodes'][i], end, cells=False)
+            if cost < INF:
+                goal_edges[node] = cost
+
+        direct = None
+        if start_sector == end_sector:
+            local, (r0, c0) = first['grid'], first['origin']
+            root = local.node_id((end[0] - r0, end[1] - c0))
+            direct = (self._direct(first, root, local.node_id((start[0] - r0, start[1] - c0))), root)
+            _, direct_cost = self._walk(first, *direct, start, cells=False)
+            if direct_cost < INF:
+                start_edges[GOAL] = direct_cost
+
+        # A* over the abstract graph; node ids are padded coordinates, which is fine for differences
+        width = grid.width
+        end_r, end_c = divmod(grid.node_id(end), width)
+        estimate = self.movement.estimate
+        adjacency = self.adjacency
+        g_score = {START: 0}
+        parent = {START: None}
+        closed = set()
+        expansions = 0
+        open_set = [(0, 0, START)]
+        while open_set:
+            _, _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            expansions += 1
+            if current == GOAL:
+                break
+
+            if current == START:
+                neighbors = start_edges.items()
+            else:
+                neighbors = adjacency.get(current)
+                if neighbors is None:
+                    self._sector(self.sector_of(grid.cell_of(current)))
+                    neighbors = adjacency[current]
+                if current in goal_edges:
+                    neighbors = neighbors + [(GOAL, goal_edges[current])]
+            current_g_score = g_score[current]
+            for neighbor, cost in neighbors:
+                tentative_g_score = current_g_score + cost
+                if tentative_g_score < g_score.get(neighbor, INF) and neighbor not in closed:
+                    g_score[neighbor] = tentative_g_score
+                    parent[neighbor] = current
+                    if neighbor == GOAL:
+                        h = 0
+                    else:
+                        r, c = divmod(neighbor, width)
+                        h = estimate(abs(r - end_r), abs(c - end_c))
+                    heapq.heappush(open_set, (tentative_g_score + h, h, neighbor))
+
+        self.expansions += expansions
+        if stats is not None:
+            stats['expansions'] = expansions
+            stats['cost'] = g_score.get(GOAL, INF)
+        if GOAL not in closed:
+            raise ValueError("No path found from start to end.")
+
+        abstract = []
+        node = GOAL
+        while node is not None:
+            abstract.append(node)
+            node = parent[node]
+        abstract.reverse()
+
+        return self._refine(abstract, start, end, first, last, direct)
+
+    def _refine(self, abstract: List[int], start: Tuple[int, int], end: Tuple[int, int], first: Dict, last: Dict, direct) -> List[Tuple[int, int]]:
+        """
+        Turn an abstract path into grid cells by walking the stored sector trees.
+        """
+        grid = self.grid
+        if abstract == [START, GOAL]:
+            return self._walk(first, *direct, start)[0]
+
+        # Start to the first abstract node
+        i = first['index'][abstract[1]]
+        path = self._walk(first, first['trees'][i], first['local_nodes'][i], start)[0]
+
+        for node, following in zip(abstract[1:-2], abstract[2:-1]):
+            cell, next_cell = grid.cell_of(node), grid.cell_of(following)
+            sector = self.sector_of(next_cell)
+            if self.sector_of(cell) != sector:
+                path.append(next_cell)
+            else:
+                built = self._sector(sector)
+                i = built['index'][following]
+                path += self._walk(built, built['trees'][i], built['local_nodes'][i], cell)[0]
+
+        # Last abstract node to the goal: walk back from the goal and reverse
+        i = last['index'][abstract[-2]]
+        back = self._walk(last, last['trees'][i], last['local_nodes'][i], end)[0]
+        if back:
+            path += back[-2::-1] + [end]
+        return path
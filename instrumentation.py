@@ -0,0 +1,167 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+class Metrics:
+    """
+    Opt-in counters, timers and structured records for the planner and the simulator.
+
+    Instrumented functions take an optional metrics argument and only touch it when
+    one is given, so a run without metrics pays a single None check per call site.
+    The searches themselves always count expansions (and stale heap entries) in local
+    variables, one integer addition per pop; heap pushes are not counted in the loop but
+    worked out at the end from the pops and the entries left in the heap. The stats
+    dict is only written once, when the search returns.
+
+    Counters and timers are keyed by name plus optional labels, e.g.
+    count('trips') or observe('search', seconds, pathfinder='a_star'). Results are written
+    as a Prometheus text exposition (to_prometheus) or as JSON lines holding every record
+    followed by a summary (to_records).
+    """
+
+    def __init__(self, prefix: str = 'delivery'):
+        """
+        Args:
+            prefix (str): Prepended to every metric name in the Prometheus output.
+        """
+        self.prefix = prefix
+        self.counters = {}  # (name, labels) -> value
+        self.timers = {}  # (name, labels) -> [count, total seconds, max seconds]
+        self.records = []
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Add value to a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Add one duration to a timer.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        timer = self.timers.get(key)
+        if timer is None:
+            self.timers[key] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Time the body of a with block.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def record(self, event: str, **fields) -> None:
+        """
+        Keep one structured record, e.g. the stats of a trip.
+        """
+        fields['event'] = event
+        self.records.append(fields)
+
+    def search(self, pathfinder: str, search: Callable, *args, **kwargs):
+        """
+        Run a search that fills a stats dict (grid_a_star, grid_jump_point_search,
+        HierarchicalGrid.find_path, PathCache.find_path, ...) and record its latency plus
+        whichever of expansions, heap pushes (derived, see above) and stale entries it reports.
+
+        Args:
+            pathfinder (str): Label of the search in the output.
+            search (Callable): The search; it is called with stats= on top of the given arguments.
+
+        Returns:
+            Whatever the search returns. Its errors are counted and re-raised.
+        """
+        stats = {}
+        started = time.perf_counter()
+        found = False
+        try:
+            result = search(*args, stats=stats, **kwargs)
+            found = True
+            return result
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe('search', seconds, pathfinder=pathfinder)
+            self.count('searches', pathfinder=pathfinder)
+            if not found:
+                self.count('search_failures', pathfinder=pathfinder)
+            for counter in ('expansions', 'heap_pushes', 'stale_entries'):
+                if counter in stats:
+                    self.count(f"search_{counter}", stats[counter], pathfinder=pathfinder)
+            self.record('search', pathfinder=pathfinder, seconds=seconds, found=found, **stats)
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Dict: counters and timers (count, total, max) by name, with labels folded into the name.
+        """
+        return {'counters': {_flat_name(name, labels): value for (name, labels), value in self.counters.items()},
+                'timers': {_flat_name(name, labels): {'count': count, 'total': total, 'max': longest}
+                           for (name, labels), (count, total, longest) in self.timers.items()}}
+
+    def to_records(self) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: Every record in order, then one 'summary' record.
+        """
+        return self.records + [dict(self.summary(), event='summary')]
+
+    def to_prometheus(self) -> str:
+        """
+        Returns:
+            str: Counters as <prefix>_<name>_total and timers as <prefix>_<name>_seconds summaries
+            (plus a _seconds_max gauge), in the Prometheus text exposition format.
+        """
+        lines = []
+        for name in sorted({name for name, _ in self.counters}):
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (other, labels), value in sorted(self.counters.items()):
+                if other == name:
+                    lines.append(f"{metric}{_label_text(labels)} {value}")
+        for name in sorted({name for name, _ in self.timers}):
+            metric = f"{self.prefix}_{name}_seconds"
+            timers = sorted((labels, timer) for (other, labels), timer in self.timers.items() if other == name)
+            lines.append(f"# TYPE {metric} summary")
+            for labels, (count, total, _) in timers:
+                lines.append(f"{metric}_count{_label_text(labels)} {count}")
+                lines.append(f"{metric}_sum{_label_text(labels)} {total:.9f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for labels, (_, _, longest) in timers:
+                lines.append(f"{metric}_max{_label_text(labels)} {longest:.9f}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """
+        Write the Prometheus text format to a .prom file, or JSON lines to any other path.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                for record in self.to_records():
+                    f.write(json.dumps(record, default=str) + '\n')
+
+def timed(metrics: Optional[Metrics], name: str, **labels):
+    """
+    metrics.timer(name, **labels), or a no-op context when metrics is None.
+    """
+    return nullcontext() if metrics is None else metrics.timer(name, **labels)
+
+def _flat_name(name: str, labels: Tuple) -> str:
+    return name + ''.join(f"[{key}={value}]" for key, value in labels)
+
+def _label_text(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
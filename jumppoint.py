@@ -0,0 +1,168 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED, reconstruct_path
+
+def _sign(x: int) -> int:
+    return (x > 0) - (x < 0)
+
+def expand_path(start: Tuple[int, int], waypoints: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Fill in every cell between consecutive waypoints that lie on straight or diagonal lines,
+    e.g. the jump points returned by grid_jump_point_search.
+
+    Args:
+        start (Tuple[int, int]): Starting coordinates.
+        waypoints (List[Tuple[int, int]]): Waypoints after the start, the last one being the end.
+
+    Returns:
+        List[Tuple[int, int]]: Every cell from start (exclusive) to the last waypoint (inclusive), like a_star.
+    """
+    path = []
+    r, c = start
+    for wr, wc in waypoints:
+        dr, dc = _sign(wr - r), _sign(wc - c)
+        while (r, c) != (wr, wc):
+            r, c = r + dr, c + dc
+            path.append((r, c))
+    return path
+
+def grid_jump_point_search(grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    Jump Point Search: A* that skips over the symmetric paths of open areas.
+
+    Instead of pushing every neighbor, each expansion jumps along straight and diagonal
+    lines until it reaches the goal or a cell with a forced neighbor (a turn that only
+    pays off because of a nearby obstacle). Only those jump points enter the heap.
+    Path costs are the same as grid_a_star's; the path itself may differ between
+    equally short alternatives.
+
+    Only uniform 8-connected grids with corner cutting are supported, i.e. models where
+    a diagonal step costs between one and two cardinal steps.
+
+    Args:
+        grid (GridMap): Compiled grid.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        stats (Dict, optional): Filled with the number of jump point expansions and heap pushes.
+
+    Returns:
+        List[Tuple[int, int]]: Jump points from start (exclusive) to end (inclusive). Use expand_path
+        to get every cell.
+    """
+    if not (movement.diagonal and movement.corner_cutting
+            and movement.cardinal_cost <= movement.diagonal_cost <= 2 * movement.cardinal_cost):
+        raise ValueError("Jump point search needs 8-connected moves with corner cutting.")
+
+    width = grid.width
+    source, target = grid.node_id(start), grid.node_id(end)
+    end_r, end_c = divmod(target, width)
+    estimate = movement.estimate
+    cardinal_cost, diagonal_cost = movement.cardinal_cost, movement.diagonal_cost
+    expansions = stale = 0
+
+    g_buffer = np.full(grid.size, np.inf)
+    parent_buffer = np.full(grid.size, -1, dtype=np.int64)
+    closed_buffer = np.zeros(grid.size, dtype=np.uint8)
+    g_score, parent, closed = memoryview(g_buffer), memoryview(parent_buffer), memoryview(closed_buffer)
+    passable = memoryview(grid.passable)
+
+    def jump_straight(node: int, step: int, side: int) -> Tuple[int, int]:
+        # Walk in one cardinal direction; side is the offset to one of the two flanks
+        distance = 0
+        while True:
+            node += step
+            distance += 1
+            if not passable[node]:
+                return -1, 0
+            if node == target:
+                return node, distance
+            if (not passable[node + side] and passable[node + side + step]) or \
+               (not passable[node - side] and passable[node - side + step]):
+                return node, distance
+
+    def jump_diagonal(node: int, dr: int, dc: int) -> Tuple[int, int]:
+        vertical, horizontal = dr * width, dc
+        distance = 0
+        while True:
+            node += vertical + horizontal
+            distance += 1
+            if not passable[node]:
+                return -1, 0
+            if node == target:
+                return node, distance
+            if (not passable[node - vertical] and passable[node - vertical + horizontal]) or \
+               (not passable[node - horizontal] and passable[node - horizontal + vertical]):
+                return node, distance
+            # A jump point along either cardinal component makes this cell one too
+            if jump_straight(node, vertical, horizontal)[0] != -1 or jump_straight(node, horizontal, vertical)[0] != -1:
+                return node, distance
+
+    def directions(node: int) -> List[Tuple[int, int]]:
+        """
+        Directions worth jumping in from node, after pruning the ones its parent already covers.
+        """
+        if node == source:
+            return [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+        r, c = divmod(node, width)
+        pr, pc = divmod(parent[node], width)
+        dr, dc = _sign(r - pr), _sign(c - pc)
+        if dr and dc:
+            result = [(dr, 0), (0, dc), (dr, dc)]
+            if not passable[node - dr * width]:
+                result.append((-dr, dc))
+            if not passable[node - dc]:
+                result.append((dr, -dc))
+        elif dr:
+            result = [(dr, 0)]
+            for side in (-1, 1):
+                if not passable[node + side]:
+                    result.append((dr, side))
+        else:
+            result = [(0, dc)]
+            for side in (-1, 1):
+                if not passable[node + side * width]:
+                    result.append((side, dc))
+        return result
+
+    g_score[source] = 0
+    r, c = divmod(source, width)
+    h = estimate(abs(r - end_r), abs(c - end_c))
+    open_set = [(h, h, source)]
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if closed[current]:
+            stale += 1
+            continue
+        expansions += 1
+
+        if current == target:
+            if stats is not None:
+                stats.update(expansions=expansions, heap_pushes=expansions + stale + len(open_set))
+            return reconstruct_path(grid, parent, source, current)
+        closed[current] = 1
+
+        current_g_score = g_score[current]
+        for dr, dc in directions(current):
+            if dr and dc:
+                neighbor, distance = jump_diagonal(current, dr, dc)
+                cost = distance * diagonal_cost
+            else:
+                step = dr * width + dc
+                neighbor, distance = jump_straight(current, step, dc * width + dr)
+                cost = distance * cardinal_cost
+            if neighbor == -1 or closed[neighbor]:
+                continue
+            tentative_g_score = current_g_score + cost
+            if tentative_g_score < g_score[neighbor]:
+                parent[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                r, c = divmod(neighbor, width)
+                h = estimate(abs(r - end_r), abs(c - end_c))
+                heapq.heappush(open_set, (tentative_g_score + h, h, neighbor))
+
+    if stats is not None:
+        stats.update(expansions=expansions, heap_pushes=expansions + stale)
+    raise ValueError("No path found from start to end.")
@@ -0,0 +1,115 @@
+import argparse
+import json
+import struct
+import numpy as np
+from typing import Dict, List, Tuple, Union
+from gridengine import GridMap
+from routecodes import OBSTACLE, OPEN, START, END, PACKAGE, RouteCodes, encode_route
+
+# File layout: header, uint8 raster (1 = passable, 0 = blocked) in row-major order,
+# then a JSON side table with the start, end and package coordinates.
+MAGIC = b'BRWNMAP\x01'
+HEADER = struct.Struct('<8sIIQQ')  # magic, rows, cols, side table offset, side table length
+
+class MapFile:
+    """
+    Route map loaded from the binary map format.
+
+    The raster is an np.memmap, so opening a city-scale map costs nothing until cells are
+    read, and no per-cell Python objects are ever created. The start, end and package
+    cells come from the side table instead of a scan of the map.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Map file to open.
+        """
+        with open(path, 'rb') as f:
+            magic, rows, cols, table_offset, table_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a route map file.")
+            f.seek(table_offset)
+            table = json.loads(f.read(table_length).decode('utf-8'))
+
+        self.path = path
+        self.rows, self.cols = rows, cols
+        self.raster = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size, shape=(rows, cols))
+        self.start = tuple(table['start']) if table['start'] else None
+        self.end = tuple(table['end']) if table['end'] else None
+        self.package_locations = {package_id: tuple(cell) for package_id, cell in table['packages'].items()}
+
+    def to_grid(self) -> GridMap:
+        """
+        Compile the raster into a GridMap for path planning.
+        """
+        return GridMap(self.raster)
+
+    def to_codes(self) -> np.ndarray:
+        """
+        The map as an int8 code raster like RouteCodes.codes, with S, E and the packages
+        from the side table, e.g. for drawing it.
+        """
+        codes = np.where(np.asarray(self.raster) != 0, OPEN, OBSTACLE).astype(np.int8)
+        for cell in self.package_locations.values():
+            codes[cell] = PACKAGE
+        if self.start:
+            codes[self.start] = START
+        if self.end:
+            codes[self.end] = END
+        return codes
+
+def load_map(path: str) -> MapFile:
+    """
+    Open a map file with a memory-mapped raster.
+
+    Args:
+        path (str): Map file to open.
+
+    Returns:
+        MapFile: Raster and side table of the map.
+    """
+    return MapFile(path)
+
+def save_map(route: Union[List[List[str]], RouteCodes], path: str) -> None:
+    """
+    Convert a 2D string map into the binary map format.
+
+    Args:
+        route (Union[List[List[str]], RouteCodes]): 2D map representation of the route, or its encoding.
+        path (str): File to write.
+    """
+    codes = encode_route(route)
+    raster = (codes.codes != OBSTACLE).astype(np.uint8)
+
+    table = {'start': list(codes.start) if codes.start else None, 'end': list(codes.end) if codes.end else None,
+             'packages': {package_id: list(cell) for package_id, cell in codes.package_locations.items()}}
+    encoded = json.dumps(table).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, raster.shape[0], raster.shape[1], HEADER.size + raster.size, len(encoded)))
+        f.write(raster.tobytes())
+        f.write(encoded)
+
+def read_text_map(path: str) -> List[List[str]]:
+    """
+    Read a text map with one row per line and cells separated by spaces, as printed by display_route.
+
+    Args:
+        path (str): Text file to read.
+
+    Returns:
+        List[List[str]]: 2D map representation of the route.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [line.split() for line in f if line.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a text map into the binary route map format.")
+    parser.add_argument('source', help="text map, one row per line with space-separated cells")
+    parser.add_argument('output', help="map file to write")
+    args = parser.parse_args()
+
+    save_map(read_text_map(args.source), args.output)
+    route_map = load_map(args.output)
+    print(f"Wrote {route_map.rows}x{route_map.cols} map with {len(route_map.package_locations)} packages to {args.output}")
@@ -0,0 +1,131 @@
+import argparse
+import json
+import random
+from collections import deque
+from typing import Dict, List, Tuple
+
+DESCRIPTIONS = ["A Live Body", "The President", "An Elephant", "A Secret Letter",
+                "Chinese Propaganda Books", "A Bomb", "A Feather"]
+
+# Weight distributions: each maps a random source and a maximum weight to one package weight
+WEIGHT_DISTRIBUTIONS = {
+    'uniform': lambda rng, max_weight: rng.randint(1, max_weight),
+    'light': lambda rng, max_weight: max(1, min(max_weight, int(rng.expovariate(4 / max_weight)) + 1)),
+    'heavy': lambda rng, max_weight: max(1, max_weight - int(rng.expovariate(4 / max_weight))),
+}
+
+def reachable_cells(route: List[List[str]], start: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """
+    Cells reachable from start with 4-connected moves, in BFS order.
+
+    Args:
+        route (List[List[str]]): 2D map representation of the route.
+        start (Tuple[int, int]): Cell the search starts from.
+
+    Returns:
+        List[Tuple[int, int]]: Every reachable cell, start included.
+    """
+    rows, cols = len(route), len(route[0])
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        r, c = queue.popleft()
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < rows and 0 <= nc < cols and route[nr][nc] != 'X' and (nr, nc) not in seen:
+                seen.add((nr, nc))
+                queue.append((nr, nc))
+    return list(seen)
+
+def generate_obstacle_map(rows: int, cols: int, obstacle_density: float, rng: random.Random) -> List[List[str]]:
+    """
+    Random map of open cells ('.') and obstacles ('X').
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        obstacle_density (float): Probability of each cell being an obstacle.
+        rng (random.Random): Random source.
+
+    Returns:
+        List[List[str]]: 2D map representation of the route.
+    """
+    return [['X' if rng.random() < obstacle_density else '.' for _ in range(cols)] for _ in range(rows)]
+
+def generate_scenario(rows: int = 20, cols: int = 20, obstacle_density: float = 0.2, package_count: int = 10,
+                      weight_distribution: str = 'uniform', max_weight: int = 15, truck_capacity: int = 20,
+                      seed: int = 0, name: str = None) -> Dict:
+    """
+    Seeded random delivery scenario in the format batchrun.py reads.
+
+    S, E and every package are placed on cells reachable from each other with 4-connected
+    moves, so the scenario is solvable under every movement model. The same arguments
+    always give the same scenario.
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        obstacle_density (float): Probability of each cell being an obstacle.
+        package_count (int): Number of packages to place.
+        weight_distribution (str): 'uniform', 'light' or 'heavy'.
+        max_weight (int): Heaviest possible package. Never above the truck capacity.
+        truck_capacity (int): Maximum load of the truck.
+        seed (int): Random seed.
+        name (str, optional): Scenario name. Derived from the arguments if omitted.
+
+    Returns:
+        Dict: name, packages, route and truck_capacity.
+    """
+    if weight_distribution not in WEIGHT_DISTRIBUTIONS:
+        raise ValueError(f"Unknown weight distribution: {weight_distribution}")
+    rng = random.Random(seed)
+    max_weight = min(max_weight, truck_capacity)
+    draw_weight = WEIGHT_DISTRIBUTIONS[weight_distribution]
+
+    # Retry until the open area around the start is big enough for S, E and the packages
+    for _ in range(100):
+        route = generate_obstacle_map(rows, cols, obstacle_density, rng)
+        open_cells = [(r, c) for r in range(rows) for c in range(cols) if route[r][c] == '.']
+        if not open_cells:
+            continue
+        cells = reachable_cells(route, rng.choice(open_cells))
+        if len(cells) >= package_count + 2:
+            break
+    else:
+        raise ValueError("Could not place all packages; lower the obstacle density or the package count.")
+
+    cells.sort()
+    start, end, *package_cells = rng.sample(cells, package_count + 2)
+    route[start[0]][start[1]] = 'S'
+    route[end[0]][end[1]] = 'E'
+
+    packages = []
+    for i, (r, c) in enumerate(package_cells, 1):
+        package_id = f"PKG{i}"
+        route[r][c] = package_id
+        packages.append({"id": package_id, "urgency": rng.randint(1, 5),
+                         "weight": draw_weight(rng, max_weight), "description": rng.choice(DESCRIPTIONS)})
+
+    if name is None:
+        name = f"{rows}x{cols}-d{obstacle_density:g}-p{package_count}-{weight_distribution}-s{seed}"
+    return {'name': name, 'packages': packages, 'route': route, 'truck_capacity': truck_capacity}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate seeded random delivery scenarios as JSONL (see batchrun.py).")
+    parser.add_argument('-o', '--output', default='scenarios.jsonl', help="JSONL file to write")
+    parser.add_argument('-n', '--count', type=int, default=10, help="number of scenarios")
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--cols', type=int, default=20)
+    parser.add_argument('--density', type=float, default=0.2, help="obstacle density")
+    parser.add_argument('--packages', type=int, default=10, help="packages per scenario")
+    parser.add_argument('--weights', choices=sorted(WEIGHT_DISTRIBUTIONS), default='uniform', help="weight distribution")
+    parser.add_argument('--max-weight', type=int, default=15)
+    parser.add_argument('--capacity', type=int, default=20, help="truck capacity")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first scenario; the rest count up from it")
+    args = parser.parse_args()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for k in range(args.count):
+            scenario = generate_scenario(args.rows, args.cols, args.density, args.packages, args.weights,
+                                         args.max_weight, args.capacity, args.seed + k)
+            f.write(json.dumps(scenario) + '\n')
+    print(f"Wrote {args.count} scenarios to {args.output}")
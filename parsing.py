@@ -0,0 +1,43 @@
+from typing import List, Dict, Tuple, Union
+from mapformat import MapFile
+from routecodes import RouteCodes, encode_route
+
+def parse_packages(package_list: List[Dict]) -> List[Dict]:
+    """
+    Parse and sort the package list based on urgency (ascending).
+    Within the same urgency, sort by weight (descending).
+
+    Args:
+        package_list (List[Dict]): List of package details.
+
+    Returns:
+        List[Dict]: Sorted package list.
+    """
+    return sorted(package_list, key=lambda x: (x['urgency'], -x['weight']))
+
+def parse_route_and_packages(route: Union[List[List[str]], RouteCodes, MapFile], packages: List[Dict]) -> Tuple[Tuple[int, int], Tuple[int, int], Dict[str, Tuple[int, int]]]:
+    """
+    Parse the route to identify start, end points, and package locations.
+    A MapFile already lists them in its side table, so its cells are not scanned.
+    A 2D map is encoded first; pass its RouteCodes instead to reuse an existing encoding.
+
+    Args:
+        route (Union[List[List[str]], RouteCodes, MapFile]): 2D map representation of the route,
+            its encoding, or a loaded map file.
+        packages (List[Dict]): List of package details.
+
+    Returns:
+        Tuple[Tuple[int, int], Tuple[int, int], Dict[str, Tuple[int, int]]]: Coordinates of the start, end points, and package locations.
+    """
+    if isinstance(route, MapFile):
+        start, end = route.start, route.end
+        package_locations = dict(route.package_locations)
+    else:
+        encoded = encode_route(route)
+        start, end = encoded.start, encoded.end
+        package_locations = dict(encoded.package_locations)
+
+    if not start or not end:
+        raise ValueError("Route must contain start (S) and end (E) points.")
+
+    return start, end, package_locations
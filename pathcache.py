@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED, grid_a_star
+
+# Cached outcome of a search that found no path
+_NO_PATH = None
+
+class PathCache:
+    """
+    Bounded least-recently-used cache of grid_a_star results on one grid.
+
+    Entries are keyed by (grid revision, movement model, start, goal). Callers report map
+    edits through set_passable (or GridMap.set_passable on the same grid); a change bumps
+    the grid's revision, which drops every entry of the old revision on the next lookup.
+    Cells that change without changing passability, e.g. a package being picked up, keep
+    the cache warm. Lookups never look at the route itself, so they stay O(1).
+
+    Failed searches are cached too, so repeating an impossible query raises without
+    searching again.
+    """
+
+    def __init__(self, grid: GridMap, max_entries: int = 1024):
+        """
+        Args:
+            grid (GridMap): Grid every query is answered on.
+            max_entries (int): Number of paths kept before the least recently used one is evicted.
+        """
+        if max_entries < 1:
+            raise ValueError("A path cache needs room for at least one entry.")
+        self.grid = grid
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.revision = grid.revision
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+        """
+        Same result as grid_a_star, answered from the cache when the query was seen before
+        on the current revision of the grid.
+
+        Args:
+            start (Tuple[int, int]): Starting coordinates.
+            end (Tuple[int, int]): Ending coordinates.
+            movement (MovementModel): Allowed moves, step costs and heuristic.
+            stats (Dict, optional): Filled with the number of node expansions (0 on a hit).
+
+        Returns:
+            List[Tuple[int, int]]: Path from start (exclusive) to end (inclusive).
+        """
+        if self.grid.revision != self.revision:
+            self.invalidate()
+        key = (self.revision, movement.name, tuple(start), tuple(end))
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            if stats is not None:
+                stats['expansions'] = 0
+            path = self.entries[key]
+            if path is _NO_PATH:
+                raise ValueError("No path found from start to end.")
+            return list(path)
+
+        self.misses += 1
+        try:
+            path = grid_a_star(self.grid, start, end, movement, stats)
+        except ValueError:
+            self._store(key, _NO_PATH)
+            raise
+        self._store(key, tuple(path))
+        return path
+
+    def _store(self, key: Tuple, path: Optional[Tuple]) -> None:
+        self.entries[key] = path
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """
+        Drop every cached path and adopt the grid's current revision.
+        """
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.revision = self.grid.revision
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Report a cell that was opened or blocked on the route. The cached paths are dropped
+        only if its passability actually changed.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        self.grid.set_passable(cell, passable)
+
+    def cache_info(self) -> Dict:
+        """
+        Returns:
+            Dict: hits, misses, evictions, invalidations, entries and max_entries.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations, 'entries': len(self.entries), 'max_entries': self.max_entries}
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Tuple
+from batchsearch import BatchSearch
+from bidirectional import grid_bidirectional_a_star
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED, grid_a_star
+from jumppoint import expand_path, grid_jump_point_search
+from pathcache import PathCache
+from terrain import TerrainCosts, terrain_a_star
+
+# Route-level searches shared by the demo scripts. This module and everything it imports
+# are free of GUI dependencies, so workers and command-line tools can use it cheaply.
+
+def a_star(route: List[List[str]], start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, cache: Optional[PathCache] = None,
+           terrain: Optional[TerrainCosts] = None, load: int = 0) -> List[Tuple[int, int]]:
+    """
+    Implement A* algorithm to find the shortest path between start and end.
+
+    The route is compiled into a GridMap on every call. Callers searching the same
+    map repeatedly should compile it once and use grid_a_star directly, or pass a
+    PathCache to answer repeated queries without searching.
+
+    Args:
+        route (List[List[str]]): 2D map of the route.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        cache (PathCache, optional): Cache built on this route's grid. Edits that open or block
+            cells must be reported to it with PathCache.set_passable; the route is not compared.
+        terrain (TerrainCosts, optional): Weighted terrain; the fastest path for the load is returned
+            instead of the shortest one. The cache only holds plain searches and is not used then.
+        load (int): Weight carried, for terrain costs.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    if terrain is not None:
+        return terrain_a_star(GridMap.from_route(route), start, end, terrain, movement, load)
+    if cache is not None:
+        return cache.find_path(start, end, movement)
+    return grid_a_star(GridMap.from_route(route), start, end, movement)
+
+def jump_point_search(route: List[List[str]], start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED) -> List[Tuple[int, int]]:
+    """
+    Drop-in alternative to a_star for uniform 8-connected grids, using Jump Point Search.
+
+    The path has the same cost as the one a_star finds and lists every cell, so it can
+    be animated the same way.
+
+    Args:
+        route (List[List[str]]): 2D map of the route.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): An 8-connected model with corner cutting.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    return expand_path(start, grid_jump_point_search(GridMap.from_route(route), start, end, movement))
+
+def bidirectional_a_star(route: List[List[str]], start: Tuple[int, int], end: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    Drop-in alternative to a_star that searches from both ends and stops where they meet.
+    Often cheaper on long legs across large maps; compare the expansions in stats with
+    grid_a_star's to pick one per query.
+
+    Args:
+        route (List[List[str]]): 2D map of the route.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        stats (Dict, optional): Filled with the number of node expansions.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    return grid_bidirectional_a_star(GridMap.from_route(route), start, end, movement, stats)
+
+def nearest_path(route: List[List[str]], start: Tuple[int, int], goals: List[Tuple[int, int]], movement: Optional[MovementModel] = None,
+                 search: Optional[BatchSearch] = None) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+    """
+    Path to the nearest of several goals, e.g. the closest package that still fits on
+    the truck, with one search instead of one a_star call per goal.
+
+    Args:
+        route (List[List[str]]): 2D map of the route.
+        start (Tuple[int, int]): Starting coordinates.
+        goals (List[Tuple[int, int]]): Candidate goal coordinates.
+        movement (MovementModel, optional): Allowed moves and step costs. Defaults to the search's
+            model, or to 8-connected moves without a search.
+        search (BatchSearch, optional): Search built on this route's grid, whose buffers are reused
+            across calls. The route is compiled into a new grid if omitted.
+
+    Returns:
+        Tuple[Tuple[int, int], List[Tuple[int, int]]]: The nearest goal and the path to it.
+    """
+    if search is None:
+        search = BatchSearch(GridMap.from_route(route), movement or EIGHT_CONNECTED)
+    elif movement is not None and movement is not search.movement:
+        raise ValueError(f"The search uses {search.movement.name} moves, not {movement.name}.")
+    settled = search.one_to_many(start, goals, limit=1)
+    if not settled:
+        raise ValueError("No path found from start to any goal.")
+    goal = next(iter(settled))
+    return goal, search.path(goal)
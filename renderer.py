@@ -0,0 +1,125 @@
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import PolyCollection
+from typing import List, Optional, Tuple, Union
+from routecodes import OBSTACLE, OPEN, START, END, PACKAGE, RouteCodes, encode_route
+
+# Color value of the path overlay; the map cells use the codes of routecodes (X=-1, S=2, E=3, packages=4, 0 elsewhere)
+PATH = 1
+
+def cell_square(cell: Tuple[int, int]) -> List[Tuple[float, float]]:
+    """
+    Corners of a map cell in image coordinates, for drawing the path overlay.
+    """
+    r, c = cell
+    return [(c - 0.5, r - 0.5), (c + 0.5, r - 0.5), (c + 0.5, r + 0.5), (c - 0.5, r + 0.5)]
+
+class DeliveryRenderer:
+    """
+    Persistent Matplotlib view of a delivery run that redraws only what changes.
+
+    The map image, axes and ticks are drawn once and cached as the blitting background.
+    Every frame restores that background and draws just the animated artists: the path
+    overlay (one square per visited cell) and the title. Frame cost grows with the path
+    length, not with the map area. A full redraw only happens when a map cell changes,
+    e.g. when a package is picked up, or when the window is resized.
+    """
+
+    def __init__(self, route: Union[List[List[str]], RouteCodes], ax=None, trail: bool = True, interval: float = 0.1):
+        """
+        Args:
+            route (Union[List[List[str]], RouteCodes]): 2D map of the route, or its encoding. Pass the
+                RouteCodes the run was planned with to share it; set_cell edits it in place.
+            ax: Matplotlib axis object for plotting. A new 8x8 figure is created if omitted.
+            trail (bool): Keep every visited cell of the current path, or only the latest one.
+            interval (float): Seconds to wait after each frame.
+        """
+        if ax is None:
+            _, ax = plt.subplots(figsize=(8, 8))
+        self.ax = ax
+        self.fig = ax.figure
+        self.canvas = self.fig.canvas
+        self.trail = trail
+        self.interval = interval
+        self.sleep_time = 0.0  # seconds spent waiting between frames, for profiling
+
+        self.route_codes = encode_route(route)
+        self.grid = self.route_codes.codes
+        rows, cols = self.grid.shape
+        self.image = ax.imshow(self.grid, cmap="coolwarm", origin="upper", vmin=OBSTACLE, vmax=PACKAGE)
+        ax.set_xticks(range(cols))
+        ax.set_yticks(range(rows))
+
+        path_color = self.image.cmap(self.image.norm(PATH))
+        self.overlay = PolyCollection([], facecolors=[path_color], edgecolors='none', animated=True)
+        ax.add_collection(self.overlay, autolim=False)
+        ax.title.set_animated(True)
+        self.cells = []
+
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.draw()
+
+    def _on_draw(self, event) -> None:
+        # Any full redraw (first show, resize, map edit) refreshes the cached background
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self) -> None:
+        self.ax.draw_artist(self.overlay)
+        self.fig.draw_artist(self.ax.title)
+
+    def _blit(self) -> None:
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+        if self.interval:
+            time.sleep(self.interval)
+            self.sleep_time += self.interval
+
+    def set_cell(self, cell: Tuple[int, int], value: str) -> None:
+        """
+        Change one map cell, e.g. '.' once a package is picked up. The route and its
+        encoding are updated too.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            value (str): New map symbol.
+        """
+        self.route_codes.set_cell(cell, value)
+        self.image.set_data(self.grid)
+        self.canvas.draw()
+
+    def clear_path(self) -> None:
+        """
+        Remove the path overlay, e.g. at the start of a new leg.
+        """
+        self.cells = []
+        self.overlay.set_verts([])
+
+    def step(self, cell: Tuple[int, int], title: Optional[str] = None) -> None:
+        """
+        Show the truck on a cell and draw one frame.
+
+        Args:
+            cell (Tuple[int, int]): Cell the truck moved to.
+            title (str, optional): New title for the frame.
+        """
+        square = cell_square(cell)
+        if self.trail:
+            self.cells.append(square)
+        else:
+            self.cells = [square]
+        self.overlay.set_verts(self.cells)
+        if title is not None:
+            self.ax.title.set_text(title)
+        self._blit()
+
+    def set_title(self, title: str) -> None:
+        """
+        Change the title without moving the truck.
+        """
+        self.ax.title.set_text(title)
+        self._blit()
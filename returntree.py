@@ -0,0 +1,125 @@
+import heapq
+import numpy as np
+from typing import List, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED
+
+class ReturnTree:
+    """
+    Shortest-path tree of the whole grid rooted at one goal, usually the warehouse E.
+
+    Moves are symmetric, so one Dijkstra from the goal gives the cost of every cell's
+    way back to it. The tree is stored as one float per cell (cost to the goal, inf where
+    unreachable) and one int8 move code per cell (-1 at the goal and at unreached cells),
+    so any return path is read back in O(path length) without searching.
+
+    Opening a cell can only shorten paths: set_passable repairs the tree with a Dijkstra
+    seeded at the cells around the opened one, which touches only the cells that got
+    closer. Blocking a cell, or editing the grid behind the tree's back, rebuilds it.
+    """
+
+    def __init__(self, grid: GridMap, goal: Tuple[int, int], movement: MovementModel = EIGHT_CONNECTED):
+        """
+        Args:
+            grid (GridMap): Compiled grid. It is edited in place by set_passable.
+            goal (Tuple[int, int]): Root of the tree.
+            movement (MovementModel): Allowed moves and step costs.
+        """
+        self.grid = grid
+        self.goal = tuple(goal)
+        self.root = grid.node_id(self.goal)
+        self.movement = movement
+        self.moves = movement.compile(grid.width)
+        self._build()
+
+    def _build(self) -> None:
+        self.dist = np.full(self.grid.size, np.inf)
+        self.codes = np.full(self.grid.size, -1, dtype=np.int8)
+        self.revision = self.grid.revision
+        if self.grid.passable[self.root]:
+            self.dist[self.root] = 0
+            self._relax([(0, self.root)])
+
+    def _relax(self, open_set: List[Tuple[float, int]]) -> None:
+        """
+        Dijkstra from the queued cells, keeping every strict improvement.
+        """
+        heapq.heapify(open_set)
+        dist, codes = memoryview(self.dist), memoryview(self.codes)
+        passable = memoryview(self.grid.passable)
+        moves = list(enumerate(self.moves))
+        while open_set:
+            d, current = heapq.heappop(open_set)
+            if d > dist[current]:
+                continue
+            for code, (offset, cost, side_a, side_b) in moves:
+                neighbor = current + offset
+                if not passable[neighbor]:
+                    continue
+                if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                    continue
+                tentative = d + cost
+                if tentative < dist[neighbor]:
+                    dist[neighbor] = tentative
+                    codes[neighbor] = code
+                    heapq.heappush(open_set, (tentative, neighbor))
+
+    def _refresh(self) -> None:
+        if self.grid.revision != self.revision:
+            self._build()
+
+    def set_passable(self, cell: Tuple[int, int], passable: bool = True) -> None:
+        """
+        Open or block a cell and update the tree.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            passable (bool): New state of the cell.
+        """
+        self._refresh()
+        node = self.grid.node_id(cell)
+        if bool(self.grid.passable[node]) == passable:
+            return
+        self.grid.set_passable(cell, passable)
+        if not passable:
+            self._build()
+            return
+
+        self.revision = self.grid.revision
+        if node == self.root:
+            self.dist[node] = 0
+            self._relax([(0, node)])
+            return
+        # Every new move starts or ends next to the opened cell (it may also be the side
+        # cell of a diagonal that was not allowed before), so the reached neighbors are
+        # the only places the improvement can start from
+        self._relax([(self.dist[node + offset], node + offset) for offset, _, _, _ in self.moves
+                     if self.dist[node + offset] < np.inf])
+
+    def distance(self, cell: Tuple[int, int]) -> float:
+        """
+        Cost of the shortest path from cell to the goal (inf if unreachable).
+        """
+        self._refresh()
+        return float(self.dist[self.grid.node_id(cell)])
+
+    def path_from(self, cell: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Shortest path from cell to the goal, read off the tree.
+
+        Args:
+            cell (Tuple[int, int]): Starting coordinates.
+
+        Returns:
+            List[Tuple[int, int]]: Path from cell (exclusive) to the goal (inclusive), like a_star.
+        """
+        self._refresh()
+        node = self.grid.node_id(cell)
+        if self.dist[node] == np.inf:
+            raise ValueError("No path found from start to end.")
+        codes, moves = self.codes, self.moves
+        path = []
+        while node != self.root:
+            # The tree was grown from the goal, so each parent is one step closer to it
+            node -= moves[codes[node]][0]
+            path.append(self.grid.cell_of(node))
+        return path
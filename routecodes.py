@@ -0,0 +1,96 @@
+import numpy as np
+from typing import List, Optional, Tuple, Union
+from gridengine import GridMap
+
+# Cell codes of the encoded raster, also the color values used by the renderer
+OBSTACLE, OPEN, START, END, PACKAGE = -1, 0, 2, 3, 4
+
+class RouteCodes:
+    """
+    A 2D string map encoded once into an int8 code raster plus its points of interest.
+
+    Build one per map and pass it to the parser, the planners and the renderer in place
+    of the route, so the per-cell strings are only looked at once per route. Edits made
+    through set_cell keep the route, the raster and the package index in step.
+    """
+
+    def __init__(self, route: List[List[str]]):
+        """
+        Args:
+            route (List[List[str]]): 2D map of the route. Like the original a_star, the width
+                is taken from the first row.
+        """
+        self.route = route
+        cols = len(route[0])
+        # Two characters per cell are enough to tell the symbols apart: the first one decides
+        # the symbol, the second one tells single-character symbols from package ids
+        cells = np.array([row[:cols] for row in route], dtype='U2')
+        self.rows, self.cols = cells.shape
+
+        # Compare code points instead of strings
+        chars = cells.view(np.uint32).reshape(self.rows, self.cols, 2)
+        first = chars[:, :, 0]
+        single = chars[:, :, 1] == 0
+        self.codes = np.full(cells.shape, OPEN, dtype=np.int8)
+        self.codes[first == ord('P')] = PACKAGE
+        self.codes[single & (first == ord('X'))] = OBSTACLE
+        self.codes[single & (first == ord('S'))] = START
+        self.codes[single & (first == ord('E'))] = END
+
+        self.start = self._last(START)
+        self.end = self._last(END)
+        package_rows, package_cols = np.nonzero(self.codes == PACKAGE)
+        self.package_locations = {route[r][c]: (r, c) for r, c in zip(package_rows.tolist(), package_cols.tolist())}
+
+    def _last(self, code: int) -> Optional[Tuple[int, int]]:
+        # A map with several S (or E) cells keeps the last one, like the old parsing loop
+        found = np.flatnonzero(self.codes == code)
+        return divmod(int(found[-1]), self.cols) if found.size else None
+
+    def set_cell(self, cell: Tuple[int, int], value: str) -> None:
+        """
+        Change one map cell, e.g. '.' once a package is picked up, in the route and its encoding.
+
+        Args:
+            cell (Tuple[int, int]): Cell coordinates.
+            value (str): New map symbol.
+        """
+        r, c = cell
+        old = self.route[r][c]
+        if self.codes[r, c] == PACKAGE and self.package_locations.get(old) == (r, c):
+            del self.package_locations[old]
+        self.route[r][c] = value
+
+        code = {'X': OBSTACLE, 'S': START, 'E': END}.get(value, PACKAGE if value.startswith('P') else OPEN)
+        self.codes[r, c] = code
+        if code == PACKAGE:
+            self.package_locations[value] = (r, c)
+        elif code == START:
+            self.start = (r, c)
+        elif code == END:
+            self.end = (r, c)
+        if old == 'S' and code != START:
+            self.start = self._last(START)
+        if old == 'E' and code != END:
+            self.end = self._last(END)
+
+    def to_grid(self) -> GridMap:
+        """
+        Compile the raster into a GridMap for path planning. Every cell except 'X' is passable.
+        """
+        return GridMap(self.codes != OBSTACLE)
+
+def encode_route(route: Union[List[List[str]], RouteCodes]) -> RouteCodes:
+    """
+    Encode a 2D string map. An encoding passed in is returned as it is, so functions can
+    take either and callers that already hold one don't pay for a second pass.
+
+    Args:
+        route (Union[List[List[str]], RouteCodes]): 2D map of the route, or its encoding.
+
+    Returns:
+        RouteCodes: Code raster, start, end and package locations.
+    """
+    if isinstance(route, RouteCodes):
+        return route
+    return RouteCodes(route)
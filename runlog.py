@@ -0,0 +1,267 @@
+import argparse
+import bisect
+import gzip
+import json
+from typing import Dict, List, Optional, Tuple, Union
+from mapformat import MapFile, load_map
+from routecodes import OBSTACLE, OPEN, START, END, PACKAGE, RouteCodes, encode_route
+
+VERSION = 1
+
+# Unit moves and their names in the run-length-encoded paths
+DIRECTIONS = {(-1, 0): 'N', (1, 0): 'S', (0, 1): 'E', (0, -1): 'W',
+              (-1, 1): 'NE', (-1, -1): 'NW', (1, 1): 'SE', (1, -1): 'SW'}
+STEPS = {name: step for step, name in DIRECTIONS.items()}
+
+def frame_title(contents: List[str], load: int, running_time: float) -> str:
+    """
+    Title of a frame, in the same format as the animated demo.
+    """
+    if contents:
+        return f"Currently handling: {', '.join(contents)}\nTotal weight: {load}kg\nRunning time: {running_time:.1f}s"
+    return f"Running time: {running_time:.1f}s"
+
+def encode_moves(origin: Tuple[int, int], path: List[Tuple[int, int]]) -> str:
+    """
+    Run-length encode a path as moves from its origin, e.g. 'E3 NE2 S'.
+
+    Args:
+        origin (Tuple[int, int]): Cell the path starts from (not part of the path).
+        path (List[Tuple[int, int]]): Cells visited, one unit move apart.
+
+    Returns:
+        str: Space-separated direction names, each followed by its repeat count when above 1.
+    """
+    runs = []
+    previous = origin
+    for cell in path:
+        name = DIRECTIONS.get((cell[0] - previous[0], cell[1] - previous[1]))
+        if name is None:
+            raise ValueError(f"Step from {previous} to {cell} is not a unit move.")
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+        previous = cell
+    return ' '.join(name if count == 1 else f"{name}{count}" for name, count in runs)
+
+def decode_moves(origin: Tuple[int, int], moves: str) -> List[Tuple[int, int]]:
+    """
+    Expand the output of encode_moves back into the path.
+    """
+    path = []
+    r, c = origin
+    for run in moves.split():
+        name = run.rstrip('0123456789')
+        dr, dc = STEPS[name]
+        for _ in range(int(run[len(name):] or 1)):
+            r, c = r + dr, c + dc
+            path.append((r, c))
+    return path
+
+class RunLogWriter:
+    """
+    Buffered NDJSON writer for run logs, gzip-compressed when the path ends in '.gz'.
+
+    Records are serialized one per line and go through a large write buffer, so logging
+    a leg costs one json.dumps instead of a print of its whole path or map.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        """
+        Args:
+            path (str): Log file to write.
+            buffer_size (int): Bytes buffered before each write to disk.
+        """
+        self.path = path
+        if path.endswith('.gz'):
+            self.file = gzip.open(path, 'wt', compresslevel=6, encoding='utf-8')
+        else:
+            self.file = open(path, 'w', encoding='utf-8', buffering=buffer_size)
+        self.records = 0
+
+    def write(self, record: Dict) -> None:
+        """
+        Append one record.
+        """
+        self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.records += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "RunLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def write_run_log(path: str, run: Dict, route: Union[List[List[str]], RouteCodes, MapFile], start: Optional[Tuple[int, int]] = None) -> int:
+    """
+    Write the event log of simulate_delivery (or replay_trips) as a run log.
+
+    The first record is a 'run' header holding the map (its rows, or the path of a map
+    file) and the run totals. Every event follows as one record; legs store their origin
+    cell and run-length-encoded moves instead of the full path.
+
+    Args:
+        path (str): Log file to write ('.gz' for a compressed log).
+        run (Dict): Result of simulate_delivery or replay_trips.
+        route (Union[List[List[str]], RouteCodes, MapFile]): Map the run was simulated on, before any pickup.
+        start (Tuple[int, int], optional): Cell the first leg starts from. Defaults to the map's S.
+
+    Returns:
+        int: Number of records written.
+    """
+    header = {'type': 'run', 'version': VERSION, 'distance': run['distance'], 'clock': run['clock'],
+              'total_running_time': run['total_running_time'], 'trips': run.get('trips')}
+    if isinstance(route, MapFile):
+        header['map'] = route.path
+        origin = route.start
+    else:
+        codes = encode_route(route)
+        header['route'] = [' '.join(row) for row in codes.route]
+        origin = codes.start
+    origin = tuple(start or origin)
+
+    with RunLogWriter(path) as writer:
+        writer.write(header)
+        for event in run['events']:
+            if event['type'] == 'leg':
+                record = {key: value for key, value in event.items() if key not in ('path', 'location')}
+                record['from'] = origin
+                record['moves'] = encode_moves(origin, event['path'])
+                origin = tuple(event['location'])
+                writer.write(record)
+            else:
+                writer.write(event)
+        return writer.records
+
+class RunLog:
+    """
+    A run log read back for replay, without planning or searching anything again.
+
+    Events are decoded into the same dicts simulate_delivery returns (legs get their
+    path and location back), so the log can be fed to export_run or trip_summaries. Any
+    frame, i.e. the map and truck after a given number of blocks driven, is rebuilt
+    from the base map and the pickups that happened before it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Log file written by write_run_log.
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if not records or records[0].get('type') != 'run':
+            raise ValueError(f"{path} is not a run log.")
+        self.header = records[0]
+        if self.header['version'] > VERSION:
+            raise ValueError(f"Run log version {self.header['version']} is newer than this reader.")
+
+        if 'route' in self.header:
+            self.route = [row.split(' ') for row in self.header['route']]
+            self.codes = encode_route(self.route).codes.copy()
+        else:
+            self.route = None
+            self.codes = load_map(self.header['map']).to_codes()
+
+        self.events = []
+        self.leg_starts = []  # global step index of the first block of each leg
+        self.leg_events = []  # index of each leg in events
+        steps = 0
+        for record in records[1:]:
+            if record['type'] == 'leg':
+                origin = tuple(record.pop('from'))
+                path = decode_moves(origin, record.pop('moves'))
+                record['path'] = path
+                record['location'] = path[-1] if path else origin
+                self.leg_starts.append(steps)
+                self.leg_events.append(len(self.events))
+                steps += len(path)
+            elif 'location' in record:
+                record['location'] = tuple(record['location'])
+            self.events.append(record)
+        self.steps = steps
+
+    def frame(self, step: int) -> Dict:
+        """
+        State of the run after the truck has driven step + 1 blocks.
+
+        Args:
+            step (int): Index of the block, from 0 to steps - 1.
+
+        Returns:
+            Dict: codes (int8 map raster with the packages picked up so far cleared), truck
+            (cell), title (as shown by the demo) and running_time.
+        """
+        if not 0 <= step < self.steps:
+            raise IndexError(f"Step {step} is outside the run (0 to {self.steps - 1}).")
+        # Empty legs share their start with the next leg, and bisect_right skips past them
+        leg = bisect.bisect_right(self.leg_starts, step) - 1
+        event = self.events[self.leg_events[leg]]
+        k = step - self.leg_starts[leg]
+
+        codes = self.codes.copy()
+        for earlier in self.events[:self.leg_events[leg]]:
+            if earlier['type'] == 'pickup':
+                codes[earlier['location']] = OPEN
+        running_time = event['running_time'] + (k + 1) * event['step_time']
+        return {'codes': codes, 'truck': event['path'][k], 'running_time': running_time,
+                'title': frame_title(event['contents'], event['load'], running_time)}
+
+    def frame_text(self, step: int) -> str:
+        """
+        A frame as a text map: '*' marks the truck, picked-up packages are shown as '.'.
+        """
+        frame = self.frame(step)
+        symbols = {OBSTACLE: 'X', OPEN: '.', START: 'S', END: 'E', PACKAGE: 'P'}
+        rows = []
+        for r, row in enumerate(frame['codes'].tolist()):
+            cells = []
+            for c, code in enumerate(row):
+                if (r, c) == frame['truck']:
+                    cells.append('*')
+                elif code == PACKAGE and self.route is not None:
+                    cells.append(self.route[r][c])
+                else:
+                    cells.append(symbols[code])
+            rows.append(' '.join(cells))
+        return frame['title'] + '\n' + '\n'.join(rows)
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Dict: Run totals from the header plus steps, events and per-trip statistics.
+        """
+        from simulation import trip_summaries
+
+        totals = {key: self.header[key] for key in ('distance', 'clock', 'total_running_time')}
+        return dict(totals, steps=self.steps, events=len(self.events), trips=trip_summaries(self.events))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write or replay a delivery run log.")
+    parser.add_argument('log', help="NDJSON run log (.gz for a compressed one)")
+    parser.add_argument('--record', metavar='SCENARIO', help="simulate a JSON scenario (see batchrun.py) and write its log first")
+    parser.add_argument('--frame', type=int, default=None, help="print the map after this many blocks (from 0) instead of the summary")
+    parser.add_argument('--time-budget', type=float, default=1.0, help="route optimization seconds when recording")
+    args = parser.parse_args()
+
+    if args.record:
+        from gridengine import MOVEMENT_MODELS
+        from simulation import simulate_delivery
+
+        with open(args.record, encoding='utf-8') as f:
+            scenario = json.load(f)
+        route = load_map(scenario['map']) if 'map' in scenario else scenario['route']
+        movement = MOVEMENT_MODELS[scenario.get('movement', '8-connected')]
+        run = simulate_delivery(scenario['packages'], route, scenario['truck_capacity'], movement, time_budget=args.time_budget)
+        print(f"Wrote {write_run_log(args.log, run, route)} records to {args.log}")
+
+    log = RunLog(args.log)
+    if args.frame is not None:
+        print(log.frame_text(args.frame))
+    else:
+        print(json.dumps(log.summary(), indent=2))
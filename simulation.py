@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Tuple, Union
+from gridengine import MovementModel, EIGHT_CONNECTED
+from connectivity import ComponentIndex
+from distancematrix import DistanceMatrix
+from cvrp import STEP_TIME, RouteOptimizer
+from mapformat import MapFile
+from instrumentation import Metrics, timed
+from parsing import parse_packages, parse_route_and_packages
+from routecodes import RouteCodes, encode_route
+from terrain import TerrainCosts, terrain_a_star
+
+def simulate_delivery(packages: List[Dict], route: Union[List[List[str]], RouteCodes, MapFile], truck_capacity: int, movement: MovementModel = EIGHT_CONNECTED, optimize: bool = True, time_budget: Optional[float] = 1.0,
+                      metrics: Optional[Metrics] = None, terrain: Optional[TerrainCosts] = None, max_moves: Optional[int] = None) -> Dict:
+    """
+    Headless delivery simulation driven by a virtual clock.
+
+    Nothing sleeps and nothing is drawn: every delay execute_delivery waits for is added
+    to the clock analytically. The run is returned as an event log that a renderer can
+    replay (see execute_delivery in the demo scripts). The route is not modified.
+
+    Events are dicts with a 'type' and the virtual 'time' they start at:
+        leg:     origin, target, location, path, load, contents, step_time, running_time, duration
+        pickup:  package, location, weight, description, duration
+        deliver: packages, load, duration
+        done:    running_time
+
+    running_time follows the on-screen counter of the animated demo, which only counts
+    moving time. The clock also includes pickup and unloading time.
+
+    Packages walled off from E (and a walled-off S) are found by a connectivity check
+    before any search runs, and reported together in one ValueError.
+
+    Args:
+        packages (List[Dict]): List of package details.
+        route (Union[List[List[str]], RouteCodes, MapFile]): 2D map representation of the route,
+            its encoding, or a loaded map file.
+        truck_capacity (int): Maximum load of the truck.
+        movement (MovementModel): Allowed moves, step costs and heuristic used for every leg.
+        optimize (bool): Use the route optimizer; otherwise follow the greedy pickup loop.
+        time_budget (float, optional): Seconds allowed for route optimization, unlimited if None.
+        metrics (Metrics, optional): Receives the time of each planning phase and one record per trip.
+        terrain (TerrainCosts, optional): Weighted, possibly time-dependent costs. Trips are still
+            planned on plain leg costs, but every leg is driven on the fastest path for its load
+            and departure time (see replay_trips).
+        max_moves (int, optional): Candidate plans route optimization may evaluate. With time_budget
+            None the plan is the same on every machine.
+
+    Returns:
+        Dict: events, legs, trips, distance, total_running_time, clock, plan, baseline and
+        search_stats (number of searches and node expansions spent on the legs).
+    """
+    with timed(metrics, 'planning', phase='parse'):
+        if not isinstance(route, MapFile):
+            route = encode_route(route)
+        start, end, package_locations = parse_route_and_packages(route, packages)
+        grid = route.to_grid()
+        sorted_packages = parse_packages(packages)
+    with timed(metrics, 'planning', phase='connectivity'):
+        components = ComponentIndex(grid, movement)
+        unreachable = components.unreachable(end, dict(package_locations, S=start))
+    if unreachable:
+        raise ValueError(f"No path found to {', '.join(unreachable)}.")
+    with timed(metrics, 'planning', phase='distance_matrix'):
+        legs = DistanceMatrix.from_parsed(grid, start, end, package_locations, movement, components)
+
+    with timed(metrics, 'planning', phase='optimize'):
+        optimizer = RouteOptimizer(sorted_packages, legs, truck_capacity)
+        baseline = optimizer.baseline
+        plan = optimizer.solve(time_budget, max_moves)['plan'] if optimize else baseline
+    with timed(metrics, 'planning', phase='replay'):
+        run = replay_trips(plan['trips'], legs, sorted_packages, package_locations, terrain=terrain)
+    run.update({'trips': plan['trips'], 'plan': plan, 'baseline': baseline, 'search_stats': dict(legs.search_stats)})
+
+    if metrics is not None:
+        for trip in trip_summaries(run['events']):
+            metrics.record('trip', **trip)
+            metrics.count('trips')
+            metrics.count('blocks_driven', trip['blocks'])
+            metrics.count('packages_delivered', len(trip['packages']))
+        metrics.count('simulated_seconds', run['clock'])
+    return run
+
+def trip_summaries(events: List[Dict]) -> List[Dict]:
+    """
+    Per-trip statistics of an event log from simulate_delivery or replay_trips.
+
+    Args:
+        events (List[Dict]): Event log.
+
+    Returns:
+        List[Dict]: Per trip: trip (index), packages, load, blocks, started, duration,
+        driving and handling (pickup plus unloading) time.
+    """
+    trips = []
+    current = None
+    for event in events:
+        if current is None and event['type'] in ('leg', 'pickup'):
+            current = {'trip': len(trips), 'started': event['time'], 'blocks': 0, 'driving': 0, 'handling': 0}
+        if event['type'] == 'leg':
+            current['blocks'] += len(event['path'])
+            current['driving'] += event['duration']
+        elif event['type'] == 'pickup':
+            current['handling'] += event['duration']
+        elif event['type'] == 'deliver':
+            current['handling'] += event['duration']
+            current.update({'packages': event['packages'], 'load': event['load'],
+                            'duration': event['time'] + event['duration'] - current['started']})
+            trips.append(current)
+            current = None
+    return trips
+
+def replay_trips(trips: List[List[str]], legs: DistanceMatrix, packages: List[Dict], package_locations: Dict[str, Tuple[int, int]], start: str = 'S',
+                 terrain: Optional[TerrainCosts] = None) -> Dict:
+    """
+    Turn planned trips into the event log of simulate_delivery on a virtual clock.
+
+    Without terrain every leg is the precomputed path from legs and each block takes
+    (load + 1) * STEP_TIME. With terrain, each leg is searched again with terrain_a_star
+    for the current load and clock, and a leg's step_time is its average time per block.
+    Those searches are added to legs.search_stats.
+
+    Args:
+        trips (List[List[str]]): Package ids picked up on each trip, in pickup order.
+        legs (DistanceMatrix): Leg costs and paths between the points of interest.
+        packages (List[Dict]): Details of every package in the trips.
+        package_locations (Dict[str, Tuple[int, int]]): Coordinates of every package.
+        start (str): Label of the point in legs where the first trip starts.
+        terrain (TerrainCosts, optional): Cost rasters the legs are driven on.
+
+    Returns:
+        Dict: events, legs, distance, total_running_time and clock.
+    """
+    packages_by_id = {package['id']: package for package in packages}
+    events = []
+    leg_events = []
+    clock = 0
+    running_time = 0
+    distance = 0
+    current_point = start
+
+    def add_leg(target: str, load: int, contents: List[str]) -> None:
+        nonlocal clock, running_time, distance
+        if terrain is None:
+            path = legs.path(current_point, target)
+            step_time = (load + 1) * STEP_TIME
+            duration = len(path) * step_time
+            leg_distance = legs.distance(current_point, target)
+        else:
+            stats = {}
+            origin = legs.cells[legs.index[current_point]]
+            path = terrain_a_star(legs.grid, origin, legs.cells[legs.index[target]], terrain, legs.movement, load, clock, stats)
+            duration = stats['time']
+            legs.search_stats['searches'] += 1
+            legs.search_stats['expansions'] += stats['expansions']
+            step_time = duration / len(path) if path else 0
+            leg_distance = 0
+            previous = origin
+            for cell in path:
+                leg_distance += legs.movement.step_cost(cell[0] - previous[0], cell[1] - previous[1])
+                previous = cell
+        event = {'type': 'leg', 'time': clock, 'origin': current_point, 'target': target,
+                 'location': legs.cells[legs.index[target]], 'path': path,
+                 'load': load, 'contents': list(contents), 'step_time': step_time,
+                 'running_time': running_time, 'duration': duration}
+        events.append(event)
+        leg_events.append(event)
+        clock += event['duration']
+        running_time += event['duration']
+        distance += leg_distance
+
+    for trip in trips:
+        load = 0
+        contents = []
+        for package_id in trip:
+            package = packages_by_id[package_id]
+            add_leg(package_id, load, contents)
+
+            duration = package['weight'] * STEP_TIME
+            # Orders may leave out the description, e.g. dispatcher orders; fall back to the id
+            description = package.get('description', package_id)
+            events.append({'type': 'pickup', 'time': clock, 'package': package_id, 'location': package_locations[package_id],
+                           'weight': package['weight'], 'description': description, 'duration': duration})
+            clock += duration
+            load += package['weight']
+            contents.append(description)
+            current_point = package_id
+
+        add_leg('E', load, contents)
+        duration = (load + 1) * STEP_TIME
+        events.append({'type': 'deliver', 'time': clock, 'packages': list(trip), 'load': load, 'duration': duration})
+        clock += duration
+        current_point = 'E'
+
+    events.append({'type': 'done', 'time': clock, 'running_time': running_time})
+
+    return {'events': events, 'legs': leg_events, 'distance': distance, 'total_running_time': running_time, 'clock': clock}
@@ -0,0 +1,183 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from gridengine import GridMap, MovementModel, EIGHT_CONNECTED, reconstruct_path
+from cvrp import STEP_TIME
+
+class TerrainCosts:
+    """
+    Cost rasters for weighted terrain, optionally sliced by time of day.
+
+    Entering a cell with a given load takes
+
+        step cost * (base + load * per_load) * STEP_TIME seconds
+
+    where base and per_load are the cell's values in the time slice the cell is entered
+    in. With both rasters at 1 this is today's (load + 1) * STEP_TIME per block. base
+    models what slows every truck down (congestion zones, slow roads), per_load what
+    slows loaded trucks down more (hills, rough roads), so heavy trucks pick shorter or
+    faster roads than empty ones.
+
+    Rasters have shape (rows, cols), or (slices, rows, cols) for time-dependent costs,
+    in which case slice k covers [k * slice_duration, (k + 1) * slice_duration) seconds
+    and the slices repeat after the last one.
+    """
+
+    def __init__(self, base: np.ndarray, per_load: Optional[np.ndarray] = None, slice_duration: Optional[float] = None):
+        """
+        Args:
+            base (np.ndarray): Load-independent cost multipliers, greater than 0.
+            per_load (np.ndarray, optional): Multipliers per unit of load, at least 0. Defaults to base.
+            slice_duration (float, optional): Seconds per time slice. Required when there is more than one slice.
+        """
+        base = np.array(base, dtype=float)
+        if base.ndim == 2:
+            base = base[np.newaxis]
+        per_load = base.copy() if per_load is None else np.array(per_load, dtype=float).reshape(base.shape)
+        if base.ndim != 3:
+            raise ValueError("Cost rasters must have shape (rows, cols) or (slices, rows, cols).")
+        if (base <= 0).any() or (per_load < 0).any():
+            raise ValueError("Base costs must be positive and per-load costs must not be negative.")
+        if base.shape[0] > 1 and not slice_duration:
+            raise ValueError("Time-sliced costs need a slice duration.")
+
+        self.base = base
+        self.per_load = per_load
+        self.slices, self.rows, self.cols = base.shape
+        self.slice_duration = slice_duration
+        self._factors = {}  # load -> padded flat seconds per unit of step cost, one row per slice
+
+    @classmethod
+    def uniform(cls, rows: int, cols: int, slices: int = 1, slice_duration: Optional[float] = None) -> "TerrainCosts":
+        """
+        Costs that reproduce the plain (load + 1) * STEP_TIME per block everywhere, to add zones to.
+        """
+        return cls(np.ones((slices, rows, cols)), slice_duration=slice_duration)
+
+    def add_zone(self, top_left: Tuple[int, int], bottom_right: Tuple[int, int], base: float = 1.0, per_load: float = 1.0,
+                 slices: Optional[List[int]] = None) -> None:
+        """
+        Multiply the costs of a rectangle of cells, e.g. a congestion zone during rush hour.
+
+        Args:
+            top_left (Tuple[int, int]): First cell of the zone.
+            bottom_right (Tuple[int, int]): Last cell of the zone (inclusive).
+            base (float): Factor applied to the base costs.
+            per_load (float): Factor applied to the per-load costs.
+            slices (List[int], optional): Time slices the zone applies to. Defaults to all of them.
+        """
+        if base <= 0 or per_load < 0:
+            raise ValueError("Base factors must be positive and per-load factors must not be negative.")
+        (r0, c0), (r1, c1) = top_left, bottom_right
+        selected = slice(None) if slices is None else list(slices)
+        self.base[selected, r0:r1 + 1, c0:c1 + 1] *= base
+        self.per_load[selected, r0:r1 + 1, c0:c1 + 1] *= per_load
+        self._factors.clear()
+
+    def slice_at(self, time: float) -> int:
+        """
+        Index of the time slice that covers a point in time.
+        """
+        return int(time // self.slice_duration) % self.slices if self.slices > 1 else 0
+
+    def factors(self, load: int) -> np.ndarray:
+        """
+        Seconds per unit of step cost for entering each cell with a given load.
+
+        Returns:
+            np.ndarray: Shape (slices, grid size), laid out like the node ids of a GridMap of this size.
+        """
+        factors = self._factors.get(load)
+        if factors is None:
+            seconds = (self.base + load * self.per_load) * STEP_TIME
+            factors = np.pad(seconds, ((0, 0), (1, 1), (1, 1)), constant_values=np.inf).reshape(self.slices, -1)
+            self._factors[load] = factors
+        return factors
+
+    def min_factor(self, load: int) -> float:
+        """
+        Cheapest seconds per unit of step cost anywhere at any time, which scales the heuristic.
+        """
+        return float((self.base + load * self.per_load).min() * STEP_TIME)
+
+def terrain_a_star(grid: GridMap, start: Tuple[int, int], end: Tuple[int, int], terrain: TerrainCosts,
+                   movement: MovementModel = EIGHT_CONNECTED, load: int = 0, depart: float = 0.0, stats: Optional[Dict] = None) -> List[Tuple[int, int]]:
+    """
+    A* for the fastest path over weighted, possibly time-dependent terrain.
+
+    Scores are travel times in seconds. The movement heuristic is scaled by the cheapest
+    cost in the rasters, so it stays admissible. With time slices, a cell costs what its
+    slice says at the moment it is entered (departure time plus the time driven so far).
+    Nodes are closed on their first expansion, so with time slices the path is the
+    fastest one as long as leaving later never gets the truck there earlier.
+
+    Args:
+        grid (GridMap): Compiled grid with the terrain's dimensions.
+        start (Tuple[int, int]): Starting coordinates.
+        end (Tuple[int, int]): Ending coordinates.
+        terrain (TerrainCosts): Cost rasters.
+        movement (MovementModel): Allowed moves, step costs and heuristic.
+        load (int): Weight carried, which sets the speed on every cell.
+        depart (float): Clock time the truck leaves start, for time-sliced costs.
+        stats (Dict, optional): Filled with the number of node expansions and the travel 'time'.
+
+    Returns:
+        List[Tuple[int, int]]: Path from start to end.
+    """
+    if (terrain.rows, terrain.cols) != (grid.rows, grid.cols):
+        raise ValueError("Terrain costs and grid have different dimensions.")
+
+    width = grid.width
+    source, target = grid.node_id(start), grid.node_id(end)
+    end_r, end_c = divmod(target, width)
+    estimate = movement.estimate
+    scale = terrain.min_factor(load)
+    expansions = 0
+    moves = movement.compile(width)
+    factors = [memoryview(row) for row in terrain.factors(load)]
+    sliced = terrain.slices > 1
+
+    g_buffer = np.full(grid.size, np.inf)
+    parent_buffer = np.full(grid.size, -1, dtype=np.int64)
+    closed_buffer = np.zeros(grid.size, dtype=np.uint8)
+    g_score, parent, closed = memoryview(g_buffer), memoryview(parent_buffer), memoryview(closed_buffer)
+    passable = memoryview(grid.passable)
+    factor = factors[0]
+
+    g_score[source] = 0
+    r, c = divmod(source, width)
+    h = estimate(abs(r - end_r), abs(c - end_c)) * scale
+    open_set = [(h, h, source)]
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if closed[current]:
+            continue
+        expansions += 1
+
+        if current == target:
+            if stats is not None:
+                stats.update(expansions=expansions, time=g_score[current])
+            return reconstruct_path(grid, parent, source, current)
+        closed[current] = 1
+
+        current_g_score = g_score[current]
+        if sliced:
+            factor = factors[terrain.slice_at(depart + current_g_score)]
+        for offset, cost, side_a, side_b in moves:
+            neighbor = current + offset
+            if not passable[neighbor] or closed[neighbor]:
+                continue
+            if side_a and not (passable[current + side_a] and passable[current + side_b]):
+                continue
+            tentative_g_score = current_g_score + cost * factor[neighbor]
+            if tentative_g_score < g_score[neighbor]:
+                parent[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                r, c = divmod(neighbor, width)
+                h = estimate(abs(r - end_r), abs(c - end_c)) * scale
+                heapq.heappush(open_set, (tentative_g_score + h, h, neighbor))
+
+    if stats is not None:
+        stats.update(expansions=expansions, time=np.inf)
+    raise ValueError("No path found from start to end.")
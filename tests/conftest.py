@@ -0,0 +1,12 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live at the top level of the repository, next to the demos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(20240517)
@@ -0,0 +1,65 @@
+import heapq
+import random
+from typing import Dict, List, Optional, Tuple
+from gridengine import MovementModel
+
+def random_route(rng: random.Random, rows: int, cols: int, density: float = 0.3) -> List[List[str]]:
+    """
+    Random map of '.' and 'X' cells.
+    """
+    return [['X' if rng.random() < density else '.' for _ in range(cols)] for _ in range(rows)]
+
+def open_cells(route: List[List[str]]) -> List[Tuple[int, int]]:
+    return [(r, c) for r, row in enumerate(route) for c, cell in enumerate(row) if cell != 'X']
+
+def can_move(route: List[List[str]], movement: MovementModel, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    """
+    Whether one move from a to b is allowed on the map under the movement model.
+    """
+    dr, dc = b[0] - a[0], b[1] - a[1]
+    if (dr, dc) not in movement.directions:
+        return False
+    rows, cols = len(route), len(route[0])
+    for r, c in (a, b):
+        if not (0 <= r < rows and 0 <= c < cols) or route[r][c] == 'X':
+            return False
+    if dr and dc and not movement.corner_cutting:
+        return route[a[0] + dr][a[1]] != 'X' and route[a[0]][a[1] + dc] != 'X'
+    return True
+
+def dijkstra(route: List[List[str]], source: Tuple[int, int], movement: MovementModel,
+             weights: Optional[Dict[Tuple[int, int], float]] = None) -> Dict[Tuple[int, int], float]:
+    """
+    Reference costs from source to every reachable cell, straight from the map and the
+    movement model. Entering a cell costs the step cost times its weight (default 1).
+    """
+    weights = weights or {}
+    dist = {source: 0}
+    open_set = [(0, source)]
+    while open_set:
+        d, current = heapq.heappop(open_set)
+        if d > dist[current]:
+            continue
+        for dr, dc in movement.directions:
+            neighbor = (current[0] + dr, current[1] + dc)
+            if not can_move(route, movement, current, neighbor):
+                continue
+            tentative = d + movement.step_cost(dr, dc) * weights.get(neighbor, 1)
+            if tentative < dist.get(neighbor, float('inf')):
+                dist[neighbor] = tentative
+                heapq.heappush(open_set, (tentative, neighbor))
+    return dist
+
+def path_cost(route: List[List[str]], movement: MovementModel, start: Tuple[int, int], path: List[Tuple[int, int]],
+              weights: Optional[Dict[Tuple[int, int], float]] = None) -> float:
+    """
+    Cost of a path as returned by the searches (start excluded), checking every move is allowed.
+    """
+    weights = weights or {}
+    cost = 0
+    previous = start
+    for cell in path:
+        assert can_move(route, movement, previous, cell), f"illegal move from {previous} to {cell}"
+        cost += movement.step_cost(cell[0] - previous[0], cell[1] - previous[1]) * weights.get(cell, 1)
+        previous = cell
+    return cost
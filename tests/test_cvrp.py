@@ -0,0 +1,58 @@
+import pytest
+
+from cvrp import RouteOptimizer
+from distancematrix import DistanceMatrix
+from gridengine import GridMap
+from mapgen import generate_scenario
+from parsing import parse_packages, parse_route_and_packages
+
+SCENARIOS = [
+    (seed, weights, capacity)
+    for seed in range(4)
+    for weights, capacity in (('uniform', 20), ('light', 10), ('heavy', 15))
+]
+
+def optimizer(seed, weights='uniform', capacity=20, **kwargs):
+    scenario = generate_scenario(30, 30, 0.2, 12, weights, max_weight=capacity, truck_capacity=capacity, seed=seed)
+    start, end, package_locations = parse_route_and_packages(scenario['route'], scenario['packages'])
+    legs = DistanceMatrix.from_parsed(GridMap.from_route(scenario['route']), start, end, package_locations)
+    return RouteOptimizer(parse_packages(scenario['packages']), legs, capacity, **kwargs)
+
+def check_plan(planner, trips):
+    assert sorted(p for trip in trips for p in trip) == list(range(len(planner.ids)))
+    for trip in trips:
+        assert trip and sum(planner.weights[p] for p in trip) <= planner.truck_capacity
+
+@pytest.mark.parametrize('seed, weights, capacity', SCENARIOS)
+def test_savings_trips_respect_the_capacity(seed, weights, capacity):
+    planner = optimizer(seed, weights, capacity)
+    check_plan(planner, planner.savings_trips())
+
+@pytest.mark.parametrize('seed, weights, capacity', SCENARIOS)
+def test_improve_never_raises_the_objective(seed, weights, capacity):
+    planner = optimizer(seed, weights, capacity)
+    start = planner.savings_trips()
+    for max_moves in (0, 1, 10, 100, None):
+        trips = planner.improve(start, max_moves=max_moves)
+        check_plan(planner, trips)
+        assert planner._objective(trips) <= planner._objective(start) + 1e-9
+
+def test_move_budget_makes_solve_reproducible():
+    plans = [optimizer(1).solve(None, max_moves=300)['plan'] for _ in range(2)]
+    assert plans[0] == plans[1]
+
+    planner = optimizer(1)
+    start = planner.savings_trips()
+    assert planner.improve(start, max_moves=0) == start
+
+def test_lateness_counts_every_second_past_the_deadline():
+    on_time = optimizer(2, deadlines={})
+    plan = on_time.solve(None, max_moves=0)['plan']
+    assert plan['lateness'] == 0
+
+    # A deadline at time 0 makes every package exactly as late as its delivery time
+    late = optimizer(2, deadlines={urgency: 0 for urgency in range(1, 6)}, lateness_penalty=2.0)
+    trips = late._to_positions(plan['trips'])
+    deliveries = late.evaluate(plan['trips'])
+    assert late._lateness(trips) == pytest.approx(sum(deliveries['deliveries'].values()))
+    assert late._objective(trips) == pytest.approx(deliveries['distance'] + 2.0 * sum(deliveries['deliveries'].values()))
@@ -0,0 +1,168 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from cvrp import RouteOptimizer
+from dispatcher import Dispatcher
+from distancematrix import DistanceMatrix
+from gridengine import GridMap
+from parsing import parse_packages, parse_route_and_packages
+
+ROUTE = [
+    ['S', '.', '.', '.', '.', 'PKG2'],
+    ['.', 'X', 'X', '.', 'X', '.'],
+    ['.', '.', 'PKG1', '.', 'X', '.'],
+    ['X', 'X', 'X', '.', 'X', 'X'],
+    ['E', '.', '.', '.', 'X', '.'],
+]
+PACKAGES = [
+    {'id': 'PKG1', 'urgency': 1, 'weight': 3, 'description': 'Books'},
+    {'id': 'PKG2', 'urgency': 2, 'weight': 4, 'description': 'Plates'},
+]
+
+def order(package_id, weight=2, urgency=1):
+    return {'id': package_id, 'urgency': urgency, 'weight': weight, 'description': 'New order'}
+
+@pytest.fixture
+def dispatcher():
+    return Dispatcher([row[:] for row in ROUTE], 5, [dict(package) for package in PACKAGES], time_budget=None, max_moves=2000)
+
+@pytest.mark.parametrize('location', [(50, 50), (-1, 0), (0, 6), (5, 0), (1.5, 2), ('1', 2), (1, 2, 3), 7, None])
+def test_assign_rejects_bad_locations(dispatcher, location):
+    with pytest.raises(ValueError):
+        dispatcher.assign(order('NEW'), location)
+
+@pytest.mark.parametrize('package, location', [
+    (order('NEW', weight=9), (0, 3)),   # heavier than the truck
+    (order('PKG1'), (0, 3)),            # id already planned
+    (order('NEW'), (1, 1)),             # on an obstacle
+    (order('NEW'), (4, 5)),             # walled off from the warehouse
+])
+def test_rejected_orders_leave_the_plan_alone(dispatcher, package, location):
+    labels, plan = list(dispatcher.legs.labels), dispatcher.plan()
+    with pytest.raises(ValueError):
+        dispatcher.assign(package, location)
+    assert dispatcher.legs.labels == labels
+    assert dispatcher.plan() == plan
+    # A valid order still goes through afterwards
+    dispatcher.assign(order('LATER'), (2, 3))
+    assert 'LATER' in sum(dispatcher.plan(), [])
+
+def test_run_survives_failing_orders(dispatcher):
+    async def main():
+        task = asyncio.create_task(dispatcher.run())
+        bad_location = dispatcher.submit(order('A'), (50, 50))
+        missing_weight = dispatcher.submit({'id': 'B', 'urgency': 1}, (0, 3))
+        cancelled = dispatcher.submit(order('C'), (20, 0))
+        cancelled.cancel()
+        good = dispatcher.submit(order('D'), (0, 3))
+        dispatcher.stop()
+        await asyncio.wait_for(task, timeout=5)
+        with pytest.raises(ValueError):
+            bad_location.result()
+        with pytest.raises(ValueError):
+            missing_weight.result()
+        return good.result()
+
+    trip = asyncio.run(main())
+    assert 'D' in dispatcher.plan()[trip]
+    assert dispatcher.latency()['orders'] == 1
+    assert dispatcher.latency()['rejected'] == 3
+
+@pytest.mark.parametrize('package', [
+    {'id': 'NEW', 'weight': 2, 'description': 'No urgency'},
+    {'id': 'NEW', 'urgency': 1, 'description': 'No weight'},
+    {'urgency': 1, 'weight': 2},
+    {'id': 'NEW', 'urgency': '1', 'weight': 2},
+    {'id': 'NEW', 'urgency': 1, 'weight': '2'},
+    {'id': 'NEW', 'urgency': 1, 'weight': 0},
+    {'id': 7, 'urgency': 1, 'weight': 2},
+    ['NEW', 1, 2],
+])
+def test_malformed_order_then_valid_order(dispatcher, package):
+    async def main():
+        task = asyncio.create_task(dispatcher.run())
+        bad = dispatcher.submit(package, (0, 3))
+        good = dispatcher.submit(order('NEW'), (0, 3))
+        dispatcher.stop()
+        await asyncio.wait_for(task, timeout=5)
+        with pytest.raises(ValueError):
+            bad.result()
+        return good.result()
+
+    labels = list(dispatcher.legs.labels)
+    trip = asyncio.run(main())
+    assert 'NEW' in dispatcher.plan()[trip]
+    assert dispatcher.legs.labels == labels + ['NEW']
+    optimizer = dispatcher.optimizer
+    assert len(optimizer.ids) == len(optimizer.deadline_of) == len(optimizer.weights) == len(optimizer.nodes)
+
+def test_failed_add_package_is_rolled_back(dispatcher):
+    # Skips the dispatcher's own checks to hit the optimizer with a package it cannot take
+    legs, optimizer = dispatcher.legs, dispatcher.optimizer
+    labels, ids, distances = list(legs.labels), list(optimizer.ids), legs.distances.copy()
+    legs.add_point('BAD', (0, 3))
+    with pytest.raises(KeyError):
+        optimizer.add_package({'id': 'BAD', 'weight': 1})
+    assert optimizer.ids == ids and len(optimizer.deadline_of) == len(ids)
+    assert legs.pop_point() == 'BAD'
+    assert legs.labels == labels and 'BAD' not in legs.index
+    np.testing.assert_array_equal(legs.distances, distances)
+    assert dispatcher.assign(order('BAD'), (0, 3)) >= 0
+
+def test_added_packages_keep_their_deadline_after_commit():
+    route = [row[:] for row in ROUTE]
+    start, end, locations = parse_route_and_packages(route, PACKAGES)
+    legs = DistanceMatrix.from_parsed(GridMap.from_route(route), start, end, locations)
+    optimizer = RouteOptimizer(parse_packages(PACKAGES), legs, 5)
+    urgent = optimizer.ids.index('PKG1')
+    deadline = optimizer.deadlines[1]
+    assert optimizer.deadline_of[urgent] == deadline
+
+    duration = optimizer.commit([optimizer.ids.index('PKG2')])
+    duration += optimizer.commit([])
+    assert optimizer.deadline_of[urgent] == pytest.approx(deadline - duration)
+
+    # A package with the same urgency arriving now is due at the same moment
+    legs.add_point('PKG3', (2, 3))
+    position = optimizer.add_package(order('PKG3', urgency=1))
+    assert optimizer.deadline_of[position] == pytest.approx(optimizer.deadline_of[urgent])
+
+def test_added_points_match_a_full_matrix():
+    route = [row[:] for row in ROUTE]
+    grid = GridMap.from_route(route)
+    points = {'S': (0, 0), 'E': (4, 0)}
+    legs = DistanceMatrix(grid, points)
+    extra = [(0, 5), (2, 2), (2, 3), (4, 5), (4, 3), (1, 0), (0, 3)]
+    for k, cell in enumerate(extra):
+        legs.add_point(f"P{k}", cell)
+        points[f"P{k}"] = cell
+    full = DistanceMatrix(grid, points)
+
+    np.testing.assert_array_equal(legs.distances, full.distances)
+    np.testing.assert_array_equal(legs.step_counts, full.step_counts)
+    for a in points:
+        for b in points:
+            if legs.distance(a, b) != np.inf:
+                assert len(legs.path(a, b)) == legs.steps(a, b)
+                assert (legs.path(a, b) or [points[a]])[-1] == points[b]
+
+def test_bounded_path_memory_reads_back_the_same_legs():
+    route = [row[:] for row in ROUTE]
+    grid = GridMap.from_route(route)
+    points = {'S': (0, 0), 'E': (4, 0), 'P0': (0, 5), 'P1': (2, 2), 'P2': (4, 5)}
+    full = DistanceMatrix(grid, points)
+    legs = DistanceMatrix(grid, points, path_memory=grid.size)
+    for k, cell in enumerate([(2, 3), (4, 3), (1, 0)]):
+        full.add_point(f"Q{k}", cell)
+        legs.add_point(f"Q{k}", cell)
+        points[f"Q{k}"] = cell
+
+    assert legs.row_capacity == 1 and legs._code_rows.shape == (1, grid.size)
+    np.testing.assert_array_equal(legs.distances, full.distances)
+    np.testing.assert_array_equal(legs.step_counts, full.step_counts)
+    for a in points:
+        for b in points:
+            if full.distance(a, b) != np.inf:
+                assert legs.path(a, b) == full.path(a, b)
@@ -0,0 +1,37 @@
+import pytest
+
+from dispatcher import Dispatcher
+from fleet import simulate_fleet
+
+ROUTE = [
+    ['S', '.', '.', 'X', '.', 'PKG3'],
+    ['.', 'X', '.', 'X', 'X', 'X'],
+    ['.', 'PKG1', '.', '.', '.', '.'],
+    ['X', 'X', 'X', '.', 'X', 'X'],
+    ['E', '.', '.', '.', 'X', 'PKG2'],
+]
+PACKAGES = [
+    {'id': 'PKG1', 'urgency': 1, 'weight': 3, 'description': 'Books'},
+    {'id': 'PKG2', 'urgency': 1, 'weight': 2, 'description': 'Cups'},
+    {'id': 'PKG3', 'urgency': 2, 'weight': 4, 'description': 'Plates'},
+]
+
+def test_fleet_reports_every_walled_off_package_and_start():
+    trucks = [{'capacity': 10}, {'capacity': 10, 'name': 'van', 'start': [4, 5]}]
+    with pytest.raises(ValueError) as error:
+        simulate_fleet(PACKAGES, [row[:] for row in ROUTE], trucks, time_budget=None, max_moves=2000, workers=1)
+    message = str(error.value)
+    assert 'PKG2' in message and 'PKG3' in message and 'start of van' in message
+    assert 'PKG1' not in message and 'No truck can carry' not in message
+
+def test_fleet_runs_when_everything_is_reachable():
+    route = [row[:] for row in ROUTE]
+    route[0][5] = route[4][5] = '.'
+    trucks = [{'capacity': 10}, {'capacity': 5, 'name': 'van', 'start': [2, 5]}]
+    result = simulate_fleet(PACKAGES[:1], route, trucks, time_budget=None, max_moves=2000, workers=1)
+    assert sum(len(run['packages']) for run in result['trucks'].values()) == 1
+
+def test_dispatcher_reports_walled_off_packages():
+    with pytest.raises(ValueError) as error:
+        Dispatcher([row[:] for row in ROUTE], 10, PACKAGES, time_budget=None, max_moves=2000)
+    assert 'PKG2' in str(error.value) and 'PKG3' in str(error.value)
@@ -0,0 +1,97 @@
+import heapq
+import importlib
+from typing import List, Tuple
+
+import pytest
+
+from gridengine import EIGHT_CONNECTED, GridMap, legacy_a_star
+from helpers import open_cells, random_route
+
+def heuristic(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def original_a_star(route: List[List[str]], start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """
+    a_star as it was in Pathplanning.py before the grid engine, kept as the reference.
+    """
+    rows, cols = len(route), len(route[0])
+    open_set = []
+    heapq.heappush(open_set, (0, start))
+    came_from = {}
+    g_score = {start: 0}
+    f_score = {start: heuristic(start, end)}
+
+    def get_neighbors(node):
+        directions = [
+            (-1, 0), (1, 0), (0, -1), (0, 1),  # Cardinal directions
+            (-1, -1), (-1, 1), (1, -1), (1, 1)  # Diagonal directions
+        ]
+        neighbors = []
+        for dr, dc in directions:
+            r, c = node[0] + dr, node[1] + dc
+            if 0 <= r < rows and 0 <= c < cols and route[r][c] != 'X':
+                neighbors.append((r, c))
+        return neighbors
+
+    while open_set:
+        _, current = heapq.heappop(open_set)
+
+        if current == end:
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            return path
+
+        for neighbor in get_neighbors(current):
+            tentative_g_score = g_score[current] + 1
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
+                if neighbor not in [i[1] for i in open_set]:
+                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+
+    raise ValueError("No path found from start to end.")
+
+def test_legacy_a_star_matches_original(rng):
+    for _ in range(60):
+        route = random_route(rng, rng.randint(1, 25), rng.randint(1, 25), density=rng.choice([0.1, 0.3, 0.45]))
+        cells = open_cells(route)
+        if not cells:
+            continue
+        grid = GridMap.from_route(route)
+        for _ in range(5):
+            start, end = rng.choice(cells), rng.choice(cells)
+            try:
+                expected = original_a_star(route, start, end)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    legacy_a_star(grid, start, end)
+                continue
+            assert legacy_a_star(grid, start, end) == expected
+
+def test_from_route_uses_first_row_width():
+    # The original a_star only looks at as many columns as the first row has
+    route = [['S', '.', '.'], ['.', 'X', '.', 'X', 'X'], ['.', '.', 'E', '.']]
+    grid = GridMap.from_route(route)
+    assert (grid.rows, grid.cols) == (3, 3)
+    assert legacy_a_star(grid, (0, 0), (2, 2)) == original_a_star(route, (0, 0), (2, 2))
+
+def test_set_passable_bumps_revision_only_on_change():
+    grid = GridMap.from_route([['.', 'X'], ['.', '.']])
+    grid.set_passable((0, 0), True)
+    assert grid.revision == 0
+    grid.set_passable((0, 1), True)
+    assert grid.revision == 1
+    grid.set_passable((0, 1), False)
+    assert grid.revision == 2
+
+@pytest.mark.parametrize('demo', ['Pathplanning', '陽光彩虹小白馬'])
+def test_demo_heuristic_delegates_to_the_default_movement(demo, rng):
+    heuristic = importlib.import_module(demo).heuristic
+    for _ in range(50):
+        a = (rng.randint(0, 30), rng.randint(0, 30))
+        b = (rng.randint(0, 30), rng.randint(0, 30))
+        assert heuristic(a, b) == EIGHT_CONNECTED.heuristic(a, b)
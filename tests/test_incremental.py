@@ -0,0 +1,104 @@
+import pytest
+
+from connectivity import ComponentIndex
+from dstarlite import DStarLite
+from gridengine import MOVEMENT_MODELS, GridMap
+from hpastar import HierarchicalGrid
+from returntree import ReturnTree
+from helpers import dijkstra, open_cells, path_cost, random_route
+
+MODELS = list(MOVEMENT_MODELS.values())
+
+def edits(rng, route, keep, count=25):
+    """
+    Random cells to open or block, never the cells in keep. Applied to route as they are yielded.
+    """
+    cells = [(r, c) for r in range(len(route)) for c in range(len(route[0])) if (r, c) not in keep]
+    for _ in range(count):
+        r, c = rng.choice(cells)
+        passable = route[r][c] == 'X'
+        route[r][c] = '.' if passable else 'X'
+        yield (r, c), passable
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_dstar_lite_repairs_match_dijkstra(movement, rng):
+    for _ in range(8):
+        route = random_route(rng, 14, 14)
+        goal = rng.choice(open_cells(route))
+        planner = DStarLite(GridMap.from_route(route), goal, movement)
+        weights = {}
+        for cell, passable in edits(rng, route, {goal}):
+            planner.set_passable(cell, passable)
+            if passable and rng.random() < 0.5:
+                weights[cell] = rng.choice([1, 2.5, 4])
+                planner.set_weight(cell, weights[cell])
+            # The truck moves between plans, so the key modifier is exercised too
+            start = rng.choice(open_cells(route))
+            expected = dijkstra(route, start, movement, weights)
+            if goal not in expected:
+                with pytest.raises(ValueError):
+                    planner.plan(start)
+                continue
+            path = planner.plan(start)
+            assert path_cost(route, movement, start, path, weights) == pytest.approx(expected[goal])
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_return_tree_repairs_match_dijkstra(movement, rng):
+    for _ in range(6):
+        route = random_route(rng, 12, 12)
+        goal = rng.choice(open_cells(route))
+        tree = ReturnTree(GridMap.from_route(route), goal, movement)
+        for cell, passable in edits(rng, route, {goal}):
+            tree.set_passable(cell, passable)
+            expected = dijkstra(route, goal, movement)
+            for start in open_cells(route):
+                assert tree.distance(start) == pytest.approx(expected.get(start, float('inf')))
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_hierarchical_updates_match_rebuild(movement, rng):
+    for _ in range(6):
+        route = random_route(rng, 17, 17, density=0.25)
+        planner = HierarchicalGrid(GridMap.from_route(route), movement, sector_size=4)
+        planner.precompute()
+        for cell, passable in edits(rng, route, set(), count=15):
+            planner.set_passable(cell, passable)
+            fresh = HierarchicalGrid(GridMap.from_route(route), movement, sector_size=4)
+            cells = open_cells(route)
+            for _ in range(3):
+                start, end = rng.choice(cells), rng.choice(cells)
+                try:
+                    expected = path_cost(route, movement, start, fresh.find_path(start, end))
+                except ValueError:
+                    with pytest.raises(ValueError):
+                        planner.find_path(start, end)
+                    continue
+                assert path_cost(route, movement, start, planner.find_path(start, end)) == pytest.approx(expected)
+
+def same_partition(index, fresh, cells):
+    forward, backward = {}, {}
+    for cell in cells:
+        a, b = index.component(cell), fresh.component(cell)
+        if forward.setdefault(a, b) != b or backward.setdefault(b, a) != a:
+            return False
+    return True
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_component_index_updates_match_relabel(movement, rng):
+    for _ in range(10):
+        route = random_route(rng, 15, 15, density=0.45)
+        grid = GridMap.from_route(route)
+        index = ComponentIndex(grid, movement)
+        for cell, passable in edits(rng, route, set(), count=40):
+            index.set_passable(cell, passable)
+            fresh = ComponentIndex(GridMap.from_route(route), movement)
+            cells = [(r, c) for r in range(15) for c in range(15)]
+            assert same_partition(index, fresh, cells)
+
+def test_component_index_follows_edits_behind_its_back(rng):
+    route = random_route(rng, 15, 15, density=0.45)
+    grid = GridMap.from_route(route)
+    index = ComponentIndex(grid)
+    for cell, passable in edits(rng, route, set(), count=20):
+        grid.set_passable(cell, passable)
+        fresh = ComponentIndex(GridMap.from_route(route))
+        assert same_partition(index, fresh, [(r, c) for r in range(15) for c in range(15)])
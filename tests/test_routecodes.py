@@ -0,0 +1,36 @@
+from parsing import parse_route_and_packages
+from routecodes import OBSTACLE, OPEN, PACKAGE, RouteCodes, encode_route
+
+def test_edited_routes_are_encoded_again():
+    route = [['S', '.', 'PKG1'], ['.', 'X', '.'], ['E', '.', '.']]
+    assert encode_route(route).package_locations == {'PKG1': (0, 2)}
+    route[0][2] = '.'
+    route[2][1] = 'PKG2'
+    encoded = encode_route(route)
+    assert encoded.package_locations == {'PKG2': (2, 1)}
+    assert encoded.codes[0, 2] == OPEN and encoded.codes[2, 1] == PACKAGE
+
+def test_encoding_is_shared_when_passed_along():
+    route = [['S', '.', 'PKG1'], ['.', 'X', '.'], ['E', '.', '.']]
+    codes = encode_route(route)
+    assert encode_route(codes) is codes
+
+    codes.set_cell((0, 2), '.')
+    codes.set_cell((0, 1), 'X')
+    assert route[0][1] == 'X' and codes.codes[0, 1] == OBSTACLE
+    start, end, package_locations = parse_route_and_packages(codes, [])
+    assert (start, end, package_locations) == ((0, 0), (2, 0), {})
+    assert not codes.to_grid().passable[codes.to_grid().node_id((0, 1))]
+
+def test_first_row_sets_the_width():
+    codes = RouteCodes([['S', '.'], ['.', 'E', 'PKG9']])
+    assert (codes.rows, codes.cols) == (2, 2)
+    assert codes.package_locations == {}
+
+def test_map_file_codes_match_the_route_encoding(tmp_path):
+    import numpy as np
+    from mapformat import load_map, save_map
+
+    route = [['S', '.', 'PKG1'], ['.', 'X', 'PKG2'], ['E', '.', '.']]
+    save_map(route, str(tmp_path / 'route.map'))
+    np.testing.assert_array_equal(load_map(str(tmp_path / 'route.map')).to_codes(), encode_route(route).codes)
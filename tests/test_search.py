@@ -0,0 +1,163 @@
+import pytest
+
+from batchsearch import BatchSearch
+from bidirectional import grid_bidirectional_a_star
+from dstarlite import DStarLite
+from gridengine import EIGHT_CONNECTED, FOUR_CONNECTED, MOVEMENT_MODELS, GridMap, grid_a_star
+from hpastar import HierarchicalGrid
+from jumppoint import expand_path, grid_jump_point_search
+from pathcache import PathCache
+from planning import a_star, nearest_path
+from returntree import ReturnTree
+from helpers import dijkstra, open_cells, path_cost, random_route
+
+MODELS = list(MOVEMENT_MODELS.values())
+
+def scenarios(rng, count=25):
+    """
+    Random maps with a start and a handful of ends, some of them unreachable.
+    """
+    for _ in range(count):
+        route = random_route(rng, rng.randint(2, 22), rng.randint(2, 22), density=rng.choice([0.15, 0.3, 0.4]))
+        cells = open_cells(route)
+        if len(cells) < 2:
+            continue
+        start = rng.choice(cells)
+        yield route, start, [rng.choice(cells) for _ in range(4)]
+
+def check_point_to_point(search, movement, rng):
+    for route, start, ends in scenarios(rng):
+        expected = dijkstra(route, start, movement)
+        grid = GridMap.from_route(route)
+        for end in ends:
+            if end not in expected:
+                with pytest.raises(ValueError):
+                    search(grid, start, end, movement)
+                continue
+            path = search(grid, start, end, movement)
+            assert path_cost(route, movement, start, path) == pytest.approx(expected[end])
+            assert (path[-1] if path else start) == end
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_grid_a_star_matches_dijkstra(movement, rng):
+    check_point_to_point(grid_a_star, movement, rng)
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_bidirectional_a_star_matches_dijkstra(movement, rng):
+    check_point_to_point(grid_bidirectional_a_star, movement, rng)
+
+def test_jump_point_search_matches_dijkstra(rng):
+    def search(grid, start, end, movement):
+        return expand_path(start, grid_jump_point_search(grid, start, end, movement))
+    check_point_to_point(search, EIGHT_CONNECTED, rng)
+
+@pytest.mark.parametrize('movement', [model for model in MODELS if model is not EIGHT_CONNECTED], ids=lambda model: model.name)
+def test_jump_point_search_rejects_other_models(movement):
+    grid = GridMap.from_route([['.', '.'], ['.', '.']])
+    with pytest.raises(ValueError):
+        grid_jump_point_search(grid, (0, 0), (1, 1), movement)
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_batch_search_matches_dijkstra(movement, rng):
+    for route, start, ends in scenarios(rng):
+        expected = dijkstra(route, start, movement)
+        search = BatchSearch(GridMap.from_route(route), movement)
+
+        costs = search.one_to_many(start, ends)
+        assert set(costs) == {end for end in ends if end in expected}
+        for end, cost in costs.items():
+            assert cost == pytest.approx(expected[end])
+            assert path_cost(route, movement, start, search.path(end)) == pytest.approx(cost)
+
+        # Moves are symmetric, so the costs back to start are the same
+        costs = search.many_to_one(ends, start)
+        assert set(costs) == {end for end in ends if end in expected}
+        for end, cost in costs.items():
+            assert cost == pytest.approx(expected[end])
+            path = search.path(end)
+            assert path_cost(route, movement, end, path) == pytest.approx(cost)
+
+        reachable = sorted(expected[end] for end in ends if end in expected)
+        nearest = search.one_to_many(start, ends, limit=1)
+        assert list(nearest.values()) == pytest.approx(reachable[:1])
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_goal_trees_match_dijkstra(movement, rng):
+    for route, goal, starts in scenarios(rng, count=15):
+        expected = dijkstra(route, goal, movement)
+        tree = ReturnTree(GridMap.from_route(route), goal, movement)
+        planner = DStarLite(GridMap.from_route(route), goal, movement)
+        for start in starts:
+            if start not in expected:
+                assert tree.distance(start) == float('inf')
+                with pytest.raises(ValueError):
+                    planner.plan(start)
+                continue
+            assert tree.distance(start) == pytest.approx(expected[start])
+            assert path_cost(route, movement, start, tree.path_from(start)) == pytest.approx(expected[start])
+            assert path_cost(route, movement, start, planner.plan(start)) == pytest.approx(expected[start])
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_hierarchical_paths_are_valid_and_near_optimal(movement, rng):
+    for route, start, ends in scenarios(rng, count=15):
+        expected = dijkstra(route, start, movement)
+        planner = HierarchicalGrid(GridMap.from_route(route), movement, sector_size=5)
+        for end in ends:
+            if end not in expected:
+                with pytest.raises(ValueError):
+                    planner.find_path(start, end)
+                continue
+            path = planner.find_path(start, end)
+            assert (path[-1] if path else start) == end
+            assert path_cost(route, movement, start, path) >= expected[end] - 1e-9
+
+@pytest.mark.parametrize('movement', MODELS, ids=lambda model: model.name)
+def test_same_sector_queries_are_optimal(movement, rng):
+    # One sector covers the whole map, so every query is answered by the direct search
+    for route, start, ends in scenarios(rng, count=10):
+        expected = dijkstra(route, start, movement)
+        planner = HierarchicalGrid(GridMap.from_route(route), movement, sector_size=64)
+        for end in ends:
+            if end not in expected:
+                with pytest.raises(ValueError):
+                    planner.find_path(start, end)
+                continue
+            path = planner.find_path(start, end)
+            assert (path[-1] if path else start) == end
+            assert path_cost(route, movement, start, path) == pytest.approx(expected[end])
+
+def test_path_cache_follows_reported_edits():
+    route = [['.', '.', '.'], ['.', 'X', '.'], ['.', '.', '.']]
+    cache = PathCache(GridMap.from_route(route))
+    stats = {}
+    first = a_star(route, (0, 0), (2, 2), cache=cache)
+    assert a_star(route, (0, 0), (2, 2), cache=cache) == first
+    assert cache.cache_info()['hits'] == 1
+
+    # Editing a non-obstacle cell, e.g. a picked-up package, keeps the cache warm
+    cache.set_passable((0, 1), True)
+    cache.find_path((0, 0), (2, 2), stats=stats)
+    assert stats['expansions'] == 0
+
+    for cell in [(0, 1), (1, 0), (1, 2), (2, 1)]:
+        route[cell[0]][cell[1]] = 'X'
+        cache.set_passable(cell, False)
+    with pytest.raises(ValueError):
+        a_star(route, (0, 0), (2, 2), cache=cache)
+    assert cache.cache_info()['invalidations'] == 1
+
+    route[1][1] = '.'
+    cache.set_passable((1, 1), True)
+    assert a_star(route, (0, 0), (2, 2), cache=cache) == a_star(route, (0, 0), (2, 2))
+
+def test_nearest_path_follows_the_search_movement():
+    route = [['.', '.', '.'], ['.', 'X', '.'], ['.', '.', '.']]
+    goals = [(2, 2), (0, 2)]
+    assert nearest_path(route, (0, 0), goals) == ((0, 2), [(0, 1), (0, 2)])
+
+    search = BatchSearch(GridMap.from_route(route), FOUR_CONNECTED)
+    goal, path = nearest_path(route, (1, 0), [(2, 2), (0, 2)], search=search)
+    assert path_cost(route, FOUR_CONNECTED, (1, 0), path) == 3
+    assert nearest_path(route, (1, 0), [(2, 2), (0, 2)], FOUR_CONNECTED, search=search)[1] == path
+    with pytest.raises(ValueError):
+        nearest_path(route, (1, 0), goals, EIGHT_CONNECTED, search=search)
@@ -0,0 +1,35 @@
+import pytest
+
+from mapgen import generate_scenario
+from simulation import simulate_delivery
+from terrain import TerrainCosts
+
+def test_search_stats_cover_every_leg_search():
+    scenario = generate_scenario(25, 25, 0.2, 6, seed=3)
+    run = simulate_delivery(scenario['packages'], scenario['route'], scenario['truck_capacity'], time_budget=None, max_moves=2000)
+    # One matrix search per point of interest: S, E and every package
+    assert run['search_stats']['searches'] == 2 + len(scenario['packages'])
+    assert run['search_stats']['expansions'] > 0
+
+    terrain = TerrainCosts.uniform(25, 25)
+    driven = simulate_delivery(scenario['packages'], scenario['route'], scenario['truck_capacity'], time_budget=None, max_moves=2000, terrain=terrain)
+    assert driven['search_stats']['searches'] == run['search_stats']['searches'] + len(driven['legs'])
+    assert driven['search_stats']['expansions'] > run['search_stats']['expansions']
+
+def test_export_rejects_bad_frame_skip(tmp_path):
+    pytest.importorskip('matplotlib')
+    from export import export_run
+
+    scenario = generate_scenario(10, 10, 0.1, 2, seed=1)
+    run = simulate_delivery(scenario['packages'], scenario['route'], scenario['truck_capacity'], time_budget=None, max_moves=2000)
+    for frame_skip in (0, -2):
+        with pytest.raises(ValueError):
+            export_run(run, scenario['route'], str(tmp_path / 'run.gif'), frame_skip=frame_skip)
+
+def test_packages_without_a_description_are_labelled_by_id():
+    scenario = generate_scenario(15, 15, 0.1, 4, seed=2)
+    packages = [{key: value for key, value in package.items() if key != 'description'} for package in scenario['packages']]
+    run = simulate_delivery(packages, scenario['route'], scenario['truck_capacity'], time_budget=None, max_moves=2000)
+    pickups = [event for event in run['events'] if event['type'] == 'pickup']
+    assert len(pickups) == len(packages)
+    assert all(event['description'] == event['package'] for event in pickups)